@@ -1,6 +1,25 @@
 from django.contrib import admin
+from django.db import transaction
 
+from books.cache import bump_catalogue_version
 from books.models import Book
+from borrowings.inventory import spread_inventory
 
 
-admin.site.register(Book)
+@admin.register(Book)
+class BookAdmin(admin.ModelAdmin):
+    """Books admin, invalidating the cached book responses on writes."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "inventory" in form.changed_data:
+            spread_inventory([obj.pk])
+        transaction.on_commit(bump_catalogue_version)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(bump_catalogue_version)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(bump_catalogue_version)
@@ -0,0 +1,241 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+
+from books.models import Book
+
+
+TITLE = "title"
+AUTHOR = "author"
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.casefold()))
+
+
+def _keys(text: str) -> list:
+    """Keys of a completion, one starting at every word of it."""
+    words = normalize(text).split(" ")
+    return [" ".join(words[start:]) for start in range(len(words))]
+
+
+class PrefixIndex:
+    """
+    In-process index of book titles and authors for autocomplete.
+
+    Every distinct title and author is stored once per word in a sorted
+    list, so a prefix lookup is a bisect followed by a short scan and
+    "hob" completes "The Hobbit" as well as "Hobbes".
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._entries = []
+        self._books = {}
+        self._by_book = {}
+        self._stale = False
+        self.built_at = None
+
+    def build(self, books) -> None:
+        """Replace the index with ``(id, title, author)`` rows."""
+        entries = set()
+        completions = {}
+        by_book = {}
+        for book_id, title, author in books:
+            by_book[book_id] = ((TITLE, title), (AUTHOR, author))
+            for completion in by_book[book_id]:
+                if completion not in completions:
+                    completions[completion] = set()
+                    entries.update(
+                        (key, *completion) for key in _keys(completion[1])
+                    )
+                completions[completion].add(book_id)
+
+        with self._lock:
+            self._entries = sorted(entries)
+            self._books = completions
+            self._by_book = by_book
+            self.built_at = time.monotonic()
+
+    def add_book(self, book) -> None:
+        """Index a created or updated book."""
+        with self._lock:
+            self.remove_book(book.id)
+            self._by_book[book.id] = (
+                (TITLE, book.title),
+                (AUTHOR, book.author),
+            )
+            for completion in self._by_book[book.id]:
+                if completion not in self._books:
+                    self._books[completion] = set()
+                    for key in _keys(completion[1]):
+                        insort(self._entries, (key, *completion))
+                self._books[completion].add(book.id)
+
+    def remove_book(self, book_id: int) -> None:
+        """Drop a deleted book from the index."""
+        with self._lock:
+            for completion in self._by_book.pop(book_id, ()):
+                book_ids = self._books[completion]
+                book_ids.discard(book_id)
+                if book_ids:
+                    continue
+                del self._books[completion]
+                for key in _keys(completion[1]):
+                    entry = (key, *completion)
+                    position = bisect_left(self._entries, entry)
+                    if self._entries[position:position + 1] == [entry]:
+                        del self._entries[position]
+
+    def complete(self, prefix: str, limit: int = 10) -> list:
+        """Return up to ``limit`` completions of ``prefix``."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        completions = []
+        seen = set()
+
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and len(completions) < limit:
+                key, field, text = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                if (field, text) not in seen:
+                    seen.add((field, text))
+                    completions.append(
+                        {
+                            "text": text,
+                            "field": field,
+                            "book": (
+                                min(self._books[field, text])
+                                if field == TITLE
+                                else None
+                            ),
+                        }
+                    )
+                position += 1
+
+        return completions
+
+    def invalidate(self) -> None:
+        """Make the next lookup rebuild the index, after a bulk write."""
+        self._stale = True
+
+    def ensure_built(self, load_books) -> None:
+        """
+        Build the index from ``load_books()`` when it was never built, or
+        rebuild it when it was invalidated. Only one thread builds at a
+        time: callers wait for the first build, but keep being served the
+        current index while it is rebuilt.
+        """
+        if self.built_at is not None and not self._stale:
+            return
+        if self.built_at is None:
+            self._build_lock.acquire()
+        elif not self._build_lock.acquire(blocking=False):
+            return
+        try:
+            if self.built_at is None or self._stale:
+                # Cleared first, so a book written during the build makes
+                # the next lookup build again.
+                self._stale = False
+                try:
+                    self.build(load_books())
+                except BaseException:
+                    self._stale = True
+                    raise
+        finally:
+            self._build_lock.release()
+
+
+book_index = PrefixIndex()
+
+
+def _matches(text: str, prefix: str) -> bool:
+    return any(key.startswith(prefix) for key in _keys(text))
+
+
+def complete_from_database(prefix: str, limit: int = 10) -> list:
+    """
+    Autocomplete straight from the database. The ``icontains`` filter on
+    the first word is served by the trigram indexes on PostgreSQL, the
+    word matching and ordering of the in-process index is applied to the
+    candidates.
+    """
+    normalized = normalize(prefix)
+    if not normalized:
+        return []
+
+    completions = {}
+    for field in (TITLE, AUTHOR):
+        candidates = (
+            Book.objects.filter(
+                **{f"{field}__icontains": normalized.split(" ")[0]}
+            )
+            .values_list(field, "id")
+            .order_by(field, "id")
+        )
+        found = 0
+        for text, book_id in candidates.iterator(chunk_size=limit * 10):
+            if (field, text) in completions or not _matches(text, normalized):
+                continue
+            completions[field, text] = {
+                "text": text,
+                "field": field,
+                "book": book_id if field == TITLE else None,
+            }
+            found += 1
+            if found == limit:
+                break
+
+    return sorted(
+        completions.values(),
+        key=lambda completion: min(
+            key
+            for key in _keys(completion["text"])
+            if key.startswith(normalized)
+        ),
+    )[:limit]
+
+
+def _load_books():
+    return Book.objects.values_list("id", "title", "author").iterator()
+
+
+def complete(prefix: str, limit: int = 10) -> list:
+    """
+    Complete ``prefix`` from the in-process index, built from the
+    catalogue once and then kept up to date by the book writes. Falls back
+    to the database when ``BOOK_AUTOCOMPLETE_INDEX`` is off.
+    """
+    if not settings.BOOK_AUTOCOMPLETE_INDEX:
+        return complete_from_database(prefix, limit)
+
+    book_index.ensure_built(_load_books)
+    return book_index.complete(prefix, limit)
+
+
+def warm_up() -> None:
+    """
+    Build the index in a background thread when the application is
+    loaded, so the first autocomplete requests do not wait for it.
+    """
+    if settings.BOOK_AUTOCOMPLETE_INDEX:
+        threading.Thread(
+            target=_build_in_background,
+            name="autocomplete-warm-up",
+            daemon=True,
+        ).start()
+
+
+def _build_in_background() -> None:
+    try:
+        book_index.ensure_built(_load_books)
+    finally:
+        connection.close()
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from books.cache import get_book_versions
+from books.models import Book
+from borrowings.inventory import ON_SHELF
+from borrowings.models import Borrowing
+
+
+def _key(book_id, version):
+    return f"books:availability:{book_id}:{version}"
+
+
+def availability_rows(book_ids):
+    """
+    Availability rows of the books, computed with correlated subqueries
+    over their active loans only, so the partial
+    ``borrowing_book_active_idx`` serves them whatever the loan history.
+    The copies on the shelf of sharded books are summed over their shards.
+    """
+    outstanding = (
+        Borrowing.objects.filter(
+            book=OuterRef("pk"), actual_return_date__isnull=True
+        )
+        .order_by()
+        .values("book")
+    )
+    return (
+        Book.objects.filter(id__in=book_ids)
+        .order_by()
+        .annotate(
+            active_loans=Coalesce(
+                Subquery(
+                    outstanding.annotate(count=Count("id")).values("count")
+                ),
+                0,
+                output_field=IntegerField(),
+            ),
+            next_return_date=Subquery(
+                outstanding.annotate(
+                    date=Min("expected_return_date")
+                ).values("date")
+            ),
+        )
+        .values(
+            "id", "active_loans", "next_return_date", on_shelf=ON_SHELF
+        )
+    )
+
+
+def book_availability(book_ids) -> list:
+    """
+    Copies on the shelf, active loans and the earliest expected return of
+    the outstanding copies of each book, for the books that exist.
+
+    Every book is cached on its own for ``BOOK_AVAILABILITY_TIMEOUT``
+    seconds under its book version, which its checkouts and returns bump,
+    and the missing ones are computed in a single query.
+    """
+    keys = {
+        book_id: _key(book_id, version)
+        for book_id, version in get_book_versions(book_ids).items()
+    }
+    cached = cache.get_many(keys.values())
+    availability = {
+        book_id: cached[key] for book_id, key in keys.items() if key in cached
+    }
+
+    missing = [book_id for book_id in keys if book_id not in availability]
+    if missing:
+        computed = {
+            row["id"]: {
+                "id": row["id"],
+                "inventory": row["on_shelf"],
+                "active_loans": row["active_loans"],
+                "next_return_date": row["next_return_date"],
+            }
+            for row in availability_rows(missing)
+        }
+        cache.set_many(
+            {keys[book_id]: row for book_id, row in computed.items()},
+            settings.BOOK_AVAILABILITY_TIMEOUT,
+        )
+        availability.update(computed)
+
+    return [
+        availability[book_id] for book_id in keys if book_id in availability
+    ]
@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+
+from rest_framework import serializers
+
+from books.autocomplete import book_index
+from books.cache import bump_catalogue_version
+from books.models import Book
+from books.serializers import BookSerializer
+from borrowings.inventory import spread_inventory
+
+
+FIELDS = ("title", "author", "cover", "inventory", "daily_fee")
+COPY_SQL = (
+    f"COPY {Book._meta.db_table} ({', '.join(FIELDS)}) "
+    f"FROM STDIN WITH (FORMAT csv)"
+)
+
+
+def read_rows(stream, file_format):
+    """
+    Yield ``(line, row, error)`` for every record of a CSV or JSONL
+    stream, ``error`` is set when the record cannot be parsed.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as error:
+            yield line, text.rstrip("\n"), f"Invalid JSON: {error}"
+            continue
+        if not isinstance(row, dict):
+            yield line, row, "Expected a JSON object"
+            continue
+        yield line, row, None
+
+
+class BookImporter:
+    """
+    Import books in chunks with bounded memory. Every chunk is validated
+    with ``BookSerializer`` and written in its own transaction: rows with
+    an ``id`` are upserted, the others inserted with ``COPY`` on PostgreSQL
+    and ``bulk_create`` elsewhere. Rejected rows are written to
+    ``rejects`` as JSON lines and never abort the import.
+    """
+
+    def __init__(self, rejects, chunk_size=5_000, use_copy=None,
+                 progress=None):
+        self.rejects = rejects
+        self.chunk_size = chunk_size
+        self.use_copy = (
+            connection.vendor == "postgresql" if use_copy is None
+            else use_copy
+        )
+        self.progress = progress
+        self.serializer = BookSerializer()
+        self.stats = {"read": 0, "written": 0, "rejected": 0}
+        self.upserted = False
+
+    def run(self, rows) -> dict:
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            self.import_chunk(chunk)
+            if self.progress:
+                self.progress(self.stats)
+
+        if self.upserted:
+            self.reset_sequence()
+        if self.stats["written"]:
+            transaction.on_commit(bump_catalogue_version)
+            transaction.on_commit(book_index.invalidate)
+        return self.stats
+
+    def import_chunk(self, chunk):
+        books = []
+        for line, row, error in chunk:
+            self.stats["read"] += 1
+            if error is None:
+                book, error = self.validate(row)
+            if error is not None:
+                self.reject(line, row, error)
+                continue
+            books.append((line, row, book))
+
+        try:
+            with transaction.atomic():
+                self.write([book for _, _, book in books])
+        except DatabaseError:
+            # Find the offending rows one by one.
+            for line, row, book in books:
+                try:
+                    with transaction.atomic():
+                        self.write([book])
+                except DatabaseError as error:
+                    self.reject(line, row, str(error))
+                else:
+                    self.stats["written"] += 1
+        else:
+            self.stats["written"] += len(books)
+
+    def validate(self, row):
+        book_id = row.get("id")
+        if book_id in (None, ""):
+            book_id = None
+        else:
+            try:
+                book_id = int(book_id)
+            except (TypeError, ValueError):
+                book_id = 0
+            if book_id < 1:
+                return None, {"id": ["A positive integer is required."]}
+
+        try:
+            data = self.serializer.run_validation(row)
+        except serializers.ValidationError as error:
+            return None, error.detail
+        return Book(id=book_id, **data), None
+
+    def write(self, books):
+        new_books = [book for book in books if book.id is None]
+        existing_books = [book for book in books if book.id is not None]
+
+        if new_books and self.use_copy:
+            self.copy(new_books)
+        elif new_books:
+            Book.objects.bulk_create(new_books)
+
+        if existing_books:
+            Book.objects.bulk_create(
+                existing_books,
+                update_conflicts=True,
+                unique_fields=["id"],
+                update_fields=FIELDS,
+            )
+            spread_inventory([book.id for book in existing_books])
+            self.upserted = True
+
+    def copy(self, books):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(
+            [getattr(book, field) for field in FIELDS] for book in books
+        )
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            raw_cursor = cursor.cursor
+            if hasattr(raw_cursor, "copy_expert"):
+                raw_cursor.copy_expert(COPY_SQL, buffer)
+            else:
+                with raw_cursor.copy(COPY_SQL) as copy:
+                    copy.write(buffer.getvalue())
+
+    def reject(self, line, row, errors):
+        self.stats["rejected"] += 1
+        self.rejects.write(
+            json.dumps(
+                {"line": line, "row": row, "errors": errors}, default=str
+            )
+            + "\n"
+        )
+
+    def reset_sequence(self):
+        """Move the id sequence past ids inserted explicitly."""
+        statements = connection.ops.sequence_reset_sql(no_style(), [Book])
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
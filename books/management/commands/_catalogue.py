@@ -0,0 +1,36 @@
+import random
+
+from books.models import Book
+
+
+WORDS = (
+    "river", "shadow", "garden", "winter", "glass", "empire", "silent",
+    "harbor", "letters", "machine", "summer", "kingdom", "night", "stone",
+    "orchard", "atlas", "memory", "ocean", "crown", "engine", "forest",
+    "lantern", "mirror", "paper", "thunder", "valley", "whisper", "island",
+)
+NAMES = (
+    "Adams", "Baker", "Carter", "Dalton", "Ellis", "Fischer", "Garcia",
+    "Hughes", "Ivanova", "Jensen", "Kowalski", "Lopez", "Moreau", "Novak",
+)
+
+
+def fake_book() -> Book:
+    return Book(
+        title=" ".join(random.sample(WORDS, 3)).title(),
+        author=(
+            f"{random.choice(NAMES)} "
+            f"{random.choice(NAMES)}-{random.randrange(1000)}"
+        ),
+        inventory=1,
+        daily_fee=1,
+    )
+
+
+def seed_books(count: int, batch_size: int = 10_000) -> None:
+    """Insert ``count`` synthetic books for the benchmark commands."""
+    remaining = count
+    while remaining:
+        size = min(batch_size, remaining)
+        Book.objects.bulk_create(fake_book() for _ in range(size))
+        remaining -= size
@@ -0,0 +1,83 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from books.autocomplete import PrefixIndex, complete_from_database
+from books.management.commands._catalogue import NAMES, WORDS, seed_books
+from books.models import Book
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare autocomplete queries per second of the in-process prefix "
+        "index, its database fallback and a plain icontains query on a "
+        "synthetic catalogue. Everything is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=100_000)
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=3,
+            help="How long every approach is run",
+        )
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        limit = options["limit"]
+        prefixes = [
+            word[:length].lower()
+            for word in WORDS + NAMES
+            for length in range(1, 5)
+        ]
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['books']} books...")
+            seed_books(options["books"], options["batch_size"])
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Book._meta.db_table}")
+
+            index = PrefixIndex()
+            started = time.perf_counter()
+            index.build(
+                Book.objects.values_list("id", "title", "author").iterator()
+            )
+            self.stdout.write(
+                f"Built the index in "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+
+            def icontains(prefix):
+                return list(
+                    Book.objects.filter(
+                        Q(title__icontains=prefix) | Q(author__icontains=prefix)
+                    ).values_list("id", "title", "author")[:limit]
+                )
+
+            for name, lookup in (
+                ("prefix index", lambda prefix: index.complete(prefix, limit)),
+                (
+                    "database fallback",
+                    lambda prefix: complete_from_database(prefix, limit),
+                ),
+                ("icontains", icontains),
+            ):
+                rate = self.queries_per_second(
+                    lookup, prefixes, options["seconds"]
+                )
+                self.stdout.write(f"{name:<18} {rate:>10.0f} queries/s")
+            transaction.set_rollback(True)
+
+    def queries_per_second(self, lookup, prefixes, seconds):
+        queries = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            lookup(random.choice(prefixes))
+            queries += 1
+        return queries / (time.perf_counter() - started)
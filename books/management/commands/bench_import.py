@@ -0,0 +1,88 @@
+import csv
+import os
+import resource
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from books.importer import BookImporter, FIELDS, read_rows
+from books.management.commands._catalogue import fake_book
+from books.serializers import BookSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Time import_books on a generated CSV file against saving every "
+        "row through BookSerializer like POST /api/books/ does. Everything "
+        "is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument(
+            "--baseline-rows",
+            type=int,
+            default=5_000,
+            help="Rows saved one by one through the serializer",
+        )
+        parser.add_argument("--chunk-size", type=int, default=5_000)
+        parser.add_argument("--no-copy", action="store_true")
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "books.csv")
+            self.stdout.write(f"Writing {options['rows']} rows to {path}...")
+            self.write_file(path, options["rows"])
+
+            with transaction.atomic():
+                self.time_import(path, directory, options)
+                self.time_serializer(path, options["baseline_rows"])
+                transaction.set_rollback(True)
+
+    def write_file(self, path, rows):
+        with open(path, "w", newline="", encoding="utf-8") as output:
+            writer = csv.writer(output)
+            writer.writerow(FIELDS)
+            for _ in range(rows):
+                book = fake_book()
+                writer.writerow(getattr(book, field) for field in FIELDS)
+
+    def time_import(self, path, directory, options):
+        started = time.perf_counter()
+        with open(path, newline="", encoding="utf-8") as source, open(
+            os.path.join(directory, "rejects.jsonl"), "w"
+        ) as rejects:
+            stats = BookImporter(
+                rejects,
+                chunk_size=options["chunk_size"],
+                use_copy=False if options["no_copy"] else None,
+            ).run(read_rows(source, "csv"))
+        elapsed = time.perf_counter() - started
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            f"import_books  {stats['written'] / elapsed:>10.0f} rows/s, "
+            f"{stats['written']} rows in {elapsed:.1f} s, "
+            f"peak memory {peak:.0f} MiB"
+        )
+
+    def time_serializer(self, path, rows):
+        with open(path, newline="", encoding="utf-8") as source:
+            records = [
+                row
+                for _, (_, row, _) in zip(
+                    range(rows), read_rows(source, "csv")
+                )
+            ]
+
+        started = time.perf_counter()
+        for row in records:
+            serializer = BookSerializer(data=row)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"serializer    {len(records) / elapsed:>10.0f} rows/s, "
+            f"{len(records)} rows in {elapsed:.1f} s"
+        )
@@ -0,0 +1,58 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from books.models import Book
+from books.management.commands._catalogue import seed_books
+from books.search import search_books
+
+
+class Command(BaseCommand):
+    help = (
+        "Time full-text searches of the book list on a synthetic "
+        "catalogue. Everything is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1_000_000)
+        parser.add_argument("--limit", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--query",
+            action="append",
+            help="Query to time, may be repeated",
+        )
+
+    def handle(self, *args, **options):
+        queries = options["query"] or [
+            "kowalski",
+            "silent orchard",
+            "winter night",
+            "lanterns",
+        ]
+
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['books']} books...")
+            seed_books(options["books"], options["batch_size"])
+            self.stdout.write("Analyzing table...")
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Book._meta.db_table}")
+
+            for query in queries:
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    found = list(
+                        search_books(Book.objects.all(), query)[
+                            :options["limit"]
+                        ]
+                    )
+                    timings.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(
+                    f"{query!r:<20} {len(found):>5} books, "
+                    f"median {statistics.median(timings):9.2f} ms"
+                )
+            transaction.set_rollback(True)
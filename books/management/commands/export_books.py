@@ -0,0 +1,10 @@
+from books.views import BookExportView
+from city_library_api.export import ExportCommand
+
+
+class Command(ExportCommand):
+    help = "Export every book as CSV or NDJSON, streamed from the database"
+    export_fields = BookExportView.export_fields
+
+    def get_queryset(self):
+        return BookExportView.queryset.all()
@@ -0,0 +1,93 @@
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.importer import BookImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import books from a CSV or JSONL file, or stdin. Rows with an id "
+        "update that book, the others are inserted. Invalid rows are "
+        "written to a reject file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="File to import, '-' reads stdin",
+        )
+        parser.add_argument(
+            "--format",
+            choices=("csv", "jsonl"),
+            help="Defaults to the file extension, or csv for stdin",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5_000,
+            help="Rows validated and written per transaction",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="JSONL file for rejected rows, defaults to "
+                 "<path>.rejects.jsonl or rejects.jsonl for stdin",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Insert with bulk_create even on PostgreSQL",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"]
+        if file_format is None:
+            suffix = Path(path).suffix.lstrip(".").lower()
+            file_format = "jsonl" if suffix in ("jsonl", "ndjson") else "csv"
+        rejects_path = options["rejects"] or (
+            "rejects.jsonl" if path == "-" else f"{path}.rejects.jsonl"
+        )
+
+        try:
+            source = (
+                sys.stdin if path == "-"
+                else open(path, newline="", encoding="utf-8")
+            )
+        except OSError as error:
+            raise CommandError(f"Cannot open {path}: {error}")
+
+        started = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - started
+            self.stderr.write(
+                f"{stats['read']} rows read, {stats['written']} written, "
+                f"{stats['rejected']} rejected "
+                f"({stats['read'] / elapsed:.0f} rows/s)"
+            )
+
+        with source, open(rejects_path, "w", encoding="utf-8") as rejects:
+            importer = BookImporter(
+                rejects,
+                chunk_size=options["chunk_size"],
+                use_copy=False if options["no_copy"] else None,
+                progress=progress,
+            )
+            stats = importer.run(read_rows(source, file_format))
+
+        message = (
+            f"Imported {stats['written']} of {stats['read']} rows in "
+            f"{time.perf_counter() - started:.1f} s"
+        )
+        if stats["rejected"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{message}, {stats['rejected']} rejected rows are in "
+                    f"{rejects_path}"
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+# The search vector only exists on PostgreSQL. A trigger keeps it up to
+# date and only fires when the title or the author change, so inventory
+# updates never recompute it. The column is not on the model, Django never
+# writes it. SQLite gets an FTS5 table from the post_migrate receiver in
+# books.search instead.
+SEARCH_VECTOR_SQL = """
+ALTER TABLE books_book ADD COLUMN search_vector tsvector;
+
+CREATE FUNCTION books_book_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', NEW.title), 'A')
+        || setweight(to_tsvector('english', NEW.author), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER books_book_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, author ON books_book
+FOR EACH ROW EXECUTE FUNCTION books_book_search_vector_update();
+
+UPDATE books_book SET title = title;
+
+CREATE INDEX book_search_vector_idx ON books_book USING GIN (search_vector);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER books_book_search_vector_trigger ON books_book;
+DROP FUNCTION books_book_search_vector_update();
+ALTER TABLE books_book DROP COLUMN search_vector;
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,41 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Trigram indexes serve the icontains filters of the autocomplete database
+# fallback, which Django compiles to UPPER(column) LIKE UPPER(...). They
+# only exist on PostgreSQL.
+TRIGRAM_INDEXES_SQL = """
+CREATE INDEX book_title_trgm_idx ON books_book
+USING GIN (UPPER(title) gin_trgm_ops);
+
+CREATE INDEX book_author_trgm_idx ON books_book
+USING GIN (UPPER(author) gin_trgm_ops);
+"""
+
+DROP_TRIGRAM_INDEXES_SQL = """
+DROP INDEX book_title_trgm_idx;
+DROP INDEX book_author_trgm_idx;
+"""
+
+
+def add_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(TRIGRAM_INDEXES_SQL)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_TRIGRAM_INDEXES_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0002_book_search_vector"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(add_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0004_book_list_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InventoryShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("number", models.PositiveSmallIntegerField()),
+                ("inventory", models.PositiveIntegerField()),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inventory_shards",
+                        to="books.book",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["book", "number"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="inventoryshard",
+            constraint=models.UniqueConstraint(
+                fields=("book", "number"), name="inventory_shard_book_number_unique"
+            ),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 
 
 class Book(models.Model):
@@ -24,3 +25,48 @@ class Book(models.Model):
 
     class Meta:
         ordering = ["title"]
+        # The book list is paginated on (<ordering field>, id) and filtered
+        # on author, cover, daily fee and availability.
+        indexes = [
+            models.Index(fields=["title", "id"], name="book_title_id_idx"),
+            models.Index(
+                fields=["author", "daily_fee", "id"],
+                name="book_author_fee_idx",
+            ),
+            models.Index(
+                fields=["cover", "daily_fee", "id"],
+                name="book_cover_fee_idx",
+            ),
+            models.Index(fields=["daily_fee", "id"], name="book_fee_id_idx"),
+            models.Index(
+                fields=["title", "id"],
+                condition=Q(inventory__gt=0),
+                name="book_available_title_idx",
+            ),
+        ]
+
+
+class InventoryShard(models.Model):
+    """
+    Part of the copies of a book whose inventory is spread over several
+    counter rows, so concurrent checkouts do not all lock the book row.
+    ``Book.inventory`` then holds the total as of the last refresh, see
+    ``borrowings.inventory``.
+    """
+    book = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="inventory_shards"
+    )
+    number = models.PositiveSmallIntegerField()
+    inventory = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.book_id} shard {self.number}: {self.inventory}"
+
+    class Meta:
+        ordering = ["book", "number"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book", "number"],
+                name="inventory_shard_book_number_unique",
+            ),
+        ]
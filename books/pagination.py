@@ -0,0 +1,140 @@
+from django.core.exceptions import ValidationError
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class BookCursorPagination(CursorPagination):
+    """
+    Keyset pagination for books ordered on (<field>, id), where the field
+    is the ordering requested from the view.
+
+    Like ``BorrowingCursorPagination`` the cursor stores the full key of
+    the last row, so every page is a range scan on the composite indexes
+    of ``Book``. A sliced queryset, like ranked search results, has no
+    such key and is paged by offset within its bounds instead. Rows may
+    be model instances or ``.values()`` dicts.
+    """
+    ordering = ("title", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.has_next = self.has_previous = False
+        self.offset = None
+        if queryset.query.is_sliced:
+            return self.paginate_by_offset(queryset, request)
+
+        ordering = self.get_ordering(request, queryset, view)
+        self.field = queryset.model._meta.get_field(ordering[0].lstrip("-"))
+        descending = ordering[0].startswith("-")
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        key = self.decode_position(self.cursor)
+
+        backwards = descending != reverse
+        prefix = "-" if backwards else ""
+        name = self.field.name
+        queryset = queryset.order_by(f"{prefix}{name}", f"{prefix}id")
+
+        if key is not None:
+            value, pk = key
+            if backwards:
+                queryset = queryset.filter(**{f"{name}__lte": value})
+                queryset = queryset.exclude(**{name: value, "id__gte": pk})
+            else:
+                queryset = queryset.filter(**{f"{name}__gte": value})
+                queryset = queryset.exclude(**{name: value, "id__lte": pk})
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        if reverse:
+            self.has_next = key is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = key is not None
+
+        return self.page
+
+    def paginate_by_offset(self, queryset, request):
+        self.cursor = self.decode_cursor(request)
+        self.offset = self.cursor.offset if self.cursor else 0
+        results = list(
+            queryset[self.offset:self.offset + self.page_size + 1]
+        )
+        self.page = results[:self.page_size]
+        self.has_next = len(results) > self.page_size
+        self.has_previous = self.offset > 0
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, "ordering", None) or self.ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        if self.offset is not None:
+            return self.encode_cursor(
+                Cursor(
+                    offset=self.offset + self.page_size,
+                    reverse=False,
+                    position=None,
+                )
+            )
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=False,
+                position=self.encode_position(self.page[-1]),
+            )
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        if self.offset is not None:
+            return self.encode_cursor(
+                Cursor(
+                    offset=max(self.offset - self.page_size, 0),
+                    reverse=False,
+                    position=None,
+                )
+            )
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=True,
+                position=self.encode_position(self.page[0]),
+            )
+        )
+
+    def encode_position(self, instance) -> str:
+        if isinstance(instance, dict):
+            value, pk = instance[self.field.name], instance["id"]
+        else:
+            value, pk = self.field.value_from_object(instance), instance.pk
+        return f"{value}|{pk}"
+
+    def decode_position(self, cursor):
+        if cursor is None or cursor.position is None:
+            return None
+        try:
+            value, pk = cursor.position.rsplit("|", 1)
+            value = self.field.to_python(value)
+            pk = int(pk)
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
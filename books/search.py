@@ -0,0 +1,116 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+FTS_TABLE = "books_book_fts"
+SEARCH_CONFIG = "english"
+# bm25 weights of the title and author columns in SQLite, matching the
+# A and B weights of the PostgreSQL search vector.
+FTS_WEIGHTS = (10.0, 4.0)
+
+# SQLite keeps an external content FTS5 table in sync with triggers.
+# Django rebuilds SQLite tables on some schema changes, which drops their
+# triggers, so they are (re)created after every migrate.
+SQLITE_SEARCH_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, author, content='books_book', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_book_fts_insert
+    AFTER INSERT ON books_book BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author)
+        VALUES (new.id, new.title, new.author);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_book_fts_delete
+    AFTER DELETE ON books_book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_book_fts_update
+    AFTER UPDATE OF title, author ON books_book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author)
+        VALUES ('delete', old.id, old.title, old.author);
+        INSERT INTO {FTS_TABLE}(rowid, title, author)
+        VALUES (new.id, new.title, new.author);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+
+def install_sqlite_search(using="default", **kwargs):
+    """``post_migrate`` receiver creating the SQLite search index."""
+    if connections[using].vendor != "sqlite":
+        return
+    with connections[using].cursor() as cursor:
+        for statement in SQLITE_SEARCH_SQL:
+            cursor.execute(statement)
+
+
+def _fts_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 query matching all of its words, so user
+    input can never be a syntax error.
+    """
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
+
+
+def search_books(queryset, query: str):
+    """
+    Filter books whose title or author match ``query`` and order them by
+    relevance, best match first. Uses the search vector and its GIN index
+    on PostgreSQL and the FTS5 table on SQLite.
+    """
+    if connection.vendor not in ("postgresql", "sqlite"):
+        return queryset.filter(
+            Q(title__icontains=query) | Q(author__icontains=query)
+        )
+
+    if connection.vendor == "postgresql":
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        return (
+            queryset.alias(
+                matches=RawSQL(
+                    f"books_book.search_vector @@ {tsquery}",
+                    (query,),
+                    output_field=BooleanField(),
+                )
+            )
+            .filter(matches=True)
+            .annotate(
+                rank=RawSQL(
+                    f"ts_rank(books_book.search_vector, {tsquery})",
+                    (query,),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-rank", "title", "id")
+        )
+
+    fts_query = _fts_query(query)
+    if not fts_query:
+        return queryset.none()
+
+    # bm25() only works in the query running the MATCH, so the FTS table
+    # is joined rather than used in a subquery. It is lower for better
+    # matches.
+    weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+    return queryset.extra(
+        select={"rank": f"-bm25({FTS_TABLE}, {weights})"},
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE}.rowid = books_book.id",
+            f"{FTS_TABLE} MATCH %s",
+        ],
+        params=[fts_query],
+    ).order_by("-rank", "title", "id")
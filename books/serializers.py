@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from books.models import Book
+from city_library_api.serialization import RowSerializer
 
 
 class BookSerializer(serializers.ModelSerializer):
@@ -16,3 +17,115 @@ class BookSerializer(serializers.ModelSerializer):
             "daily_fee",
         )
         read_only_fields = ("id",)
+
+
+# Read-only fast path of BookSerializer for lists.
+book_rows = RowSerializer(BookSerializer)
+
+
+class BookListQuerySerializer(serializers.Serializer):
+    """Query parameters filtering and ordering the book list."""
+    ORDERING_FIELDS = ("title", "author", "daily_fee")
+
+    q = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="Full-text search on title and author. Results are "
+                  "ordered by relevance and limited to the best matches.",
+    )
+    author = serializers.CharField(
+        required=False, help_text="Only books of this author"
+    )
+    cover = serializers.ChoiceField(choices=Book.COVER_CHOICES, required=False)
+    daily_fee_min = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False
+    )
+    daily_fee_max = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False
+    )
+    available = serializers.BooleanField(
+        required=False,
+        default=None,
+        allow_null=True,
+        help_text="Only books with copies on the shelf, or without",
+    )
+    ordering = serializers.ChoiceField(
+        choices=[
+            f"{prefix}{field}"
+            for field in ORDERING_FIELDS
+            for prefix in ("", "-")
+        ],
+        default="title",
+        help_text="Field to order by, prefixed with - for descending order",
+    )
+
+    def validate(self, data):
+        if (
+            "daily_fee_min" in data
+            and "daily_fee_max" in data
+            and data["daily_fee_min"] > data["daily_fee_max"]
+        ):
+            raise serializers.ValidationError(
+                "daily_fee_min must not be above daily_fee_max"
+            )
+        return data
+
+
+class BookAutocompleteQuerySerializer(serializers.Serializer):
+    """Query parameters of the autocomplete endpoint."""
+    MAX_LIMIT = 50
+
+    prefix = serializers.CharField(
+        max_length=100, help_text="Beginning of a word of a title or author"
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_LIMIT, default=10
+    )
+
+
+class BookCompletionSerializer(serializers.Serializer):
+    """A title or author completing the prefix."""
+    text = serializers.CharField()
+    field = serializers.ChoiceField(choices=["title", "author"])
+    book = serializers.IntegerField(
+        allow_null=True,
+        help_text="A book with this title, null for authors",
+    )
+
+
+class BookAvailabilityQuerySerializer(serializers.Serializer):
+    """Query parameters of the availability endpoint."""
+    MAX_IDS = 300
+
+    ids = serializers.CharField(
+        help_text=f"Comma-separated ids of at most {MAX_IDS} books"
+    )
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(book_id) for book_id in value.split(",") if book_id]
+        except ValueError:
+            raise serializers.ValidationError(
+                "Expected comma-separated book ids"
+            )
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise serializers.ValidationError("At least one id is required")
+        if len(ids) > self.MAX_IDS:
+            raise serializers.ValidationError(
+                f"At most {self.MAX_IDS} books can be looked up at once"
+            )
+        return ids
+
+
+class BookAvailabilitySerializer(serializers.Serializer):
+    """Availability of a book."""
+    id = serializers.IntegerField()
+    inventory = serializers.IntegerField(help_text="Copies on the shelf")
+    active_loans = serializers.IntegerField(
+        help_text="Copies borrowed and not returned yet"
+    )
+    next_return_date = serializers.DateField(
+        allow_null=True,
+        help_text="Earliest expected return of a borrowed copy",
+    )
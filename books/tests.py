@@ -1,11 +1,29 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
 from rest_framework.test import APITestCase
 from rest_framework import status
 
+from books.autocomplete import book_index, complete_from_database
+from books.availability import availability_rows
+from books.cache import bump_catalogue_version
+from books.management.commands._catalogue import fake_book
 from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.inventory import take_copy
+from city_library_api.testing import QueryBudgetMixin
 
 
 class BookModelTest(TestCase):
@@ -24,6 +42,7 @@ class BookModelTest(TestCase):
 
 class BookViewSetTests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.user = get_user_model().objects.create_user(
             email="user@example.com",
             password="userpassword"
@@ -143,3 +162,758 @@ class BookViewSetTests(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Book.objects.filter(id=self.book.id).exists())
+
+
+class BookQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    LIST_BUDGET = 1
+    DETAIL_BUDGET = 1
+
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Test Author",
+            cover="SOFT",
+            inventory=10,
+            daily_fee=5.99,
+        )
+
+    def grow(self):
+        for number in range(5):
+            Book.objects.create(
+                title=f"Book {number}",
+                author="Test Author",
+                cover="HARD",
+                inventory=1,
+                daily_fee=1.00,
+            )
+        bump_catalogue_version()
+
+    def test_list_query_budget(self):
+        response = self.assertEndpointQueryBudget(
+            self.LIST_BUDGET,
+            "get",
+            reverse("books:book-list"),
+            grow=self.grow,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_query_budget(self):
+        response = self.assertEndpointQueryBudget(
+            self.DETAIL_BUDGET,
+            "get",
+            reverse("books:book-detail", args=[self.book.id]),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BookSearchTests(QueryBudgetMixin, APITestCase):
+    SEARCH_BUDGET = 1
+
+    def setUp(self):
+        cache.clear()
+        self.hobbit, self.biography, self.emma = (
+            Book.objects.create(
+                title=title,
+                author=author,
+                cover="SOFT",
+                inventory=1,
+                daily_fee=1.00,
+            )
+            for title, author in (
+                ("The Hobbit", "J. R. R. Tolkien"),
+                ("Tolkien: A Biography", "Humphrey Carpenter"),
+                ("Emma", "Jane Austen"),
+            )
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse("books:book-list"), {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book["id"] for book in response.data["results"]]
+
+    def test_search_matches_title_and_author(self):
+        self.assertEqual(self.search("austen"), [self.emma.id])
+        self.assertEqual(self.search("hobbits"), [self.hobbit.id])
+
+    def test_title_matches_rank_above_author_matches(self):
+        self.assertEqual(
+            self.search("tolkien"), [self.biography.id, self.hobbit.id]
+        )
+
+    def test_search_follows_title_changes(self):
+        self.emma.title = "Persuasion"
+        self.emma.save()
+
+        self.assertEqual(self.search("emma"), [])
+        self.assertEqual(self.search("persuasion"), [self.emma.id])
+
+    def test_search_ignores_query_syntax(self):
+        self.assertEqual(self.search('"hobbit -('), [self.hobbit.id])
+        self.assertEqual(self.search("*"), [])
+
+    def test_search_results_are_paged(self):
+        response = self.client.get(
+            reverse("books:book-list"), {"q": "tolkien", "page_size": 1}
+        )
+        self.assertEqual(
+            [book["id"] for book in response.data["results"]],
+            [self.biography.id],
+        )
+        self.assertIsNone(response.data["previous"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [book["id"] for book in response.data["results"]],
+            [self.hobbit.id],
+        )
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+
+    def test_search_query_budget(self):
+        response = self.assertEndpointQueryBudget(
+            self.SEARCH_BUDGET,
+            "get",
+            reverse("books:book-list"),
+            data={"q": "tolkien"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BookListFilterTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.books = Book.objects.bulk_create(
+            Book(
+                title=title,
+                author=author,
+                cover=cover,
+                inventory=inventory,
+                daily_fee=daily_fee,
+            )
+            for title, author, cover, inventory, daily_fee in (
+                ("Dune", "Frank Herbert", "HARD", 2, "0.90"),
+                ("Dune Messiah", "Frank Herbert", "HARD", 0, "0.50"),
+                ("Children of Dune", "Frank Herbert", "SOFT", 1, "0.40"),
+                ("God Emperor", "Frank Herbert", "HARD", 1, "1.20"),
+                ("Emma", "Jane Austen", "HARD", 3, "0.70"),
+            )
+        )
+        self.url = reverse("books:book-list")
+
+    def titles(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book["title"] for book in response.data["results"]]
+
+    def test_filters_combine(self):
+        self.assertEqual(
+            self.titles(
+                author="Frank Herbert",
+                cover="HARD",
+                daily_fee_max="1.00",
+                ordering="daily_fee",
+            ),
+            ["Dune Messiah", "Dune"],
+        )
+        self.assertEqual(
+            self.titles(daily_fee_min="0.70", ordering="-daily_fee"),
+            ["God Emperor", "Dune", "Emma"],
+        )
+
+    def test_available_filter(self):
+        self.assertEqual(
+            self.titles(available="true", author="Frank Herbert"),
+            ["Children of Dune", "Dune", "God Emperor"],
+        )
+        self.assertEqual(self.titles(available="false"), ["Dune Messiah"])
+
+    def test_search_applies_filters(self):
+        self.assertEqual(
+            self.titles(q="dune", cover="SOFT"), ["Children of Dune"]
+        )
+
+    def test_pages_follow_the_ordering_both_ways(self):
+        Book.objects.filter(title__startswith="Dune").update(daily_fee="0.70")
+        response = self.client.get(
+            self.url, {"ordering": "-daily_fee", "page_size": 2}
+        )
+        pages = [[book["title"] for book in response.data["results"]]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            pages.append([book["title"] for book in response.data["results"]])
+
+        self.assertEqual(
+            pages,
+            [
+                ["God Emperor", "Emma"],
+                ["Dune Messiah", "Dune"],
+                ["Children of Dune"],
+            ],
+        )
+
+        response = self.client.get(response.data["previous"])
+        self.assertEqual(
+            [book["title"] for book in response.data["results"]],
+            ["Dune Messiah", "Dune"],
+        )
+
+    def test_unknown_filters_are_rejected(self):
+        for params in (
+            {"ordering": "inventory"},
+            {"cover": "LEATHER"},
+            {"daily_fee_min": "2", "daily_fee_max": "1"},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, params
+            )
+
+    def test_page_size_is_capped(self):
+        Book.objects.bulk_create(fake_book() for _ in range(150))
+
+        response = self.client.get(self.url, {"page_size": 1000})
+
+        self.assertEqual(len(response.data["results"]), 100)
+        self.assertIsNotNone(response.data["next"])
+
+
+class BookListIndexPlanTest(TestCase):
+    """The book list filters and orderings run on the composite indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        books = [fake_book() for _ in range(5_000)]
+        for number, book in enumerate(books):
+            book.cover = (Book.HARD, Book.SOFT)[number % 2]
+            book.daily_fee = f"{number % 300 / 100:.2f}"
+            book.inventory = number % 3
+        Book.objects.bulk_create(books)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Book._meta.db_table}")
+
+    def assertUsesIndex(self, queryset, index_name):
+        self.assertIn(index_name, queryset.explain())
+
+    def test_default_ordering(self):
+        self.assertUsesIndex(
+            Book.objects.order_by("title", "id")[:51], "book_title_id_idx"
+        )
+
+    def test_author_and_fee(self):
+        self.assertUsesIndex(
+            Book.objects.filter(
+                author=fake_book().author, daily_fee__lte=1
+            ).order_by("daily_fee", "id")[:51],
+            "book_author_fee_idx",
+        )
+
+    def test_cover_and_fee(self):
+        self.assertUsesIndex(
+            Book.objects.filter(
+                cover=Book.HARD, daily_fee__lte="0.20"
+            ).order_by("daily_fee", "id")[:51],
+            "book_cover_fee_idx",
+        )
+
+    def test_available_books(self):
+        self.assertUsesIndex(
+            Book.objects.filter(inventory__gt=0).order_by("title", "id")[:51],
+            "book_available_title_idx",
+        )
+
+
+class BookAvailabilityIndexPlanTest(TestCase):
+    """Availability counts active loans on the partial borrowing index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.book = Book.objects.create(
+            title="Classic", author="Author", inventory=1, daily_fee=1
+        )
+        user = get_user_model().objects.create_user(
+            email="user@test.com", password="password"
+        )
+        Borrowing.objects.bulk_create(
+            Borrowing(
+                book=cls.book,
+                user=user,
+                borrow_date="2025-01-01",
+                expected_return_date="2025-01-08",
+                actual_return_date=None if number < 3 else "2025-01-02",
+            )
+            for number in range(2_000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Borrowing._meta.db_table}")
+
+    def test_active_loans(self):
+        self.assertIn(
+            "borrowing_book_active_idx",
+            availability_rows([self.book.id]).explain(),
+        )
+
+
+class BookAutocompleteTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        book_index.invalidate()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@test.com",
+            password="adminpassword"
+        )
+        for title, author in (
+            ("The Hobbit", "J. R. R. Tolkien"),
+            ("Leviathan", "Thomas Hobbes"),
+            ("Emma", "Jane Austen"),
+            ("Emma", "Jane Austen"),
+        ):
+            Book.objects.create(
+                title=title,
+                author=author,
+                cover="SOFT",
+                inventory=1,
+                daily_fee=1.00,
+            )
+
+    def complete(self, prefix, **params):
+        response = self.client.get(
+            reverse("books:book-autocomplete"), {"prefix": prefix, **params}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(row["field"], row["text"]) for row in response.data]
+
+    def test_completes_beginning_of_any_word(self):
+        self.assertEqual(
+            self.complete("HOB"),
+            [("author", "Thomas Hobbes"), ("title", "The Hobbit")],
+        )
+        self.assertEqual(
+            self.complete("tolk"), [("author", "J. R. R. Tolkien")]
+        )
+        self.assertEqual(self.complete("obbit"), [])
+
+    def test_duplicates_are_completed_once(self):
+        self.assertEqual(
+            self.complete("em"), [("title", "Emma")]
+        )
+        self.assertEqual(len(self.complete("e", limit=1)), 1)
+
+    def test_index_follows_book_writes(self):
+        self.complete("hob")
+        built_at = book_index.built_at
+        self.client.force_authenticate(user=self.admin_user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("books:book-list"),
+                {
+                    "title": "Hobbit Holes",
+                    "author": "Anonymous",
+                    "cover": "HARD",
+                    "inventory": 1,
+                    "daily_fee": 1.00,
+                },
+            )
+        self.assertIn(("title", "Hobbit Holes"), self.complete("hobbit"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse("books:book-detail", args=[response.data["id"]])
+            )
+        self.assertNotIn(("title", "Hobbit Holes"), self.complete("hobbit"))
+        self.assertEqual(book_index.built_at, built_at)
+
+    def test_index_lookups_do_not_query_the_database(self):
+        self.complete("hob")
+
+        with self.assertMaxQueries(0):
+            self.complete("hob")
+
+    def test_stale_index_is_served_during_rebuild(self):
+        self.complete("hob")
+        built_at = book_index.built_at
+        book_index.invalidate()
+
+        with book_index._build_lock, self.assertMaxQueries(0):
+            self.assertIn(("title", "The Hobbit"), self.complete("hob"))
+        self.assertEqual(book_index.built_at, built_at)
+
+        self.complete("hob")
+        self.assertNotEqual(book_index.built_at, built_at)
+
+    def test_database_fallback_matches_index(self):
+        prefixes = ("hob", "j r r", "emma", "austen", "x")
+        from_index = [self.complete(prefix) for prefix in prefixes]
+
+        with override_settings(BOOK_AUTOCOMPLETE_INDEX=False):
+            self.assertEqual(
+                [self.complete(prefix) for prefix in prefixes], from_index
+            )
+
+    def test_prefix_without_words_completes_nothing(self):
+        self.complete("hob")
+        for prefix in ("!!!", "  "):
+            self.assertEqual(book_index.complete(prefix), [])
+            self.assertEqual(complete_from_database(prefix), [])
+        self.assertEqual(self.complete("!!!"), [])
+
+    def test_prefix_is_required(self):
+        response = self.client.get(reverse("books:book-autocomplete"))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BookCacheTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@test.com",
+            password="adminpassword"
+        )
+        self.book = Book.objects.create(
+            title="Test Book",
+            author="Test Author",
+            cover="SOFT",
+            inventory=10,
+            daily_fee=5.99,
+        )
+
+    def test_repeated_requests_are_served_from_cache(self):
+        for url in (
+            reverse("books:book-list"),
+            reverse("books:book-detail", args=[self.book.id]),
+        ):
+            first = self.client.get(url)
+            with self.assertMaxQueries(0):
+                second = self.client.get(url)
+
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_conditional_requests_get_not_modified(self):
+        url = reverse("books:book-list")
+        response = self.client.get(url)
+
+        with self.assertMaxQueries(0):
+            by_etag = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+            by_date = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+            )
+
+        self.assertEqual(by_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(by_etag["ETag"], response["ETag"])
+        self.assertEqual(by_date.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_book_writes_invalidate_responses(self):
+        url = reverse("books:book-detail", args=[self.book.id])
+        etag = self.client.get(url)["ETag"]
+        self.client.force_authenticate(user=self.admin_user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(url, {"title": "New Title"})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "New Title")
+
+    def test_inventory_changes_invalidate_responses(self):
+        url = reverse("books:book-list")
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            take_copy(self.book.id)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["inventory"], 9)
+
+    def test_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location, override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased."
+                               "FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+        ):
+            url = reverse("books:book-list")
+            etag = self.client.get(url)["ETag"]
+            with self.assertMaxQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(
+                response.status_code, status.HTTP_304_NOT_MODIFIED
+            )
+
+            bump_catalogue_version()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BookAvailabilityTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="password"
+        )
+        self.borrowed, self.available = Book.objects.bulk_create(
+            Book(
+                title=title,
+                author="Test Author",
+                cover="SOFT",
+                inventory=inventory,
+                daily_fee=1,
+            )
+            for title, inventory in (("Borrowed", 0), ("Available", 4))
+        )
+        for expected_return_date, actual_return_date in (
+            ("2025-01-10", None),
+            ("2025-01-08", None),
+            ("2025-01-01", "2025-01-02"),
+        ):
+            Borrowing.objects.create(
+                book=self.borrowed,
+                user=self.user,
+                borrow_date="2025-01-01",
+                expected_return_date=expected_return_date,
+                actual_return_date=actual_return_date,
+            )
+        self.url = reverse("books:book-availability")
+
+    def availability(self, *book_ids):
+        return self.client.get(
+            self.url, {"ids": ",".join(map(str, book_ids))}
+        )
+
+    def test_availability_counts_outstanding_loans(self):
+        response = self.availability(self.available.id, 0, self.borrowed.id)
+
+        self.assertEqual(
+            response.json(),
+            [
+                {
+                    "id": self.available.id,
+                    "inventory": 4,
+                    "active_loans": 0,
+                    "next_return_date": None,
+                },
+                {
+                    "id": self.borrowed.id,
+                    "inventory": 0,
+                    "active_loans": 2,
+                    "next_return_date": "2025-01-08",
+                },
+            ],
+        )
+
+    def test_availability_is_one_query_then_cached(self):
+        url = f"{self.url}?ids={self.borrowed.id},{self.available.id}"
+
+        self.assertEndpointQueryBudget(1, "get", url)
+        self.assertEndpointQueryBudget(0, "get", url)
+
+    def test_inventory_changes_invalidate_availability(self):
+        self.availability(self.available.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            take_copy(self.available.id)
+        response = self.availability(self.available.id)
+
+        self.assertEqual(response.data[0]["inventory"], 3)
+
+    def test_circulation_of_other_books_keeps_availability_cached(self):
+        self.availability(self.borrowed.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            take_copy(self.available.id)
+        with self.assertMaxQueries(0):
+            self.availability(self.borrowed.id)
+
+        bump_catalogue_version()
+        with self.assertNumQueries(1):
+            self.availability(self.borrowed.id)
+
+    def test_invalid_ids_are_rejected(self):
+        for ids in ("", "1,two", ",".join(map(str, range(1, 302)))):
+            response = self.client.get(self.url, {"ids": ids})
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST, ids
+            )
+
+
+class ImportBooksCommandTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def import_books(self, name, content, *args):
+        with open(self.path(name), "w") as source:
+            source.write(content)
+        output = StringIO()
+        call_command(
+            "import_books",
+            self.path(name),
+            "--chunk-size", "2",
+            *args,
+            stdout=output,
+            stderr=StringIO(),
+        )
+        return output.getvalue()
+
+    def rejects(self, name):
+        with open(self.path(f"{name}.rejects.jsonl")) as rejects:
+            return [json.loads(line) for line in rejects]
+
+    def test_csv_rows_are_imported_and_bad_rows_rejected(self):
+        output = self.import_books(
+            "books.csv",
+            "title,author,cover,inventory,daily_fee\n"
+            "Dune,Frank Herbert,HARD,3,1.50\n"
+            "Emma,,SOFT,many,1.00\n"
+            "Beloved,Toni Morrison,SOFT,2,0.99\n",
+        )
+
+        self.assertIn("Imported 2 of 3 rows", output)
+        self.assertEqual(
+            list(Book.objects.values_list("title", "inventory")),
+            [("Beloved", 2), ("Dune", 3)],
+        )
+        rejected = self.rejects("books.csv")
+        self.assertEqual(rejected[0]["line"], 3)
+        self.assertEqual(set(rejected[0]["errors"]), {"author", "inventory"})
+
+    def test_jsonl_rows_with_id_update_books(self):
+        book = Book.objects.create(
+            title="Dune",
+            author="Frank Herbert",
+            cover="HARD",
+            inventory=1,
+            daily_fee=1.50,
+        )
+
+        self.import_books(
+            "books.jsonl",
+            json.dumps(
+                {
+                    "id": book.id,
+                    "title": "Dune",
+                    "author": "Frank Herbert",
+                    "cover": "HARD",
+                    "inventory": 5,
+                    "daily_fee": "2.00",
+                }
+            )
+            + "\nnot json\n",
+        )
+
+        book.refresh_from_db()
+        self.assertEqual(book.inventory, 5)
+        self.assertEqual(Book.objects.count(), 1)
+        self.assertEqual(self.rejects("books.jsonl")[0]["line"], 2)
+
+    def test_import_from_stdin(self):
+        stdin = StringIO(
+            "title,author,cover,inventory,daily_fee\n"
+            "Dune,Frank Herbert,HARD,3,1.50\n"
+        )
+
+        with patch("sys.stdin", stdin):
+            call_command(
+                "import_books",
+                "-",
+                "--rejects", self.path("rejects.jsonl"),
+                stdout=StringIO(),
+                stderr=StringIO(),
+            )
+
+        self.assertTrue(Book.objects.filter(title="Dune").exists())
+
+
+class BookExportTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@test.com",
+            password="adminpassword"
+        )
+        self.client.force_authenticate(self.admin_user)
+        Book.objects.bulk_create(
+            Book(
+                title=f"Book {number}",
+                author="Author, Jr.",
+                cover="SOFT",
+                inventory=number,
+                daily_fee="1.50",
+            )
+            for number in range(5)
+        )
+        self.url = reverse("books:book-export")
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response
+
+    def test_csv_export(self):
+        response = self.export()
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="books.csv"', response["Content-Disposition"])
+        rows = list(
+            csv.DictReader(
+                b"".join(response.streaming_content).decode().splitlines()
+            )
+        )
+        self.assertEqual(
+            [row["title"] for row in rows],
+            [f"Book {number}" for number in range(5)],
+        )
+        self.assertEqual(rows[0]["author"], "Author, Jr.")
+        self.assertEqual(rows[0]["daily_fee"], "1.50")
+
+    def test_gzipped_ndjson_export(self):
+        response = self.export(file_format="ndjson", gzip="true")
+
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn(
+            'filename="books.ndjson.gz"', response["Content-Disposition"]
+        )
+        content = gzip.decompress(b"".join(response.streaming_content))
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[4]["inventory"], 4)
+
+    def test_export_streams_with_a_single_query(self):
+        response = self.export()
+
+        with self.assertMaxQueries(1):
+            b"".join(response.streaming_content)
+
+    def test_export_requires_staff(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="user@test.com", password="password"
+            )
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "books.csv.gz")
+            call_command(
+                "export_books", "--output", path, "--gzip",
+                "--chunk-size", "2",
+            )
+            with gzip.open(path, "rt", newline="") as export:
+                rows = list(csv.DictReader(export))
+
+        self.assertEqual(len(rows), 5)
@@ -1,11 +1,27 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookViewSet
+from .views import (
+    BookAutocompleteView,
+    BookAvailabilityView,
+    BookExportView,
+    BookViewSet,
+)
 
 router = DefaultRouter()
 router.register("", BookViewSet)
 
 urlpatterns = [
+    path(
+        "autocomplete/",
+        BookAutocompleteView.as_view(),
+        name="book-autocomplete",
+    ),
+    path(
+        "availability/",
+        BookAvailabilityView.as_view(),
+        name="book-availability",
+    ),
+    path("export/", BookExportView.as_view(), name="book-export"),
     path("", include(router.urls)),
 ]
 
@@ -1,13 +1,76 @@
-from rest_framework import viewsets
+from django.db import transaction
+
+from rest_framework import generics, viewsets
 from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from drf_spectacular.utils import (
+    extend_schema,
+    extend_schema_view,
+    OpenApiExample,
+    OpenApiResponse,
+)
 
+from books.autocomplete import book_index, complete
+from books.availability import book_availability
+from books.cache import CatalogueCacheMixin, bump_catalogue_version
 from books.models import Book
-from books.serializers import BookSerializer
+from books.pagination import BookCursorPagination
+from books.search import search_books
+from books.serializers import (
+    BookAutocompleteQuerySerializer,
+    BookAvailabilityQuerySerializer,
+    BookAvailabilitySerializer,
+    BookCompletionSerializer,
+    BookListQuerySerializer,
+    BookSerializer,
+    book_rows,
+)
+from borrowings.inventory import spread_inventory
+from city_library_api.export import ExportView
+from city_library_api.serialization import RowListMixin
+from city_library_api.throttling import ScopedTokenBucketThrottle
 
 
-class BookViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=[BookListQuerySerializer])
+)
+class BookViewSet(CatalogueCacheMixin, RowListMixin, viewsets.ModelViewSet):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    row_serializer = book_rows
+    pagination_class = BookCursorPagination
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = "books"
+    search_limit = 100
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != "list":
+            return queryset
+
+        query = BookListQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        if "author" in params:
+            queryset = queryset.filter(author=params["author"])
+        if "cover" in params:
+            queryset = queryset.filter(cover=params["cover"])
+        if "daily_fee_min" in params:
+            queryset = queryset.filter(daily_fee__gte=params["daily_fee_min"])
+        if "daily_fee_max" in params:
+            queryset = queryset.filter(daily_fee__lte=params["daily_fee_max"])
+        if params["available"] is not None:
+            queryset = (
+                queryset.filter(inventory__gt=0) if params["available"]
+                else queryset.filter(inventory=0)
+            )
+
+        if params.get("q"):
+            return search_books(queryset, params["q"])[:self.search_limit]
+
+        self.ordering = (params["ordering"],)
+        return queryset
 
     def get_permissions(self):
         if self.action in ["list", "retrieve"]:
@@ -15,3 +78,121 @@ class BookViewSet(viewsets.ModelViewSet):
         else:
             self.permission_classes = [IsAdminUser]
         return super().get_permissions()
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        transaction.on_commit(lambda: book_index.add_book(serializer.instance))
+        transaction.on_commit(bump_catalogue_version)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+            if "inventory" in serializer.validated_data:
+                spread_inventory([serializer.instance.pk])
+        transaction.on_commit(lambda: book_index.add_book(serializer.instance))
+        transaction.on_commit(bump_catalogue_version)
+
+    def perform_destroy(self, instance):
+        book_id = instance.id
+        super().perform_destroy(instance)
+        transaction.on_commit(lambda: book_index.remove_book(book_id))
+        transaction.on_commit(bump_catalogue_version)
+
+
+class BookAutocompleteView(generics.GenericAPIView):
+    """
+    This endpoint completes a prefix to book titles and authors, matching
+    the beginning of any of their words. It is meant to be called on every
+    keystroke.
+    """
+    serializer_class = BookAutocompleteQuerySerializer
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=[BookAutocompleteQuerySerializer],
+        responses={
+            200: OpenApiResponse(
+                description="Completions ordered by the matching words",
+                response=BookCompletionSerializer(many=True),
+                examples=[
+                    OpenApiExample(
+                        name="Success response",
+                        value=[
+                            {"text": "Hobbes", "field": "author", "book": None},
+                            {"text": "The Hobbit", "field": "title", "book": 1},
+                        ]
+                    )
+                ]
+            ),
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        completions = complete(
+            query.validated_data["prefix"], query.validated_data["limit"]
+        )
+        return Response(BookCompletionSerializer(completions, many=True).data)
+
+
+class BookAvailabilityView(generics.GenericAPIView):
+    """
+    This endpoint returns the availability of a page of books at once: the
+    copies on the shelf, the active loans and the earliest expected return
+    of a borrowed copy. Unknown ids are left out.
+    """
+    serializer_class = BookAvailabilityQuerySerializer
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=[BookAvailabilityQuerySerializer],
+        responses={
+            200: OpenApiResponse(
+                description="Availability of the requested books",
+                response=BookAvailabilitySerializer(many=True),
+                examples=[
+                    OpenApiExample(
+                        name="Success response",
+                        value=[
+                            {
+                                "id": 1,
+                                "inventory": 0,
+                                "active_loans": 3,
+                                "next_return_date": "2025-01-08"
+                            },
+                            {
+                                "id": 2,
+                                "inventory": 4,
+                                "active_loans": 0,
+                                "next_return_date": None
+                            }
+                        ]
+                    )
+                ]
+            ),
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        availability = book_availability(query.validated_data["ids"])
+        return Response(
+            BookAvailabilitySerializer(availability, many=True).data
+        )
+
+
+class BookExportView(ExportView):
+    """
+    This endpoint streams every book as a CSV or NDJSON file, for audits.
+    Available only for staff.
+    """
+    queryset = Book.objects.order_by("id")
+    filename = "books"
+    export_fields = {
+        "id": "id",
+        "title": "title",
+        "author": "author",
+        "cover": "cover",
+        "inventory": "inventory",
+        "daily_fee": "daily_fee",
+    }
@@ -1,3 +1,46 @@
 from django.contrib import admin
 
-# Register your models here.
+from borrowings.models import FeeBalance, Hold, Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    """Outbox of Telegram notifications, dead letters included."""
+
+    list_display = ("id", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
+
+
+@admin.register(FeeBalance)
+class FeeBalanceAdmin(admin.ModelAdmin):
+    """Materialized fee balances, kept up to date at checkout and return."""
+
+    list_display = (
+        "user",
+        "rental_fees",
+        "overdue_fees",
+        "accrued_overdue_fees",
+        "total",
+        "accrued_on",
+    )
+    list_select_related = ("user",)
+    search_fields = ("user__email",)
+    readonly_fields = (
+        "user",
+        "rental_fees",
+        "overdue_fees",
+        "accrued_overdue_fees",
+        "accrued_on",
+    )
+
+
+@admin.register(Hold)
+class HoldAdmin(admin.ModelAdmin):
+    """Holds queued for books, expired by the ``expire_holds`` command."""
+
+    list_display = ("id", "book", "user", "status", "created_at", "expires_at")
+    list_filter = ("status",)
+    list_select_related = ("book", "user")
+    search_fields = ("user__email", "book__title")
+    readonly_fields = ("created_at", "ready_at")
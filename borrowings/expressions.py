@@ -0,0 +1,33 @@
+from django.db.models import Func, IntegerField
+
+
+class DaysBetween(Func):
+    """
+    Number of days from ``start`` to ``end`` computed by the database, so
+    date arithmetic on large querysets never has to leave SQL.
+    """
+    arity = 2
+    output_field = IntegerField()
+
+    def __init__(self, end, start, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # Subtracting two dates yields an integer number of days in
+        # PostgreSQL.
+        return super().as_sql(
+            compiler,
+            connection,
+            template="(%(expressions)s)",
+            arg_joiner=" - ",
+            **extra_context,
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="CAST(julianday(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
@@ -0,0 +1,230 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import (
+    Case,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from borrowings.expressions import DaysBetween
+from borrowings.models import Borrowing, FeeBalance
+
+
+AMOUNT = DecimalField(max_digits=12, decimal_places=2)
+BALANCE_FIELDS = ("rental_fees", "overdue_fees", "accrued_overdue_fees")
+ZERO = Decimal("0.00")
+
+
+def rental_fee(borrow_date, expected_return_date, daily_fee) -> Decimal:
+    """Fee for the planned loan period."""
+    return (expected_return_date - borrow_date).days * Decimal(daily_fee)
+
+
+def overdue_fee(expected_return_date, until, daily_fee) -> Decimal:
+    """Fee for the days between the expected return date and ``until``."""
+    if until is None or until <= expected_return_date:
+        return ZERO
+    return (until - expected_return_date).days * Decimal(daily_fee)
+
+
+def add_to_balances(deltas: dict) -> None:
+    """
+    Add amounts to users' balances, ``deltas`` maps a user id to a dict of
+    balance field to amount. Missing balances are created, then every
+    field is changed by a single UPDATE for all users.
+    """
+    if not deltas:
+        return
+
+    FeeBalance.objects.bulk_create(
+        [FeeBalance(user_id=user_id) for user_id in deltas],
+        ignore_conflicts=True,
+    )
+    fields = {field for amounts in deltas.values() for field in amounts}
+    FeeBalance.objects.filter(user_id__in=deltas).update(
+        **{
+            field: F(field) + Case(
+                *[
+                    When(user_id=user_id, then=Value(amounts[field]))
+                    for user_id, amounts in deltas.items()
+                    if field in amounts
+                ],
+                default=Value(ZERO),
+                output_field=AMOUNT,
+            )
+            for field in fields
+        }
+    )
+
+
+def charge_checkouts(borrowings) -> None:
+    """Charge the rental fees of new borrowings to their users."""
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for borrowing in borrowings:
+        deltas[borrowing.user_id]["rental_fees"] += rental_fee(
+            borrowing.borrow_date,
+            borrowing.expected_return_date,
+            borrowing.book.daily_fee,
+        )
+    add_to_balances(deltas)
+
+
+def settle_returns(returns, return_date) -> None:
+    """
+    Move late returns from accrued to final overdue fees. ``returns`` holds
+    ``(user_id, expected_return_date, daily_fee)`` of the returned
+    borrowings.
+    """
+    late = [
+        (user_id, expected_return_date, daily_fee)
+        for user_id, expected_return_date, daily_fee in returns
+        if expected_return_date < return_date
+    ]
+    if not late:
+        return
+
+    accrued_on = dict(
+        FeeBalance.objects.filter(
+            user_id__in={user_id for user_id, _, _ in late}
+        ).values_list("user_id", "accrued_on")
+    )
+    deltas = defaultdict(lambda: defaultdict(Decimal))
+    for user_id, expected_return_date, daily_fee in late:
+        deltas[user_id]["overdue_fees"] += overdue_fee(
+            expected_return_date, return_date, daily_fee
+        )
+        deltas[user_id]["accrued_overdue_fees"] -= overdue_fee(
+            expected_return_date, accrued_on.get(user_id), daily_fee
+        )
+    add_to_balances(deltas)
+
+
+def accrue_overdue_fees(on_date) -> int:
+    """
+    Roll the accrued fees of overdue borrowings forward to ``on_date`` for
+    every balance with one UPDATE. Returns the number of balances updated.
+    """
+    FeeBalance.objects.bulk_create(
+        [
+            FeeBalance(user_id=user_id)
+            for user_id in Borrowing.objects.overdue(on_date)
+            .order_by()
+            .values_list("user_id", flat=True)
+            .distinct()
+        ],
+        ignore_conflicts=True,
+    )
+    accrued = (
+        Borrowing.objects.overdue(on_date)
+        .filter(user=OuterRef("user"))
+        .values("user")
+        .annotate(total=Sum("overdue_fee"))
+        .values("total")
+    )
+    return FeeBalance.objects.update(
+        accrued_overdue_fees=Coalesce(
+            Subquery(accrued), Value(ZERO), output_field=AMOUNT
+        ),
+        accrued_on=on_date,
+    )
+
+
+def _totals_by_user(queryset, amount) -> dict:
+    return dict(
+        queryset.values("user_id")
+        .annotate(total=Sum(ExpressionWrapper(amount, output_field=AMOUNT)))
+        .values_list("user_id", "total")
+    )
+
+
+def expected_balances() -> dict:
+    """
+    Recompute every balance from the borrowings with a few grouped
+    queries. Returns a dict of user id to a dict of balance fields.
+    """
+    daily_fee = F("book__daily_fee")
+    totals = {
+        "rental_fees": _totals_by_user(
+            Borrowing.objects.all(),
+            DaysBetween(F("expected_return_date"), F("borrow_date"))
+            * daily_fee,
+        ),
+        "overdue_fees": _totals_by_user(
+            Borrowing.objects.filter(
+                actual_return_date__gt=F("expected_return_date")
+            ),
+            DaysBetween(F("actual_return_date"), F("expected_return_date"))
+            * daily_fee,
+        ),
+        "accrued_overdue_fees": {},
+    }
+    accrual_dates = (
+        FeeBalance.objects.filter(accrued_on__isnull=False)
+        .values_list("accrued_on", flat=True)
+        .distinct()
+    )
+    for accrued_on in accrual_dates:
+        totals["accrued_overdue_fees"].update(
+            Borrowing.objects.overdue(accrued_on)
+            .filter(
+                user__in=FeeBalance.objects.filter(
+                    accrued_on=accrued_on
+                ).values("user")
+            )
+            .values("user_id")
+            .annotate(total=Sum("overdue_fee"))
+            .values_list("user_id", "total")
+        )
+
+    balances = defaultdict(lambda: dict.fromkeys(BALANCE_FIELDS, ZERO))
+    for field, by_user in totals.items():
+        for user_id, total in by_user.items():
+            balances[user_id][field] = Decimal(total or 0).quantize(ZERO)
+    return balances
+
+
+def reconcile_balances(fix: bool = False) -> list:
+    """
+    Compare the stored balances with ones recomputed from the borrowings.
+    Returns ``(user_id, field, stored, expected)`` for every difference and
+    overwrites the stored values when ``fix`` is set.
+    """
+    expected = expected_balances()
+    stored = FeeBalance.objects.in_bulk()
+    drift = []
+    changed = []
+
+    for user_id in sorted(expected.keys() | stored.keys()):
+        balance = stored.get(user_id) or FeeBalance(user_id=user_id)
+        recomputed = expected.get(user_id) or dict.fromkeys(
+            BALANCE_FIELDS, ZERO
+        )
+        differs = False
+        for field in BALANCE_FIELDS:
+            value = Decimal(getattr(balance, field)).quantize(ZERO)
+            if value != recomputed[field]:
+                drift.append((user_id, field, value, recomputed[field]))
+                setattr(balance, field, recomputed[field])
+                differs = True
+        if differs or user_id not in stored:
+            changed.append(balance)
+
+    if fix and changed:
+        FeeBalance.objects.bulk_create(
+            [balance for balance in changed if balance.user_id not in stored]
+        )
+        FeeBalance.objects.bulk_update(
+            [balance for balance in changed if balance.user_id in stored],
+            BALANCE_FIELDS,
+            batch_size=1_000,
+        )
+
+    return drift
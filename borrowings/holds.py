@@ -0,0 +1,136 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from books.cache import bump_catalogue_version
+from borrowings.inventory import release_copies
+from borrowings.models import Hold
+from borrowings.notifications import enqueue_notification
+
+
+def return_copies(counts: dict) -> None:
+    """
+    Hand returned copies to the holds waiting for them, in FIFO order, and
+    put the rest back into the inventory. ``counts`` maps a book id to the
+    number of returned copies. Call it inside the return transaction, so
+    a copy is never seen in the inventory by another patron while a hold
+    is waiting for it.
+    """
+    remaining = Counter(counts)
+    queued = (
+        Hold.objects.filter(book_id__in=counts, status=Hold.WAITING)
+        .order_by()
+        .values_list("book_id", flat=True)
+        .distinct()
+    )
+    for book_id in list(queued):
+        remaining[book_id] -= allocate_holds(book_id, counts[book_id])
+    release_copies(+remaining)
+
+
+def allocate_holds(book_id: int, count: int) -> int:
+    """
+    Make the first ``count`` waiting holds of a book ready for pickup and
+    return how many there were. Holds locked by a concurrent cancellation
+    are waited for rather than skipped, so the queue order is kept.
+    """
+    now = timezone.now()
+    holds = list(
+        Hold.objects.select_for_update(of=("self",))
+        .filter(book_id=book_id, status=Hold.WAITING)
+        .order_by("id")
+        .values_list("id", "user__email", "book__title")[:count]
+    )
+    if not holds:
+        return 0
+
+    Hold.objects.filter(id__in=[hold_id for hold_id, _, _ in holds]).update(
+        status=Hold.READY,
+        ready_at=now,
+        expires_at=now + timezone.timedelta(days=settings.HOLD_PICKUP_DAYS),
+    )
+    transaction.on_commit(lambda: bump_catalogue_version([book_id]))
+    users = "".join(f"<pre>User: {email}</pre>" for _, email, _ in holds)
+    enqueue_notification(
+        f"""
+            <b>Holds Ready For Pickup:</b>
+            <pre>Book: {holds[0][2]}</pre>
+            {users}
+        """
+    )
+    return len(holds)
+
+
+def fulfill_hold(user, book_id: int) -> bool:
+    """
+    Check out the copy kept for a ready hold of the user, instead of
+    taking one from the inventory. Returns False without a ready hold.
+    """
+    fulfilled = Hold.objects.filter(
+        user=user, book_id=book_id, status=Hold.READY
+    ).update(status=Hold.FULFILLED)
+    if fulfilled:
+        transaction.on_commit(lambda: bump_catalogue_version([book_id]))
+    return bool(fulfilled)
+
+
+def fulfill_holds(user, book_ids) -> set:
+    """
+    ``fulfill_hold`` for several books at once, in two queries. Returns
+    the ids of the books whose ready hold was fulfilled.
+    """
+    holds = dict(
+        Hold.objects.select_for_update()
+        .filter(user=user, book_id__in=book_ids, status=Hold.READY)
+        .order_by()
+        .values_list("id", "book_id")
+    )
+    book_ids = set(holds.values())
+    if holds:
+        Hold.objects.filter(id__in=holds).update(status=Hold.FULFILLED)
+        transaction.on_commit(lambda: bump_catalogue_version(book_ids))
+    return book_ids
+
+
+def cancel_hold(hold: Hold) -> None:
+    """Cancel an active hold, passing its copy on if it had one."""
+    with transaction.atomic():
+        status = (
+            Hold.objects.select_for_update()
+            .filter(pk=hold.pk, status__in=Hold.ACTIVE)
+            .values_list("status", flat=True)
+            .first()
+        )
+        if status is None:
+            return
+        Hold.objects.filter(pk=hold.pk).update(status=Hold.CANCELLED)
+        if status == Hold.READY:
+            return_copies({hold.book_id: 1})
+
+
+def expire_holds(now=None) -> dict:
+    """
+    Expire every active hold past its ``expires_at`` in bulk. The copies
+    kept for expired ready holds go to the next waiting holds or back to
+    the inventory. Returns the number of expired holds per status.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = list(
+            Hold.objects.select_for_update()
+            .filter(status__in=Hold.ACTIVE, expires_at__lte=now)
+            .values_list("id", "status", "book_id")
+        )
+        Hold.objects.filter(
+            id__in=[hold_id for hold_id, _, _ in expired]
+        ).update(status=Hold.EXPIRED)
+        return_copies(
+            Counter(
+                book_id
+                for _, status, book_id in expired
+                if status == Hold.READY
+            )
+        )
+    return dict(Counter(status for _, status, _ in expired))
@@ -0,0 +1,262 @@
+import random
+
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from books.cache import bump_catalogue_version
+from books.models import Book, InventoryShard
+
+
+# Books whose inventory lives in the book row itself.
+UNSHARDED = ~Exists(InventoryShard.objects.filter(book=OuterRef("pk")))
+
+# Copies left of a book. The book row of a sharded book only holds the
+# total of the last ``refresh_inventory``, so its shards are summed.
+SHARD_TOTAL = (
+    InventoryShard.objects.filter(book=OuterRef("pk"))
+    .order_by()
+    .values("book")
+    .annotate(total=Sum("inventory"))
+    .values("total")
+)
+ON_SHELF = Coalesce(Subquery(SHARD_TOTAL), F("inventory"))
+
+
+def take_copy(book_id: int) -> bool:
+    """
+    Take one copy of the book out of the inventory.
+
+    The decrement is a single conditional UPDATE, so concurrent checkouts
+    can never push the inventory below zero. A sharded book gives the copy
+    from a random shard instead, see ``shard_inventory``. Returns False
+    when no copy was left.
+    """
+    taken = Book.objects.filter(
+        UNSHARDED, pk=book_id, inventory__gt=0
+    ).update(inventory=F("inventory") - 1)
+    if not taken:
+        taken = _take_sharded_copies(book_id, 1)
+    if taken:
+        transaction.on_commit(lambda: bump_catalogue_version([book_id]))
+    return bool(taken)
+
+
+def release_copy(book_id: int) -> None:
+    """Put one copy of the book back into the inventory."""
+    released = Book.objects.filter(UNSHARDED, pk=book_id).update(
+        inventory=F("inventory") + 1
+    )
+    if not released:
+        _release_sharded_copies(book_id, 1)
+    transaction.on_commit(lambda: bump_catalogue_version([book_id]))
+
+
+def take_copies(counts: dict) -> list:
+    """
+    Take copies of several books at once, ``counts`` maps a book id to the
+    number of copies wanted.
+
+    All books are decremented by one conditional UPDATE. When any of them
+    does not have enough copies nothing is changed and the ids of the books
+    that fell short are returned.
+    """
+    enough_copies = Q()
+    for book_id, count in counts.items():
+        enough_copies |= Q(pk=book_id, inventory__gte=count)
+
+    with transaction.atomic():
+        updated = Book.objects.filter(UNSHARDED, enough_copies).update(
+            inventory=F("inventory") - Case(
+                *[
+                    When(pk=book_id, then=Value(count))
+                    for book_id, count in counts.items()
+                ],
+                output_field=IntegerField(),
+            )
+        )
+        if updated < len(counts):
+            sharded = _sharded_books(counts)
+            if updated + len(sharded) == len(counts) and all(
+                _take_sharded_copies(book_id, counts[book_id])
+                for book_id in sharded
+            ):
+                updated = len(counts)
+        if updated == len(counts):
+            transaction.on_commit(lambda: bump_catalogue_version(counts))
+            return []
+        transaction.set_rollback(True)
+
+    inventory = copies_on_shelf(counts)
+    return [
+        book_id
+        for book_id, count in counts.items()
+        if inventory.get(book_id, 0) < count
+    ] or list(counts)
+
+
+def release_copies(counts: dict) -> None:
+    """
+    Put copies of several books back at once, ``counts`` maps a book id to
+    the number of returned copies. Runs as a single UPDATE.
+    """
+    if not counts:
+        return
+    updated = Book.objects.filter(UNSHARDED, pk__in=counts).update(
+        inventory=F("inventory") + Case(
+            *[
+                When(pk=book_id, then=Value(count))
+                for book_id, count in counts.items()
+            ],
+            output_field=IntegerField(),
+        )
+    )
+    if updated < len(counts):
+        for book_id in _sharded_books(counts):
+            _release_sharded_copies(book_id, counts[book_id])
+    transaction.on_commit(lambda: bump_catalogue_version(counts))
+
+
+def shard_inventory(book_id: int, shards: int) -> None:
+    """
+    Spread the inventory of a book over ``shards`` counter rows, or move
+    it back into the book row when ``shards`` is 0.
+
+    A sharded book takes checkouts on a random shard with copies left, so
+    concurrent checkouts of a popular title rarely wait on the same row
+    lock, and checkouts never write its book row. ``Book.inventory`` keeps
+    the total as of the last ``refresh_inventory``, for ``BookSerializer``
+    and the book list filters; ``copies_on_shelf`` and ``ON_SHELF`` read
+    the current one. Edits of ``Book.inventory`` are spread over the
+    shards by ``spread_inventory``.
+    """
+    with transaction.atomic():
+        book = Book.objects.select_for_update().get(pk=book_id)
+        shard_rows = list(
+            InventoryShard.objects.select_for_update().filter(book=book)
+        )
+        if shard_rows:
+            inventory = sum(shard.inventory for shard in shard_rows)
+            InventoryShard.objects.filter(book=book).delete()
+        else:
+            inventory = book.inventory
+
+        if shards:
+            share, extra = divmod(inventory, shards)
+            InventoryShard.objects.bulk_create(
+                InventoryShard(
+                    book=book,
+                    number=number,
+                    inventory=share + (number < extra),
+                )
+                for number in range(shards)
+            )
+        Book.objects.filter(pk=book_id).update(inventory=inventory)
+        transaction.on_commit(lambda: bump_catalogue_version([book_id]))
+
+
+def copies_on_shelf(book_ids) -> dict:
+    """Current copies left of each existing book, in a single query."""
+    return dict(
+        Book.objects.filter(pk__in=book_ids)
+        .order_by()
+        .annotate(copies=ON_SHELF)
+        .values_list("pk", "copies")
+    )
+
+
+def refresh_inventory(book_ids=None) -> list:
+    """
+    Store the total of the shards of sharded books, of every one when
+    ``book_ids`` is None, in their book row in one UPDATE, and return
+    their ids. Meant to run on a schedule, see the ``refresh_inventory``
+    command, rather than after each checkout.
+    """
+    books = Book.objects.exclude(UNSHARDED)
+    if book_ids is not None:
+        books = books.filter(pk__in=book_ids)
+    refreshed = list(books.values_list("pk", flat=True))
+    books.filter(pk__in=refreshed).update(inventory=ON_SHELF)
+    transaction.on_commit(lambda: bump_catalogue_version(refreshed))
+    return refreshed
+
+
+def spread_inventory(book_ids) -> None:
+    """
+    Spread the inventory written to the book row of sharded books over
+    their shards again. Call it in the transaction that edits
+    ``Book.inventory``, otherwise the next refresh puts the total of the
+    shards back.
+    """
+    for book_id in _sharded_books(book_ids):
+        with transaction.atomic():
+            shard_rows = list(
+                InventoryShard.objects.select_for_update()
+                .filter(book_id=book_id)
+                .order_by("number")
+            )
+            inventory = Book.objects.values_list(
+                "inventory", flat=True
+            ).get(pk=book_id)
+            share, extra = divmod(inventory, len(shard_rows))
+            for index, shard in enumerate(shard_rows):
+                shard.inventory = share + (index < extra)
+            InventoryShard.objects.bulk_update(shard_rows, ["inventory"])
+
+
+def _sharded_books(book_ids) -> list:
+    return list(
+        InventoryShard.objects.filter(book_id__in=book_ids)
+        .order_by()
+        .values_list("book_id", flat=True)
+        .distinct()
+    )
+
+
+def _take_sharded_copies(book_id: int, count: int) -> bool:
+    """
+    Take ``count`` copies from random shards with copies left, each with
+    a conditional UPDATE of a single shard. Returns False, with the copies
+    that could be taken still taken, when there are not enough; callers
+    roll back.
+    """
+    numbers = list(
+        InventoryShard.objects.filter(book_id=book_id, inventory__gt=0)
+        .values_list("number", flat=True)
+    )
+    random.shuffle(numbers)
+    taken = 0
+    while taken < count and numbers:
+        number = numbers[-1]
+        if InventoryShard.objects.filter(
+            book_id=book_id, number=number, inventory__gt=0
+        ).update(inventory=F("inventory") - 1):
+            taken += 1
+        else:
+            numbers.pop()
+        random.shuffle(numbers)
+
+    return taken == count
+
+
+def _release_sharded_copies(book_id: int, count: int) -> None:
+    numbers = list(
+        InventoryShard.objects.filter(book_id=book_id)
+        .values_list("number", flat=True)
+    )
+    if not numbers:
+        return
+    InventoryShard.objects.filter(
+        book_id=book_id, number=random.choice(numbers)
+    ).update(inventory=F("inventory") + count)
@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from borrowings.fees import accrue_overdue_fees, reconcile_balances
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll the accrued fees of overdue borrowings forward, meant to run "
+        "nightly. With --reconcile, recompute every balance from the "
+        "borrowings and report the drift instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Accrue fees as of this date (YYYY-MM-DD), defaults to today",
+        )
+        parser.add_argument(
+            "--reconcile",
+            action="store_true",
+            help="Compare stored balances with recomputed ones",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="With --reconcile, overwrite drifted balances",
+        )
+
+    def handle(self, *args, **options):
+        if options["fix"] and not options["reconcile"]:
+            raise CommandError("--fix can only be used with --reconcile")
+
+        if options["reconcile"]:
+            self.reconcile(options["fix"])
+            return
+
+        on_date = timezone.now().date()
+        if options["date"]:
+            on_date = parse_date(options["date"])
+            if on_date is None:
+                raise CommandError("--date must be formatted as YYYY-MM-DD")
+
+        with transaction.atomic():
+            updated = accrue_overdue_fees(on_date)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Accrued overdue fees of {updated} balances as of {on_date}"
+            )
+        )
+
+    def reconcile(self, fix):
+        with transaction.atomic():
+            drift = reconcile_balances(fix=fix)
+
+        for user_id, field, stored, expected in drift:
+            self.stdout.write(
+                f"user {user_id}: {field} is {stored}, expected {expected}"
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Balances are in sync"))
+        elif fix:
+            self.stdout.write(
+                self.style.WARNING(f"Fixed {len(drift)} drifted values")
+            )
+        else:
+            self.stdout.write(
+                self.style.WARNING(f"Found {len(drift)} drifted values")
+            )
@@ -0,0 +1,94 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from books.models import Book
+from borrowings.inventory import copies_on_shelf, shard_inventory, take_copy
+from borrowings.models import Borrowing
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent checkouts of a single title with the inventory "
+        "in the book row against sharded inventory counters. Every "
+        "checkout takes a copy, creates the borrowing and holds its "
+        "transaction open for --hold-ms, like the rest of a checkout does. "
+        "Run it against PostgreSQL, SQLite serializes all writes. The "
+        "benchmark rows are deleted at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checkouts", type=int, default=2_000)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--shards", type=int, default=16)
+        parser.add_argument("--hold-ms", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            self.stdout.write(
+                self.style.WARNING(
+                    "SQLite serializes all writes, expect no difference"
+                )
+            )
+
+        user = get_user_model().objects.create_user(
+            email="bench-inventory@example.com"
+        )
+        try:
+            rates = {}
+            for label, shards in (
+                ("single row", 0),
+                (f"{options['shards']} shards", options["shards"]),
+            ):
+                rates[label] = self.run(label, shards, user, options)
+            single, sharded = rates.values()
+            self.stdout.write(f"speedup {sharded / single:.1f}x")
+        finally:
+            user.delete()
+
+    def run(self, label, shards, user, options):
+        book = Book.objects.create(
+            title="Benchmark Bestseller",
+            author="Benchmark Author",
+            inventory=options["checkouts"],
+            daily_fee=1,
+        )
+        if shards:
+            shard_inventory(book.id, shards)
+
+        hold = options["hold_ms"] / 1000
+        borrow_date = date.today()
+
+        def checkout(_):
+            try:
+                with transaction.atomic():
+                    if not take_copy(book.id):
+                        return False
+                    Borrowing.objects.create(
+                        book=book,
+                        user=user,
+                        borrow_date=borrow_date,
+                        expected_return_date=borrow_date + timedelta(days=14),
+                    )
+                    time.sleep(hold)
+                return True
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+            taken = sum(executor.map(checkout, range(options["checkouts"])))
+        elapsed = time.perf_counter() - started
+
+        rate = taken / elapsed
+        self.stdout.write(
+            f"{label:<12} {rate:>9.0f} checkouts/s, {taken} taken, "
+            f"{copies_on_shelf([book.id])[book.id]} left"
+        )
+        Borrowing.objects.filter(book=book).delete()
+        book.delete()
+        return rate
@@ -0,0 +1,144 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from rest_framework.pagination import Cursor, LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from books.models import Book
+from borrowings.models import Borrowing
+from borrowings.pagination import BorrowingCursorPagination
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare deep page latency of the borrowing cursor pagination "
+        "against offset pagination on a synthetic table. Everything is "
+        "rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000)
+        parser.add_argument("--users", type=int, default=1_000)
+        parser.add_argument("--page", type=int, default=1_000)
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = self.seed(options)
+            self.stdout.write("Analyzing table...")
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Borrowing._meta.db_table}")
+
+            queryset = Borrowing.objects.select_related("book", "user")
+            self.compare("all borrowings", queryset, options)
+            user_rows = options["rows"] // options["users"]
+            if user_rows > options["page_size"]:
+                self.compare(
+                    "one user's borrowings",
+                    queryset.filter(user=users[0]),
+                    {
+                        **options,
+                        "page": min(
+                            options["page"],
+                            user_rows // options["page_size"],
+                        ),
+                    },
+                )
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        self.stdout.write(f"Seeding {options['rows']} borrowings...")
+        book = Book.objects.create(
+            title="Benchmark Book",
+            author="Benchmark Author",
+            inventory=0,
+            daily_fee=1,
+        )
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"bench-{number}@example.com")
+            for number in range(options["users"])
+        )
+        start = date(2015, 1, 1)
+        remaining = options["rows"]
+        while remaining:
+            size = min(options["batch_size"], remaining)
+            batch = []
+            for _ in range(size):
+                borrow_date = start + timedelta(days=random.randrange(3650))
+                batch.append(
+                    Borrowing(
+                        book=book,
+                        user=random.choice(users),
+                        borrow_date=borrow_date,
+                        expected_return_date=borrow_date + timedelta(days=14),
+                    )
+                )
+            Borrowing.objects.bulk_create(batch)
+            remaining -= size
+        return users
+
+    def compare(self, label, queryset, options):
+        page_size = options["page_size"]
+        offset = (options["page"] - 1) * page_size
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+
+        def offset_page():
+            paginator = LimitOffsetPagination()
+            request = Request(
+                factory.get("/", {"limit": page_size, "offset": offset})
+            )
+            return paginator.paginate_queryset(queryset, request)
+
+        last_row = (
+            queryset.order_by("borrow_date", "id")
+            .values_list("borrow_date", "id")[offset - 1]
+            if offset
+            else None
+        )
+        cursor_url = f"/?page_size={page_size}"
+        if last_row:
+            paginator = BorrowingCursorPagination()
+            paginator.base_url = cursor_url
+            position = paginator.encode_position(
+                Borrowing(borrow_date=last_row[0], id=last_row[1])
+            )
+            cursor_url = paginator.encode_cursor(
+                Cursor(offset=0, reverse=False, position=position)
+            )
+
+        def cursor_page():
+            paginator = BorrowingCursorPagination()
+            request = Request(factory.get(cursor_url))
+            return paginator.paginate_queryset(queryset, request)
+
+        self.check_same_page(offset_page(), cursor_page())
+        self.stdout.write(
+            f"{label}, page {options['page']} of {page_size} rows:"
+        )
+        for name, fetch in (("offset", offset_page), ("cursor", cursor_page)):
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                fetch()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"  {name:<6} median {statistics.median(timings):9.2f} ms"
+            )
+
+    def check_same_page(self, offset_rows, cursor_rows):
+        if [row.pk for row in offset_rows] != [row.pk for row in cursor_rows]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Offset and cursor pages differ, the timings are not "
+                    "comparable"
+                )
+            )
@@ -0,0 +1,118 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from rest_framework.renderers import JSONRenderer
+
+from books.management.commands._catalogue import seed_books
+from books.models import Book
+from books.serializers import BookSerializer, book_rows
+from borrowings.models import Borrowing
+from borrowings.serializers import BorrowingSerializer, borrowing_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rendering lists of books and borrowings with the "
+        "serializers against the .values() row serializers, in rows per "
+        "second. Everything is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options)
+            self.compare(
+                "books",
+                Book.objects.order_by("id")[:options["rows"]],
+                BookSerializer,
+                book_rows,
+                options,
+            )
+            self.compare(
+                "borrowings",
+                Borrowing.objects.select_related("book", "user")[
+                    :options["rows"]
+                ],
+                BorrowingSerializer,
+                borrowing_rows,
+                options,
+            )
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rows = options["rows"]
+        self.stdout.write(f"Seeding {rows} books and borrowings...")
+        seed_books(rows, options["batch_size"])
+        books = list(Book.objects.order_by("id")[:rows])
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"bench-{number}@example.com")
+            for number in range(100)
+        )
+        start = date(2024, 1, 1)
+        borrowings = []
+        for number in range(rows):
+            borrow_date = start + timedelta(days=random.randrange(365))
+            borrowings.append(
+                Borrowing(
+                    book=books[number],
+                    user=random.choice(users),
+                    borrow_date=borrow_date,
+                    expected_return_date=borrow_date + timedelta(days=14),
+                    actual_return_date=(
+                        borrow_date + timedelta(days=7)
+                        if number % 2 else None
+                    ),
+                )
+            )
+        Borrowing.objects.bulk_create(
+            borrowings, batch_size=options["batch_size"]
+        )
+
+    def compare(self, label, queryset, serializer_class, row_serializer,
+                options):
+        renderer = JSONRenderer()
+
+        def serializer_path():
+            return renderer.render(
+                serializer_class(list(queryset), many=True).data
+            )
+
+        def row_path():
+            return renderer.render(
+                row_serializer.serialize(row_serializer.values(queryset))
+            )
+
+        if serializer_path() != row_path():
+            self.stdout.write(
+                self.style.WARNING(
+                    f"The {label} outputs differ, the timings are not "
+                    f"comparable"
+                )
+            )
+
+        self.stdout.write(f"{label}, {options['rows']} rows:")
+        rates = {}
+        for name, render in (
+            ("serializer", serializer_path),
+            ("rows", row_path),
+        ):
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                render()
+                timings.append(time.perf_counter() - started)
+            rates[name] = options["rows"] / statistics.median(timings)
+            self.stdout.write(f"  {name:<10} {rates[name]:>10.0f} rows/s")
+        self.stdout.write(
+            f"  speedup    {rates['rows'] / rates['serializer']:>10.1f}x"
+        )
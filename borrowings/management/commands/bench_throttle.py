@@ -0,0 +1,67 @@
+import statistics
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from rest_framework.test import APIRequestFactory
+
+from city_library_api.throttling import TokenBucketThrottle
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the token bucket throttle per request on the local-memory "
+        "and file cache backends, for requests let through and for "
+        "throttled ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20_000)
+        parser.add_argument("--clients", type=int, default=100)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            for label, cache in (
+                ("locmem", LocMemCache("bench-throttle", {})),
+                ("file", FileBasedCache(directory, {})),
+            ):
+                self.run(label, cache, options)
+
+    def run(self, label, cache, options):
+        factory = APIRequestFactory()
+        requests = [
+            factory.get("/", REMOTE_ADDR=f"10.0.{number >> 8}.{number & 255}")
+            for number in range(options["clients"])
+        ]
+        for name, rate in (
+            ("refilled", "1000000/s"),
+            ("draining", "1000000/day"),
+            ("throttled", "1/day"),
+        ):
+            throttle_class = type(
+                "BenchThrottle",
+                (TokenBucketThrottle,),
+                {"rate": rate, "cache": cache, "get_cache_key": get_cache_key},
+            )
+            timings = []
+            for number in range(options["requests"]):
+                request = requests[number % len(requests)]
+                started = time.perf_counter()
+                throttle_class().allow_request(request, None)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f"{label:<7} {name:<10} median "
+                f"{statistics.median(timings) * 1e6:6.1f} µs, p99 "
+                f"{statistics.quantiles(timings, n=100)[-1] * 1e6:6.1f} µs"
+            )
+        cache.clear()
+
+
+def get_cache_key(throttle, request, view):
+    return throttle.cache_format % {
+        "scope": "bench",
+        "ident": throttle.get_ident(request),
+    }
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from borrowings.notifications import dispatch_notifications
+from borrowings.telegram_bot import TelegramClient
+
+
+class Command(BaseCommand):
+    help = "Deliver Telegram notifications from the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Number of notifications claimed at once",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=5,
+            help="Attempts before a notification is dead-lettered",
+        )
+        parser.add_argument(
+            "--backoff",
+            type=float,
+            default=30,
+            help="Seconds before the first retry, doubled on every retry",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to sleep when the outbox is empty",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no notification is due instead of polling",
+        )
+
+    def handle(self, *args, **options):
+        client = TelegramClient()
+        totals = {"sent": 0, "retried": 0, "dead": 0}
+
+        try:
+            while True:
+                counts = dispatch_notifications(
+                    client,
+                    batch_size=options["batch_size"],
+                    max_attempts=options["max_attempts"],
+                    backoff=options["backoff"],
+                )
+                for key, value in counts.items():
+                    totals[key] += value
+
+                if not any(counts.values()):
+                    if options["once"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            client.close()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {totals['sent']}, retried {totals['retried']}, "
+                f"dead-lettered {totals['dead']}"
+            )
+        )
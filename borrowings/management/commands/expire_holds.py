@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from borrowings.holds import expire_holds
+from borrowings.models import Hold
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire holds past their expiry date in bulk. Copies kept for "
+        "expired ready holds go to the next holds in the queue or back to "
+        "the inventory. Meant to run on a schedule."
+    )
+
+    def handle(self, *args, **options):
+        expired = expire_holds()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Expired {expired.get(Hold.READY, 0)} ready and "
+                f"{expired.get(Hold.WAITING, 0)} waiting holds"
+            )
+        )
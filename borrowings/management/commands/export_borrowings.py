@@ -0,0 +1,12 @@
+from borrowings.views import BorrowingExportView
+from city_library_api.export import ExportCommand
+
+
+class Command(ExportCommand):
+    help = (
+        "Export every borrowing as CSV or NDJSON, streamed from the database"
+    )
+    export_fields = BorrowingExportView.export_fields
+
+    def get_queryset(self):
+        return BorrowingExportView.queryset.all()
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from borrowings.inventory import refresh_inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the total of the shards of every sharded book in its book "
+        "row, shown by the book endpoints. Checkouts and returns of "
+        "sharded books only change their shards, so this is meant to run "
+        "on a schedule, every minute or so."
+    )
+
+    def handle(self, *args, **options):
+        refreshed = refresh_inventory()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed the inventory of {len(refreshed)} sharded books"
+            )
+        )
@@ -0,0 +1,126 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from borrowings.models import Borrowing
+
+
+FIELDS = (
+    "id",
+    "user_email",
+    "book_id",
+    "book_title",
+    "expected_return_date",
+    "overdue_days",
+    "overdue_fee",
+)
+
+SUMMARY_BUCKETS = (
+    ("1-7 days", 1, 7),
+    ("8-30 days", 8, 30),
+    ("31+ days", 31, None),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Report borrowings that are past their expected return date with "
+        "the overdue days and accrued fees, as NDJSON, CSV or a summary"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=("summary", "ndjson", "csv"),
+            default="summary",
+        )
+        parser.add_argument(
+            "--date",
+            help="Report as of this date (YYYY-MM-DD), defaults to today",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2_000,
+            help="Rows fetched from the database cursor at a time",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the report to this file instead of stdout",
+        )
+
+    def handle(self, *args, **options):
+        on_date = timezone.now().date()
+        if options["date"]:
+            on_date = parse_date(options["date"])
+            if on_date is None:
+                raise CommandError("--date must be formatted as YYYY-MM-DD")
+
+        queryset = Borrowing.objects.overdue(on_date)
+
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                self.write_report(queryset, output, options)
+        else:
+            self.write_report(queryset, self.stdout, options)
+
+    def write_report(self, queryset, output, options):
+        if options["format"] == "summary":
+            self.write_summary(queryset, output)
+            return
+
+        overdue = (
+            queryset.order_by("expected_return_date", "id")
+            .values_list(
+                "id",
+                "user__email",
+                "book_id",
+                "book__title",
+                "expected_return_date",
+                "overdue_days",
+                "overdue_fee",
+            )
+            .iterator(chunk_size=options["chunk_size"])
+        )
+        rows = ((*row[:-1], f"{row[-1]:.2f}") for row in overdue)
+
+        if options["format"] == "csv":
+            writer = csv.writer(output)
+            writer.writerow(FIELDS)
+            writer.writerows(rows)
+            return
+
+        for row in rows:
+            record = dict(zip(FIELDS, row))
+            record["expected_return_date"] = (
+                record["expected_return_date"].isoformat()
+            )
+            output.write(json.dumps(record) + "\n")
+
+    def write_summary(self, queryset, output):
+        aggregates = {
+            "count": Count("id"),
+            "fee": Sum("overdue_fee"),
+        }
+        for number, (_, low, high) in enumerate(SUMMARY_BUCKETS):
+            in_bucket = Q(overdue_days__gte=low)
+            if high is not None:
+                in_bucket &= Q(overdue_days__lte=high)
+            aggregates[f"count_{number}"] = Count("id", filter=in_bucket)
+            aggregates[f"fee_{number}"] = Sum("overdue_fee", filter=in_bucket)
+
+        totals = queryset.aggregate(**aggregates)
+
+        output.write(f"{'Overdue':<12}{'Borrowings':>12}{'Fees':>14}\n")
+        for number, (label, _, _) in enumerate(SUMMARY_BUCKETS):
+            output.write(
+                f"{label:<12}{totals[f'count_{number}']:>12}"
+                f"{totals[f'fee_{number}'] or 0:>14.2f}\n"
+            )
+        output.write(
+            f"{'Total':<12}{totals['count']:>12}{totals['fee'] or 0:>14.2f}\n"
+        )
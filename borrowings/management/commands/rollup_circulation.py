@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from borrowings.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll up daily checkouts, returns, active and overdue loans per "
+        "book. Only days changed since the last run are processed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Roll up to this date (YYYY-MM-DD), defaults to today",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore the watermark and rebuild all rollups",
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options["date"]:
+            today = parse_date(options["date"])
+            if today is None:
+                raise CommandError("--date must be formatted as YYYY-MM-DD")
+
+        result = refresh_rollups(today=today, full=options["full"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {result['written']} rollups from {result['start']} "
+                f"to {result['end']}, rebuilt {result['rebuilt']} earlier "
+                f"rollups of {result['books']} changed books"
+            )
+        )
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from books.models import Book
+from borrowings.inventory import shard_inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Spread the inventory of a book over several counter rows, so "
+        "concurrent checkouts of a popular title do not queue on the book "
+        "row. Use --shards 0 to move the inventory back into the book row. "
+        "Inventory edits made through the API, the admin or import_books "
+        "are spread over the shards of a sharded book."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("book_id", type=int)
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=8,
+            help="Number of counter rows, 0 to stop sharding",
+        )
+
+    def handle(self, *args, **options):
+        if not 0 <= options["shards"] <= 1_000:
+            raise CommandError("--shards must be between 0 and 1000")
+        try:
+            shard_inventory(options["book_id"], options["shards"])
+        except Book.DoesNotExist:
+            raise CommandError(f"Book {options['book_id']} does not exist")
+
+        inventory = Book.objects.get(pk=options["book_id"]).inventory
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{inventory} copies over {options['shards']} shards"
+                if options["shards"]
+                else f"{inventory} copies in the book row"
+            )
+        )
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0001_initial"),
+        ("borrowings", "0004_borrowing_overdue_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeeBalance",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="fee_balance",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "rental_fees",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "overdue_fees",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "accrued_overdue_fees",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("accrued_on", models.DateField(blank=True, null=True)),
+            ],
+        ),
+    ]
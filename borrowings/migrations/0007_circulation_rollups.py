@@ -0,0 +1,70 @@
+# Generated by Django 4.2.9 on 2026-10-17 04:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("books", "0001_initial"),
+        ("borrowings", "0006_borrowing_active_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Watermark",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("changed_before", models.DateTimeField()),
+                ("processed_to", models.DateField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="borrowing",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name="DailyCirculation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("checkout_count", models.PositiveIntegerField(default=0)),
+                ("return_count", models.PositiveIntegerField(default=0)),
+                ("active_count", models.PositiveIntegerField(default=0)),
+                ("overdue_count", models.PositiveIntegerField(default=0)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="books.book"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date", "book"],
+                "indexes": [
+                    models.Index(
+                        fields=["book", "date"], name="daily_circulation_book_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailycirculation",
+            constraint=models.UniqueConstraint(
+                fields=("date", "book"), name="daily_circulation_date_book_unique"
+            ),
+        ),
+    ]
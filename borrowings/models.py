@@ -1,8 +1,37 @@
 from django.db import models
 from django.conf import settings
-from django.db.models import Q, F, CheckConstraint
+from django.utils import timezone
+from django.db.models import (
+    Q,
+    F,
+    CheckConstraint,
+    DecimalField,
+    ExpressionWrapper,
+    Value,
+)
 
 from books.models import Book
+from borrowings.expressions import DaysBetween
+
+
+class BorrowingQuerySet(models.QuerySet):
+    def overdue(self, on_date):
+        """
+        Borrowings still out after their expected return date, annotated
+        with the days they are overdue and the fee accrued for those days.
+        """
+        return self.filter(
+            actual_return_date__isnull=True,
+            expected_return_date__lt=on_date,
+        ).annotate(
+            overdue_days=DaysBetween(
+                Value(on_date), F("expected_return_date")
+            ),
+            overdue_fee=ExpressionWrapper(
+                F("overdue_days") * F("book__daily_fee"),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
 
 
 class Borrowing(models.Model):
@@ -14,12 +43,48 @@ class Borrowing(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT
     )
+    # Queryset updates have to set it explicitly, the circulation
+    # rollups pick up changed borrowings by it.
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = BorrowingQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.book.title} borrowed by {self.user.email}"
 
     class Meta:
-        ordering = ["borrow_date"]
+        ordering = ["borrow_date", "id"]
+        indexes = [
+            models.Index(
+                fields=["borrow_date", "id"],
+                name="borrowing_date_id_idx",
+            ),
+            models.Index(
+                fields=["user", "borrow_date", "id"],
+                name="borrowing_user_date_idx",
+            ),
+            # Partial indexes only hold active loans, which stay a small
+            # fraction of the table as returned borrowings pile up. The
+            # included columns let PostgreSQL answer from the index alone.
+            models.Index(
+                fields=["user", "borrow_date", "id"],
+                condition=Q(actual_return_date__isnull=True),
+                include=["book", "expected_return_date"],
+                name="borrowing_user_active_idx",
+            ),
+            models.Index(
+                fields=["book", "expected_return_date"],
+                condition=Q(actual_return_date__isnull=True),
+                include=["user"],
+                name="borrowing_book_active_idx",
+            ),
+            models.Index(
+                fields=["expected_return_date", "id"],
+                condition=Q(actual_return_date__isnull=True),
+                include=["user", "book"],
+                name="borrowing_overdue_idx",
+            ),
+        ]
         constraints = [
             CheckConstraint(
                 check=Q(borrow_date__lte=F("expected_return_date")),
@@ -31,3 +96,190 @@ class Borrowing(models.Model):
                 name="check_actual_return_date_gte_borrow_date_or_null",
             ),
         ]
+
+
+class Notification(models.Model):
+    """
+    Outbox row for a Telegram message. Rows are written in the same
+    transaction as the change they announce and delivered later by the
+    ``dispatch_notifications`` command.
+    """
+    PENDING = "PENDING"
+    SENT = "SENT"
+    DEAD = "DEAD"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (DEAD, "Dead"),
+    ]
+
+    message = models.TextField()
+    status = models.CharField(
+        max_length=7,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Notification {self.id} ({self.status})"
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=Q(status="PENDING"),
+                name="notification_pending_idx",
+            ),
+        ]
+
+
+class FeeBalance(models.Model):
+    """
+    Fees owed by a user, maintained incrementally so the balance is a
+    single row lookup.
+
+    ``rental_fees`` is charged at checkout for the planned loan period,
+    ``overdue_fees`` holds the fees of borrowings returned late and
+    ``accrued_overdue_fees`` the fees accrued by borrowings still overdue
+    as of ``accrued_on``, rolled forward by the ``accrue_fees`` command.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="fee_balance",
+    )
+    rental_fees = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0
+    )
+    overdue_fees = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0
+    )
+    accrued_overdue_fees = models.DecimalField(
+        max_digits=12, decimal_places=2, default=0
+    )
+    accrued_on = models.DateField(null=True, blank=True)
+
+    @property
+    def total(self):
+        return (
+            self.rental_fees
+            + self.overdue_fees
+            + self.accrued_overdue_fees
+        )
+
+    def __str__(self):
+        return f"{self.user.email}: {self.total}"
+
+
+class DailyCirculation(models.Model):
+    """
+    Circulation of a book on one day, rolled up from the borrowings by the
+    ``rollup_circulation`` command. ``active_count`` and ``overdue_count``
+    are taken at the end of the day.
+    """
+    date = models.DateField()
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    checkout_count = models.PositiveIntegerField(default=0)
+    return_count = models.PositiveIntegerField(default=0)
+    active_count = models.PositiveIntegerField(default=0)
+    overdue_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.book_id} on {self.date}"
+
+    class Meta:
+        ordering = ["date", "book"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "book"],
+                name="daily_circulation_date_book_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["book", "date"],
+                name="daily_circulation_book_idx",
+            ),
+        ]
+
+
+class Watermark(models.Model):
+    """
+    Progress of an incremental job: borrowings changed before
+    ``changed_before`` and days up to ``processed_to`` are processed.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    changed_before = models.DateTimeField()
+    processed_to = models.DateField()
+
+    def __str__(self):
+        return f"{self.name}: {self.processed_to}"
+
+
+class Hold(models.Model):
+    """
+    A patron waiting for a copy of a book. Waiting holds of a book form a
+    FIFO queue in id order. A returned copy goes to the first waiting hold,
+    which becomes ready and keeps the copy out of the inventory until it
+    is checked out or expires.
+    """
+    WAITING = "WAITING"
+    READY = "READY"
+    FULFILLED = "FULFILLED"
+    EXPIRED = "EXPIRED"
+    CANCELLED = "CANCELLED"
+    STATUS_CHOICES = [
+        (WAITING, "Waiting"),
+        (READY, "Ready for pickup"),
+        (FULFILLED, "Fulfilled"),
+        (EXPIRED, "Expired"),
+        (CANCELLED, "Cancelled"),
+    ]
+    ACTIVE = (WAITING, READY)
+
+    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    status = models.CharField(
+        max_length=9,
+        choices=STATUS_CHOICES,
+        default=WAITING,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    ready_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Hold {self.id} on {self.book_id} ({self.status})"
+
+    class Meta:
+        ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "book"],
+                condition=Q(status__in=["WAITING", "READY"]),
+                name="hold_active_user_book_unique",
+            ),
+        ]
+        indexes = [
+            # The queue of a book: only waiting holds, in FIFO order.
+            models.Index(
+                fields=["book", "id"],
+                condition=Q(status="WAITING"),
+                name="hold_queue_idx",
+            ),
+            models.Index(
+                fields=["expires_at"],
+                condition=Q(status__in=["WAITING", "READY"]),
+                name="hold_active_expiry_idx",
+            ),
+        ]
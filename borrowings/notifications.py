@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import requests
+from django.db import transaction
+from django.utils import timezone
+
+from borrowings.models import Notification
+
+
+def enqueue_notification(message: str) -> Notification:
+    """
+    Store a Telegram message in the outbox. Call it inside the transaction
+    that makes the change, so the message exists if and only if the change
+    was committed.
+    """
+    return Notification.objects.create(message=message)
+
+
+def claim_notifications(batch_size: int, lease: timedelta) -> list:
+    """
+    Claim up to ``batch_size`` due notifications for this worker.
+
+    The claim pushes ``next_attempt_at`` past the lease in a short
+    transaction, so other workers skip the rows while they are being sent
+    and a crashed worker's rows become due again once the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Notification.objects.select_for_update(skip_locked=True)
+            .filter(status=Notification.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        Notification.objects.filter(id__in=ids).update(
+            next_attempt_at=now + lease
+        )
+    return list(Notification.objects.filter(id__in=ids).order_by("id"))
+
+
+def dispatch_notifications(
+    client,
+    batch_size: int = 100,
+    max_attempts: int = 5,
+    backoff: float = 30,
+) -> dict:
+    """
+    Send one batch of due notifications through ``client``.
+
+    A failed message is retried with exponential backoff, starting at
+    ``backoff`` seconds, and dead-lettered after ``max_attempts`` tries.
+    Returns the number of sent, retried and dead messages.
+    """
+    lease = timedelta(seconds=client.timeout * batch_size + backoff)
+    batch = claim_notifications(batch_size, lease)
+    counts = {"sent": 0, "retried": 0, "dead": 0}
+
+    for notification in batch:
+        notification.attempts += 1
+        try:
+            client.send_message(notification.message)
+        except requests.exceptions.RequestException as e:
+            notification.last_error = str(e)
+            if notification.attempts >= max_attempts:
+                notification.status = Notification.DEAD
+                counts["dead"] += 1
+            else:
+                notification.next_attempt_at = timezone.now() + timedelta(
+                    seconds=backoff * 2 ** (notification.attempts - 1)
+                )
+                counts["retried"] += 1
+        else:
+            notification.status = Notification.SENT
+            notification.sent_at = timezone.now()
+            notification.last_error = ""
+            counts["sent"] += 1
+
+    Notification.objects.bulk_update(
+        batch,
+        ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+    )
+    return counts
@@ -0,0 +1,102 @@
+from django.utils.dateparse import parse_date
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class BorrowingCursorPagination(CursorPagination):
+    """
+    Keyset pagination for borrowings ordered on (borrow_date, id).
+
+    Unlike DRF's ``CursorPagination`` the cursor stores the full key of the
+    last row instead of a position plus an offset, so every page is a range
+    scan on the composite indexes no matter how deep the client goes or how
+    many borrowings share the same date. Rows may be model instances or
+    ``.values()`` dicts.
+    """
+    ordering = ("borrow_date", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        key = self.decode_position(self.cursor)
+
+        if reverse:
+            queryset = queryset.order_by("-borrow_date", "-id")
+        else:
+            queryset = queryset.order_by("borrow_date", "id")
+
+        if key is not None:
+            borrow_date, pk = key
+            if reverse:
+                queryset = queryset.filter(borrow_date__lte=borrow_date)
+                queryset = queryset.exclude(borrow_date=borrow_date, id__gte=pk)
+            else:
+                queryset = queryset.filter(borrow_date__gte=borrow_date)
+                queryset = queryset.exclude(borrow_date=borrow_date, id__lte=pk)
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        if reverse:
+            self.has_next = key is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = key is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=False,
+                position=self.encode_position(self.page[-1]),
+            )
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(
+            Cursor(
+                offset=0,
+                reverse=True,
+                position=self.encode_position(self.page[0]),
+            )
+        )
+
+    def encode_position(self, instance) -> str:
+        if isinstance(instance, dict):
+            borrow_date, pk = instance["borrow_date"], instance["id"]
+        else:
+            borrow_date, pk = instance.borrow_date, instance.pk
+        return f"{borrow_date.isoformat()}|{pk}"
+
+    def decode_position(self, cursor):
+        if cursor is None or cursor.position is None:
+            return None
+        try:
+            borrow_date, pk = cursor.position.split("|")
+            borrow_date = parse_date(borrow_date)
+            pk = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if borrow_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return borrow_date, pk
@@ -0,0 +1,172 @@
+from collections import Counter
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from borrowings.models import Borrowing, DailyCirculation, Watermark
+
+
+WATERMARK = "daily_circulation"
+# Borrowings changed by transactions still open when a run starts commit
+# with an earlier ``updated_at``, so every run looks back a little further.
+# Rebuilding a day twice gives the same rows.
+OVERLAP = timedelta(minutes=5)
+ONE_DAY = timedelta(days=1)
+
+
+def _circulation(loans, start, end):
+    """
+    Sweep the loans of one book over the days from ``start`` to ``end``
+    and yield ``(date, checkouts, returns, active, overdue)`` for every day
+    with a non-zero count.
+    """
+    checkouts = Counter()
+    returns = Counter()
+    active = Counter()
+    overdue = Counter()
+
+    for borrow_date, expected_return_date, actual_return_date in loans:
+        # A loan is active from its borrow date and overdue from the day
+        # after its expected return date, both until it is returned.
+        overdue_from = expected_return_date + ONE_DAY
+        checkouts[borrow_date] += 1
+        active[max(borrow_date, start)] += 1
+        if actual_return_date is None or actual_return_date > overdue_from:
+            overdue[max(overdue_from, start)] += 1
+        if actual_return_date is not None:
+            returns[actual_return_date] += 1
+            active[actual_return_date] -= 1
+            if actual_return_date > overdue_from:
+                overdue[actual_return_date] -= 1
+
+    active_count = overdue_count = 0
+    day = start
+    while day <= end:
+        active_count += active[day]
+        overdue_count += overdue[day]
+        if checkouts[day] or returns[day] or active_count or overdue_count:
+            yield (
+                day,
+                checkouts[day],
+                returns[day],
+                active_count,
+                overdue_count,
+            )
+        day += ONE_DAY
+
+
+def rebuild_rollups(start, end, books=None, batch_size=1_000) -> int:
+    """
+    Replace the rollups of the days from ``start`` to ``end``, for all
+    books or only ``books``. Loans are streamed ordered by book so only
+    one book is swept at a time. Returns the number of rows written.
+    """
+    loans = Borrowing.objects.filter(
+        Q(actual_return_date__isnull=True) | Q(actual_return_date__gte=start),
+        borrow_date__lte=end,
+    )
+    rollups = DailyCirculation.objects.filter(date__range=(start, end))
+    if books is not None:
+        loans = loans.filter(book__in=books)
+        rollups = rollups.filter(book__in=books)
+    rollups.delete()
+
+    rows = (
+        loans.order_by("book_id")
+        .values_list(
+            "book_id",
+            "borrow_date",
+            "expected_return_date",
+            "actual_return_date",
+        )
+        .iterator(chunk_size=batch_size)
+    )
+    batch = []
+    written = 0
+    for book_id, book_loans in groupby(rows, key=lambda row: row[0]):
+        for day, checkouts, returns, active, overdue in _circulation(
+            (row[1:] for row in book_loans), start, end
+        ):
+            batch.append(
+                DailyCirculation(
+                    date=day,
+                    book_id=book_id,
+                    checkout_count=checkouts,
+                    return_count=returns,
+                    active_count=active,
+                    overdue_count=overdue,
+                )
+            )
+        if len(batch) >= batch_size:
+            DailyCirculation.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    DailyCirculation.objects.bulk_create(batch)
+    return written + len(batch)
+
+
+def refresh_rollups(today=None, full=False) -> dict:
+    """
+    Bring the rollups up to ``today``. Days after the watermark are built
+    for all books, earlier days are rebuilt only for books whose
+    borrowings changed since the last run. ``full`` ignores the watermark
+    and rebuilds everything.
+    """
+    today = today or timezone.now().date()
+    started_at = timezone.now()
+
+    with transaction.atomic():
+        watermark = (
+            Watermark.objects.select_for_update()
+            .filter(name=WATERMARK)
+            .first()
+        )
+        rebuilt = 0
+        books = []
+
+        if watermark is None or full:
+            start = Borrowing.objects.aggregate(
+                start=Min("borrow_date")
+            )["start"] or today
+            DailyCirculation.objects.all().delete()
+        else:
+            start = watermark.processed_to + ONE_DAY
+            changed = Borrowing.objects.filter(
+                updated_at__gte=watermark.changed_before - OVERLAP,
+                borrow_date__lt=start,
+            )
+            changed_from = changed.aggregate(
+                changed_from=Min("borrow_date")
+            )["changed_from"]
+            if changed_from is not None:
+                books = list(
+                    changed.order_by()
+                    .values_list("book_id", flat=True)
+                    .distinct()
+                )
+                rebuilt = rebuild_rollups(
+                    changed_from, start - ONE_DAY, books=books
+                )
+
+        written = 0
+        if start <= today:
+            written = rebuild_rollups(start, today)
+
+        Watermark.objects.update_or_create(
+            name=WATERMARK,
+            defaults={
+                "changed_before": started_at,
+                "processed_to": max(today, start - ONE_DAY),
+            },
+        )
+
+    return {
+        "start": start,
+        "end": today,
+        "written": written,
+        "rebuilt": rebuilt,
+        "books": len(books),
+    }
@@ -1,10 +1,19 @@
+from collections import Counter
+from typing import Optional
+
+from django.conf import settings
 from django.db import IntegrityError, transaction
+from django.utils import timezone
 
 from rest_framework import serializers
 
-from borrowings.models import Borrowing, Book
-from books.serializers import BookSerializer
-from borrowings.telegram_bot import send_telegram_message
+from borrowings.models import Borrowing, Book, Hold
+from books.serializers import BookSerializer, book_rows
+from borrowings.fees import charge_checkouts, settle_returns
+from borrowings.holds import fulfill_hold, fulfill_holds, return_copies
+from borrowings.inventory import copies_on_shelf, take_copies, take_copy
+from borrowings.notifications import enqueue_notification
+from city_library_api.serialization import RowSerializer
 
 
 class BorrowingSerializer(serializers.ModelSerializer):
@@ -47,28 +56,40 @@ class BorrowingSerializer(serializers.ModelSerializer):
         return obj.actual_return_date is None
 
     def validate_book(self, value) -> Book:
-        if value.inventory <= 0:
+        # The book row of a sharded book may hold an outdated total.
+        if (
+            value.inventory <= 0
+            and copies_on_shelf([value.pk]).get(value.pk, 0) <= 0
+            and not self.has_ready_hold(value)
+        ):
             raise serializers.ValidationError("Book is not available")
         return value
 
+    def has_ready_hold(self, book) -> bool:
+        request = self.context.get("request")
+        return request is not None and Hold.objects.filter(
+            user_id=request.user.id, book=book, status=Hold.READY
+        ).exists()
+
     def create(self, validated_data) -> Borrowing:
         book = validated_data.pop("book")
         user = self.context["request"].user
-        borrowing = None
 
         with transaction.atomic():
+            if not fulfill_hold(user, book.pk) and not take_copy(book.pk):
+                raise serializers.ValidationError(
+                    {"book": ["Book is not available"]}
+                )
             try:
                 borrowing = Borrowing.objects.create(
                     book=book, user=user, **validated_data
                 )
-                book.inventory -= 1
-                book.save()
             except IntegrityError as e:
                 raise serializers.ValidationError(
                     f"Failed to create borrowing due to integrity error: {e}"
                 )
-            
-        if borrowing:
+            charge_checkouts([borrowing])
+
             message = f"""
                 <b>New Borrowing Created:</b>
                 <pre>User: {user.email}</pre>
@@ -78,7 +99,9 @@ class BorrowingSerializer(serializers.ModelSerializer):
                     Expected Return Date: {borrowing.expected_return_date}
                 </pre>
             """
-            send_telegram_message(message)
+            enqueue_notification(message)
+
+        book.refresh_from_db(fields=["inventory"])
 
         return borrowing
 
@@ -93,6 +116,19 @@ class BorrowingSerializer(serializers.ModelSerializer):
         return representation
 
 
+# Read-only fast path of BorrowingSerializer for lists.
+borrowing_rows = RowSerializer(
+    BorrowingSerializer,
+    nested={"book": book_rows},
+    computed={
+        "is_active": (
+            "actual_return_date",
+            lambda actual_return_date: actual_return_date is None,
+        ),
+    },
+)
+
+
 class BorrowingDetailSerializer(BorrowingSerializer):
     """
     Serializer for the borrowing details, should be used in GET requests
@@ -155,3 +191,309 @@ class BorrowingReturnSerializer(BorrowingDetailSerializer):
             "expected_return_date",
             "actual_return_date",
         )
+
+
+class BorrowingBatchSerializer(serializers.Serializer):
+    """
+    Serializer for checking out several books at once. Either every book is
+    borrowed or none is, errors are reported per book id.
+    """
+    MAX_BOOKS = 20
+
+    books = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_BOOKS,
+        help_text="IDs of the books to borrow",
+    )
+    borrow_date = serializers.DateField()
+    expected_return_date = serializers.DateField()
+
+    def validate(self, attrs) -> dict:
+        if attrs["borrow_date"] > attrs["expected_return_date"]:
+            raise serializers.ValidationError(
+                "Expected return date must not be before the borrow date"
+            )
+
+        books = Book.objects.in_bulk(set(attrs["books"]))
+        request = self.context.get("request")
+        held = set(
+            Hold.objects.filter(
+                user_id=request.user.id, book__in=books, status=Hold.READY
+            ).order_by().values_list("book_id", flat=True)
+        ) if request is not None else set()
+        counts = Counter(attrs["books"])
+        # The book row of a sharded book may hold an outdated total.
+        short = [
+            book_id
+            for book_id, count in counts.items()
+            if book_id in books
+            and books[book_id].inventory + (book_id in held) < count
+        ]
+        inventory = copies_on_shelf(short) if short else {}
+        errors = {}
+        for book_id, count in counts.items():
+            if book_id not in books:
+                errors[str(book_id)] = ["Book does not exist"]
+            elif (
+                book_id in short
+                and inventory.get(book_id, 0) + (book_id in held) < count
+            ):
+                errors[str(book_id)] = ["Book is not available"]
+        if errors:
+            raise serializers.ValidationError({"books": errors})
+
+        return attrs
+
+    def create(self, validated_data) -> list:
+        book_ids = validated_data["books"]
+        borrow_date = validated_data["borrow_date"]
+        expected_return_date = validated_data["expected_return_date"]
+        user = self.context["request"].user
+
+        with transaction.atomic():
+            counts = Counter(book_ids)
+            counts.subtract(fulfill_holds(user, counts))
+            counts = +counts
+            unavailable = take_copies(counts) if counts else []
+            if unavailable:
+                raise serializers.ValidationError(
+                    {
+                        "books": {
+                            str(book_id): ["Book is not available"]
+                            for book_id in unavailable
+                        }
+                    }
+                )
+            try:
+                borrowings = Borrowing.objects.bulk_create(
+                    Borrowing(
+                        book_id=book_id,
+                        user=user,
+                        borrow_date=borrow_date,
+                        expected_return_date=expected_return_date,
+                    )
+                    for book_id in book_ids
+                )
+            except IntegrityError as e:
+                raise serializers.ValidationError(
+                    f"Failed to create borrowings due to integrity error: {e}"
+                )
+
+            books = Book.objects.in_bulk(set(book_ids))
+            for borrowing in borrowings:
+                borrowing.book = books[borrowing.book_id]
+            charge_checkouts(borrowings)
+
+            titles = ", ".join(books[book_id].title for book_id in book_ids)
+            message = f"""
+                <b>New Borrowings Created:</b>
+                <pre>User: {user.email}</pre>
+                <pre>Books: {titles}</pre>
+                <pre>Borrow Date: {borrow_date}</pre>
+                <pre>
+                    Expected Return Date: {expected_return_date}
+                </pre>
+            """
+            enqueue_notification(message)
+
+        return borrowings
+
+
+class BorrowingBulkReturnSerializer(serializers.Serializer):
+    """
+    Serializer for returning many borrowings at once. Borrowings that are
+    already returned or do not exist are reported and left untouched, so
+    the same batch can be submitted again safely.
+    """
+    MAX_BORROWINGS = 500
+
+    RETURNED = "returned"
+    ALREADY_RETURNED = "already_returned"
+    NOT_FOUND = "not_found"
+
+    borrowings = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_BORROWINGS,
+        help_text="IDs of the borrowings to return",
+    )
+
+    def create(self, validated_data) -> list:
+        borrowing_ids = list(dict.fromkeys(validated_data["borrowings"]))
+        today = timezone.now().date()
+
+        with transaction.atomic():
+            return_dates = {}
+            to_return = {}
+            for row in (
+                Borrowing.objects.select_for_update(of=("self",))
+                .filter(pk__in=borrowing_ids)
+                .values_list(
+                    "pk",
+                    "actual_return_date",
+                    "book_id",
+                    "user_id",
+                    "expected_return_date",
+                    "book__daily_fee",
+                )
+            ):
+                pk, actual_return_date, *returned = row
+                return_dates[pk] = actual_return_date
+                if actual_return_date is None:
+                    to_return[pk] = returned
+
+            if to_return:
+                Borrowing.objects.filter(pk__in=to_return).update(
+                    actual_return_date=today, updated_at=timezone.now()
+                )
+                return_copies(
+                    Counter(book_id for book_id, *_ in to_return.values())
+                )
+                settle_returns(
+                    [fees for _, *fees in to_return.values()], today
+                )
+
+        results = []
+        for pk in borrowing_ids:
+            if pk in to_return:
+                result = {"status": self.RETURNED, "actual_return_date": today}
+            elif pk in return_dates:
+                result = {
+                    "status": self.ALREADY_RETURNED,
+                    "actual_return_date": return_dates[pk],
+                }
+            else:
+                result = {"status": self.NOT_FOUND, "actual_return_date": None}
+            results.append({"id": pk, **result})
+
+        return results
+
+
+class BorrowingBulkReturnResultSerializer(serializers.Serializer):
+    """Outcome of a single borrowing in a bulk return."""
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(
+        choices=[
+            BorrowingBulkReturnSerializer.RETURNED,
+            BorrowingBulkReturnSerializer.ALREADY_RETURNED,
+            BorrowingBulkReturnSerializer.NOT_FOUND,
+        ]
+    )
+    actual_return_date = serializers.DateField(allow_null=True)
+
+
+class CirculationStatsQuerySerializer(serializers.Serializer):
+    """Query parameters of the circulation stats endpoint."""
+    DAY = "day"
+    BOOK = "book"
+    AUTHOR = "author"
+    MAX_DAYS = 366
+
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    group_by = serializers.ChoiceField(
+        choices=[DAY, BOOK, AUTHOR],
+        default=DAY,
+        help_text="Totals per day, or per day and book or author",
+    )
+    book = serializers.IntegerField(
+        required=False, help_text="Only count this book"
+    )
+    author = serializers.CharField(
+        required=False, help_text="Only count books of this author"
+    )
+
+    def validate(self, data):
+        if data["date_from"] > data["date_to"]:
+            raise serializers.ValidationError(
+                "date_from must not be after date_to"
+            )
+        if (data["date_to"] - data["date_from"]).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(
+                f"The date range can span at most {self.MAX_DAYS} days"
+            )
+        return data
+
+
+class CirculationStatsSerializer(serializers.Serializer):
+    """Circulation of one day, summed over the books of the group."""
+    date = serializers.DateField()
+    book = serializers.IntegerField(required=False)
+    title = serializers.CharField(source="book__title", required=False)
+    author = serializers.CharField(source="book__author", required=False)
+    checkouts = serializers.IntegerField()
+    returns = serializers.IntegerField()
+    active = serializers.IntegerField()
+    overdue = serializers.IntegerField()
+
+
+class HoldSerializer(serializers.ModelSerializer):
+    """
+    Serializer for holds. A hold can only be placed on a book without
+    copies on the shelf.
+    """
+    book = serializers.PrimaryKeyRelatedField(
+        queryset=Book.objects.all(),
+        help_text="ID of the book to wait for",
+    )
+    position = serializers.SerializerMethodField(
+        help_text="Place in the queue of the book, null unless waiting"
+    )
+
+    class Meta:
+        model = Hold
+        fields = (
+            "id",
+            "book",
+            "status",
+            "position",
+            "created_at",
+            "ready_at",
+            "expires_at",
+        )
+        read_only_fields = (
+            "id",
+            "status",
+            "created_at",
+            "ready_at",
+            "expires_at",
+        )
+
+    def get_position(self, obj) -> Optional[int]:
+        if obj.status != Hold.WAITING:
+            return None
+        if hasattr(obj, "position"):
+            return obj.position
+        return Hold.objects.filter(
+            book_id=obj.book_id, status=Hold.WAITING, id__lte=obj.id
+        ).count()
+
+    def validate_book(self, value) -> Book:
+        if copies_on_shelf([value.pk]).get(value.pk, 0) > 0:
+            raise serializers.ValidationError(
+                "Book is available, borrow it instead"
+            )
+        if Hold.objects.filter(
+            user=self.context["request"].user,
+            book=value,
+            status__in=Hold.ACTIVE,
+        ).exists():
+            raise serializers.ValidationError(
+                "You already have a hold on this book"
+            )
+        return value
+
+    def create(self, validated_data) -> Hold:
+        try:
+            return Hold.objects.create(
+                user=self.context["request"].user,
+                expires_at=timezone.now() + timezone.timedelta(
+                    days=settings.HOLD_WAIT_DAYS
+                ),
+                **validated_data,
+            )
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {"book": ["You already have a hold on this book"]}
+            )
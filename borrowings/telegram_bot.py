@@ -1,26 +1,56 @@
-import os
 import requests
-from dotenv import load_dotenv
+from django.conf import settings
+
+
+class TelegramClient:
+    """
+    Telegram Bot API client.
+
+    One client keeps a single ``requests.Session``, so a worker sending many
+    messages reuses pooled connections instead of opening one per message.
+    """
+
+    def __init__(
+        self,
+        token=None,
+        chat_id=None,
+        api_url=None,
+        timeout=None,
+        session=None,
+    ):
+        self.token = token or settings.TELEGRAM_BOT_TOKEN
+        self.chat_id = chat_id or settings.TELEGRAM_CHAT_ID
+        if not self.token or not self.chat_id:
+            raise ValueError("Telegram bot token or chat id is not defined")
+
+        self.api_url = (api_url or settings.TELEGRAM_API_URL).rstrip("/")
+        self.timeout = timeout or settings.TELEGRAM_TIMEOUT
+        self.session = session or requests.Session()
+
+    def send_message(self, message: str) -> None:
+        """
+        Sends a message to the telegram channel. Raises
+        ``requests.exceptions.RequestException`` when it was not delivered.
+        """
+        response = self.session.post(
+            f"{self.api_url}/bot{self.token}/sendMessage",
+            json={
+                "chat_id": self.chat_id,
+                "text": message,
+                "parse_mode": "HTML",
+            },
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+    def close(self) -> None:
+        self.session.close()
 
 
 def send_telegram_message(message: str) -> bool:
     """Sends a message to the telegram channel."""
-    load_dotenv()
-    TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-    TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        raise ValueError("Telegram bot token or chat id is not defined")
-
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": message,
-        "parse_mode": "HTML"
-    }
     try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
+        TelegramClient().send_message(message)
     except requests.exceptions.RequestException as e:
         print(f"Error sending telegram message: {e}")
         return False
@@ -1,20 +1,64 @@
-import os, unittest, requests
+import json, requests, tempfile, threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
 from unittest.mock import patch, MagicMock
 
-from django.test import TestCase, RequestFactory
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from django.db import transaction, IntegrityError
+from django.db import connection, transaction, IntegrityError
+from django.urls import reverse
 
 from rest_framework.exceptions import ValidationError
-from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import (
+    APIRequestFactory,
+    APITestCase,
+    force_authenticate,
+)
 from rest_framework import status
 
-from borrowings.models import Borrowing
+from borrowings.models import (
+    Borrowing,
+    DailyCirculation,
+    FeeBalance,
+    Hold,
+    Notification,
+)
 from books.models import Book
-from borrowings.serializers import BorrowingSerializer
+from books.serializers import BookSerializer, book_rows
+from books.views import BookViewSet
+from borrowings.serializers import (
+    BorrowingBatchSerializer,
+    BorrowingSerializer,
+    borrowing_rows,
+)
 from borrowings.views import BorrowingListView, BorrowingReturnView
+from borrowings.inventory import (
+    copies_on_shelf,
+    release_copies,
+    release_copy,
+    shard_inventory,
+    take_copies,
+    take_copy,
+)
+from borrowings.notifications import enqueue_notification
+from borrowings.rollups import refresh_rollups
 from borrowings.telegram_bot import send_telegram_message
+from city_library_api.testing import QueryBudgetMixin
+from city_library_api.throttling import ScopedTokenBucketThrottle
 
 
 class BorrowingModelTest(TestCase):
@@ -91,10 +135,7 @@ class BorrowingSerializerTest(TestCase):
             )
             serializer.is_valid(raise_exception=True)
 
-    @patch("borrowings.serializers.send_telegram_message")
-    def test_successful_create_borrowing_with_atomic_transaction(
-        self, mock_send_message
-    ):
+    def test_successful_create_borrowing_with_atomic_transaction(self):
         serializer = BorrowingSerializer(
             data=self.borrowing_data, context={"request": self.request}
         )
@@ -107,13 +148,11 @@ class BorrowingSerializerTest(TestCase):
 
         self.book.refresh_from_db()
         self.assertEqual(self.book.inventory, 0)
-        mock_send_message.assert_called_once()
+        notification = Notification.objects.get()
+        self.assertIn(self.user.email, notification.message)
+        self.assertEqual(notification.status, Notification.PENDING)
 
-    @patch("borrowings.serializers.send_telegram_message")
-    def test_rollback_create_borrowing_with_atomic_transaction(
-        self,
-        mock_send_message
-    ):
+    def test_rollback_create_borrowing_with_atomic_transaction(self):
         original_inventory = self.book.inventory
 
         try:
@@ -135,7 +174,22 @@ class BorrowingSerializerTest(TestCase):
 
         self.book.refresh_from_db()
         self.assertEqual(self.book.inventory, original_inventory)
-        mock_send_message.assert_called()
+        self.assertFalse(Notification.objects.exists())
+
+    def test_create_borrowing_when_stock_ran_out_after_validation(self):
+        serializer = BorrowingSerializer(
+            data=self.borrowing_data, context={"request": self.request}
+        )
+        self.assertTrue(serializer.is_valid())
+        Book.objects.filter(pk=self.book.pk).update(inventory=0)
+
+        with self.assertRaises(ValidationError):
+            serializer.save()
+
+        self.assertEqual(Borrowing.objects.count(), 0)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 0)
+        self.assertFalse(Notification.objects.exists())
 
     def test_create_borrowing_with_db_integrity_error(self):
         try:
@@ -241,9 +295,9 @@ class BorrowingListViewTest(TestCase):
         response = view(request)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 2)
-        self.assertEqual(response.data[0]["id"], self.borrowing_1.id)
-        self.assertEqual(response.data[1]["id"], self.borrowing_2.id)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["results"][0]["id"], self.borrowing_1.id)
+        self.assertEqual(response.data["results"][1]["id"], self.borrowing_2.id)
 
     def test_get_queryset_regular_user(self):
         request = APIRequestFactory().get("/borrowings/")
@@ -252,8 +306,8 @@ class BorrowingListViewTest(TestCase):
         response = view(request)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.borrowing_1.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.borrowing_1.id)
 
     def test_get_queryset_user_filtered_by_is_active(self):
         request = APIRequestFactory().get("/borrowings/?is_active=true")
@@ -262,8 +316,8 @@ class BorrowingListViewTest(TestCase):
         response = view(request)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["user_email"], self.user_1.email)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["user_email"], self.user_1.email)
 
     def test_get_queryset_user_filtered_by_is_not_active(self):
         request = APIRequestFactory().get("/borrowings/?is_active=false")
@@ -272,8 +326,8 @@ class BorrowingListViewTest(TestCase):
         response = view(request)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["user_email"], self.user_2.email)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["user_email"], self.user_2.email)
 
     def test_get_queryset_superuser_filtered_by_user_id(self):
         request = APIRequestFactory().get(
@@ -284,8 +338,335 @@ class BorrowingListViewTest(TestCase):
         response = view(request)
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["user_email"], self.user_1.email)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["user_email"], self.user_1.email)
+
+
+class BorrowingPaginationTest(APITestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="adminpassword"
+        )
+        self.book = Book.objects.create(
+            title="Sample Book",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=1,
+            daily_fee=1.50,
+        )
+        borrow_dates = [
+            "2025-01-03", "2025-01-01", "2025-01-02", "2025-01-01",
+            "2025-01-03", "2025-01-01", "2025-01-02",
+        ]
+        self.borrowings = [
+            Borrowing.objects.create(
+                book=self.book,
+                user=self.admin_user,
+                borrow_date=borrow_date,
+                expected_return_date="2025-01-10",
+            )
+            for borrow_date in borrow_dates
+        ]
+        self.expected_ids = [
+            borrowing.id
+            for borrowing in sorted(
+                self.borrowings,
+                key=lambda borrowing: (borrowing.borrow_date, borrowing.id),
+            )
+        ]
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_next_links_walk_all_borrowings_in_key_order(self):
+        url = reverse("borrowings:borrowings") + "?page_size=3"
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [item["id"] for item in response.data["results"]]
+            url = response.data["next"]
+            pages += 1
+
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual(pages, 3)
+
+    def test_previous_link_returns_preceding_page(self):
+        first_page = self.client.get(
+            reverse("borrowings:borrowings") + "?page_size=3"
+        )
+        self.assertIsNone(first_page.data["previous"])
+        second_page = self.client.get(first_page.data["next"])
+        previous_page = self.client.get(second_page.data["previous"])
+
+        self.assertEqual(
+            [item["id"] for item in previous_page.data["results"]],
+            self.expected_ids[:3],
+        )
+        self.assertIsNone(previous_page.data["previous"])
+        self.assertEqual(previous_page.data["next"], first_page.data["next"])
+
+    def test_invalid_cursor_returns_not_found(self):
+        response = self.client.get(
+            reverse("borrowings:borrowings") + "?cursor=invalid"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RowSerializerParityTest(APITestCase):
+    """The fast list path renders exactly what the serializers render."""
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="adminpassword"
+        )
+        books = Book.objects.bulk_create(
+            Book(
+                title=title,
+                author=author,
+                cover=cover,
+                inventory=inventory,
+                daily_fee=daily_fee,
+            )
+            for title, author, cover, inventory, daily_fee in (
+                ("Sample Book", "Author", Book.SOFT, 1, "1.50"),
+                ("Война и мир \"1869\"", "Лев Толстой", Book.HARD, 0, "10"),
+                ("Zero", "Nobody", Book.HARD, 3, "0.05"),
+            )
+        )
+        for number, book in enumerate(books * 2):
+            Borrowing.objects.create(
+                book=book,
+                user=self.admin_user,
+                borrow_date=f"2025-01-0{number + 1}",
+                expected_return_date="2025-01-10",
+                actual_return_date=(
+                    "2025-01-09" if number % 2 else None
+                ),
+            )
+        self.client.force_authenticate(user=self.admin_user)
+
+    def assertSameJSON(self, rows, data):
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(rows), renderer.render(data))
+
+    def test_book_rows_match_serializer(self):
+        queryset = Book.objects.order_by("id")
+
+        self.assertSameJSON(
+            book_rows.serialize(book_rows.values(queryset)),
+            BookSerializer(queryset, many=True).data,
+        )
+
+    def test_borrowing_rows_match_serializer(self):
+        queryset = Borrowing.objects.select_related("book", "user")
+
+        self.assertSameJSON(
+            borrowing_rows.serialize(borrowing_rows.values(queryset)),
+            BorrowingSerializer(queryset, many=True).data,
+        )
+
+    def test_list_endpoints_match_serializer_path(self):
+        for view, url in (
+            (BookViewSet, reverse("books:book-list") + "?ordering=-daily_fee"),
+            (BorrowingListView, reverse("borrowings:borrowings")),
+        ):
+            fast = self.client.get(url)
+            with patch.object(view, "row_serializer", None):
+                cache.clear()
+                slow = self.client.get(url)
+
+            self.assertEqual(fast.status_code, status.HTTP_200_OK)
+            self.assertEqual(fast.content, slow.content)
+
+
+class BorrowingBatchCheckoutTest(QueryBudgetMixin, APITestCase):
+    CHECKOUT_BUDGET = 13
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.books = [
+            Book.objects.create(
+                title=f"Book {number}",
+                author="Author",
+                cover=Book.SOFT,
+                inventory=2,
+                daily_fee=1.50,
+            )
+            for number in range(5)
+        ]
+        self.url = reverse("borrowings:borrowing-checkout")
+        self.client.force_authenticate(user=self.user)
+
+    def payload(self, books):
+        return {
+            "books": [book.id for book in books],
+            "borrow_date": "2025-01-01",
+            "expected_return_date": "2025-01-10",
+        }
+
+    def test_checkout_creates_all_borrowings(self):
+        books = [self.books[0], self.books[1], self.books[1]]
+        response = self.client.post(
+            self.url, self.payload(books), format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item["book"]["id"] for item in response.data],
+            [book.id for book in books],
+        )
+        self.assertEqual(response.data[1]["book"]["inventory"], 0)
+        self.assertEqual(Borrowing.objects.filter(user=self.user).count(), 3)
+        self.books[0].refresh_from_db()
+        self.books[1].refresh_from_db()
+        self.assertEqual(self.books[0].inventory, 1)
+        self.assertEqual(self.books[1].inventory, 0)
+        notification = Notification.objects.get()
+        self.assertIn("Book 0, Book 1, Book 1", notification.message)
+
+    def test_checkout_is_all_or_nothing(self):
+        missing_id = self.books[-1].id + 100
+        payload = self.payload([self.books[0], self.books[1]] * 3)
+        payload["books"].append(missing_id)
+
+        response = self.client.post(self.url, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["books"],
+            {
+                str(self.books[0].id): ["Book is not available"],
+                str(self.books[1].id): ["Book is not available"],
+                str(missing_id): ["Book does not exist"],
+            },
+        )
+        self.assertFalse(Borrowing.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+    def test_checkout_rolls_back_when_stock_runs_out(self):
+        serializer = BorrowingBatchSerializer(
+            data=self.payload(self.books[:3]),
+            context={"request": RequestFactory().get("/")},
+        )
+        serializer.context["request"].user = self.user
+        self.assertTrue(serializer.is_valid())
+        Book.objects.filter(pk=self.books[2].pk).update(inventory=0)
+
+        with self.assertRaises(ValidationError) as cm:
+            serializer.save()
+
+        self.assertEqual(list(cm.exception.detail["books"]), [
+            str(self.books[2].id)
+        ])
+        self.assertFalse(Borrowing.objects.exists())
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].inventory, 2)
+
+    def test_checkout_query_budget_does_not_depend_on_book_count(self):
+        with self.assertMaxQueries(self.CHECKOUT_BUDGET) as few:
+            self.client.post(
+                self.url, self.payload(self.books[:2]), format="json"
+            )
+        with self.assertMaxQueries(self.CHECKOUT_BUDGET) as many:
+            self.client.post(self.url, self.payload(self.books), format="json")
+
+        self.assertEqual(len(few), len(many))
+
+
+class BorrowingBulkReturnTest(QueryBudgetMixin, APITestCase):
+    BULK_RETURN_BUDGET = 9
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="adminpassword"
+        )
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.book_a = Book.objects.create(
+            title="Book A",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=0,
+            daily_fee=1.50,
+        )
+        self.book_b = Book.objects.create(
+            title="Book B",
+            author="Author",
+            cover=Book.HARD,
+            inventory=0,
+            daily_fee=1.50,
+        )
+        self.active = [
+            self.create_borrowing(self.book_a),
+            self.create_borrowing(self.book_a),
+            self.create_borrowing(self.book_b),
+        ]
+        self.returned = self.create_borrowing(
+            self.book_b, actual_return_date="2025-01-05"
+        )
+        self.url = reverse("borrowings:borrowing-bulk-return")
+        self.client.force_authenticate(user=self.admin_user)
+
+    def create_borrowing(self, book, **kwargs):
+        return Borrowing.objects.create(
+            book=book,
+            user=self.user,
+            borrow_date="2025-01-01",
+            expected_return_date="2025-01-10",
+            **kwargs,
+        )
+
+    def post(self, borrowing_ids):
+        return self.client.post(
+            self.url, {"borrowings": borrowing_ids}, format="json"
+        )
+
+    def test_bulk_return_reports_every_item(self):
+        missing_id = self.returned.id + 100
+        response = self.post(
+            [borrowing.id for borrowing in self.active]
+            + [self.returned.id, missing_id]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        today = timezone.now().date().isoformat()
+        self.assertEqual(
+            [(item["status"], item["actual_return_date"])
+             for item in response.data],
+            [("returned", today)] * 3
+            + [("already_returned", "2025-01-05"), ("not_found", None)],
+        )
+        self.book_a.refresh_from_db()
+        self.book_b.refresh_from_db()
+        self.assertEqual(self.book_a.inventory, 2)
+        self.assertEqual(self.book_b.inventory, 1)
+
+    def test_bulk_return_is_idempotent(self):
+        borrowing_ids = [borrowing.id for borrowing in self.active]
+        self.post(borrowing_ids)
+        response = self.post(borrowing_ids)
+
+        self.assertEqual(
+            {item["status"] for item in response.data}, {"already_returned"}
+        )
+        self.book_a.refresh_from_db()
+        self.assertEqual(self.book_a.inventory, 2)
+
+    def test_bulk_return_is_staff_only(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.post([self.active[0].id])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_return_query_budget_does_not_depend_on_item_count(self):
+        with self.assertMaxQueries(self.BULK_RETURN_BUDGET) as one:
+            self.post([self.active[0].id])
+        with self.assertMaxQueries(self.BULK_RETURN_BUDGET) as many:
+            self.post([borrowing.id for borrowing in self.active[1:]])
+
+        self.assertEqual(len(one), len(many))
 
 
 class BorrowingReturnViewTest(TestCase):
@@ -329,56 +710,1195 @@ class BorrowingReturnViewTest(TestCase):
             response.data["actual_return_date"],
             timezone.now().date().isoformat()
         )
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 2)
+        self.assertEqual(response.data["book"]["inventory"], 2)
+
+    def test_second_return_does_not_increment_inventory(self):
+        view = BorrowingReturnView.as_view()
+        for _ in range(2):
+            request = self.factory.post(
+                f"/borrowings/{self.borrowing.id}/return/"
+            )
+            force_authenticate(request, user=self.user)
+            response = view(request, pk=self.borrowing.id)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 2)
+
+
+class BorrowingQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    LIST_BUDGET = 1
+    DETAIL_BUDGET = 1
+    RETURN_GET_BUDGET = 1
+    RETURN_POST_BUDGET = 10
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="adminpassword"
+        )
+        self.book = Book.objects.create(
+            title="Sample Book",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=10,
+            daily_fee=1.50,
+        )
+        self.borrowing = self.create_borrowing()
+        self.client.force_authenticate(user=self.admin_user)
+
+    def create_borrowing(self, user=None, book=None):
+        return Borrowing.objects.create(
+            book=book or self.book,
+            user=user or self.admin_user,
+            borrow_date="2025-01-01",
+            expected_return_date="2025-01-10",
+        )
+
+    def grow(self):
+        for number in range(5):
+            user = get_user_model().objects.create_user(
+                email=f"user{number}@example.com", password="password"
+            )
+            book = Book.objects.create(
+                title=f"Book {number}",
+                author="Author",
+                cover=Book.HARD,
+                inventory=1,
+                daily_fee=1.00,
+            )
+            self.create_borrowing(user=user, book=book)
+
+    def test_list_query_budget(self):
+        response = self.assertEndpointQueryBudget(
+            self.LIST_BUDGET,
+            "get",
+            reverse("borrowings:borrowings"),
+            grow=self.grow,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_query_budget(self):
+        response = self.assertEndpointQueryBudget(
+            self.DETAIL_BUDGET,
+            "get",
+            reverse("borrowings:borrowing-detail", args=[self.borrowing.id]),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_return_get_query_budget(self):
+        response = self.assertEndpointQueryBudget(
+            self.RETURN_GET_BUDGET,
+            "get",
+            reverse("borrowings:borrowing-return", args=[self.borrowing.id]),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_return_post_query_budget(self):
+        response = self.assertEndpointQueryBudget(
+            self.RETURN_POST_BUDGET,
+            "post",
+            reverse("borrowings:borrowing-return", args=[self.borrowing.id]),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class BorrowingIndexPlanTest(TestCase):
+    """
+    The planner has to pick the partial indexes on a realistic table,
+    where most borrowings have long been returned.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"user{number}@example.com")
+            for number in range(50)
+        )
+        books = Book.objects.bulk_create(
+            Book(
+                title=f"Book {number}",
+                author="Author",
+                cover=Book.SOFT,
+                inventory=10,
+                daily_fee=1.50,
+            )
+            for number in range(100)
+        )
+        borrowings = []
+        for number in range(5_000):
+            borrow_date = today - timezone.timedelta(days=number % 700 + 30)
+            expected_return_date = borrow_date + timezone.timedelta(days=14)
+            borrowings.append(
+                Borrowing(
+                    user=users[number % len(users)],
+                    book=books[number % len(books)],
+                    borrow_date=borrow_date,
+                    expected_return_date=expected_return_date,
+                    actual_return_date=(
+                        None if number % 50 == 0 else expected_return_date
+                    ),
+                )
+            )
+        Borrowing.objects.bulk_create(borrowings)
+        cls.user = users[0]
+        cls.book = books[0]
+        cls.today = today
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Borrowing._meta.db_table}")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_active_borrowings_per_user(self):
+        self.assertUsesIndex(
+            Borrowing.objects.filter(
+                user=self.user, actual_return_date__isnull=True
+            ),
+            "borrowing_user_active_idx",
+        )
+
+    def test_active_borrowings_per_book(self):
+        self.assertUsesIndex(
+            Borrowing.objects.filter(
+                book=self.book, actual_return_date__isnull=True
+            ).order_by("expected_return_date"),
+            "borrowing_book_active_idx",
+        )
+
+    def test_overdue_candidates(self):
+        self.assertUsesIndex(
+            Borrowing.objects.overdue(self.today).order_by(
+                "expected_return_date", "id"
+            ),
+            "borrowing_overdue_idx",
+        )
+
 
+class ConcurrentCheckoutTest(TransactionTestCase):
+    INVENTORY = 50
+    CHECKOUTS = 200
+    WORKERS = 16
 
-class TelegramBotTest(unittest.TestCase):
     def setUp(self):
-        self.test_message = "Test Message"
-        self.test_token = "123456:test_token"
-        self.test_chat_id = "123456789"
+        self.book = Book.objects.create(
+            title="Sample Book",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=self.INVENTORY,
+            daily_fee=1.50,
+        )
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+        self.borrowing_data = {
+            "borrow_date": timezone.now().date(),
+            "expected_return_date": (
+                timezone.now() + timezone.timedelta(days=7)
+            ).date(),
+            "book": self.book.id,
+        }
 
-        os.environ["TELEGRAM_BOT_TOKEN"] = self.test_token
-        os.environ["TELEGRAM_CHAT_ID"] = self.test_chat_id
+    def checkout(self, _):
+        try:
+            serializer = BorrowingSerializer(
+                data=self.borrowing_data, context={"request": self.request}
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return True
+        except ValidationError:
+            return False
+        finally:
+            connection.close()
 
-    @patch("requests.post")
-    def test_send_telegram_message_success(self, mock_post):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.raise_for_status.return_value = None
-        mock_post.return_value = mock_response
+    def test_concurrent_checkouts_never_oversell(self):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            results = list(executor.map(self.checkout, range(self.CHECKOUTS)))
 
-        result = send_telegram_message(self.test_message)
+        self.assertEqual(sum(results), self.INVENTORY)
+        self.assertEqual(copies_on_shelf([self.book.id]), {self.book.id: 0})
+        self.assertEqual(
+            Borrowing.objects.filter(book=self.book).count(), self.INVENTORY
+        )
 
-        self.assertTrue(result)
-        mock_post.assert_called_once_with(
-            f"https://api.telegram.org/bot{self.test_token}/sendMessage",
-            json={
-                "chat_id": self.test_chat_id,
-                "text": self.test_message,
-                "parse_mode": "HTML",
-            },
+    def test_concurrent_checkouts_on_shards_never_oversell(self):
+        shard_inventory(self.book.id, 4)
+
+        self.test_concurrent_checkouts_never_oversell()
+        self.assertEqual(
+            sum(self.book.inventory_shards.values_list("inventory", flat=True)),
+            0,
         )
 
-    @patch("requests.post")
-    def test_send_telegram_message_http_error(self, mock_post):
-        mock_response = MagicMock()
-        mock_response.status_code = 401
-        mock_response.raise_for_status.side_effect = requests.exceptions.\
-            HTTPError("Bad request")
-        mock_post.return_value = mock_response
 
-        result = send_telegram_message(self.test_message)
+class ShardedInventoryTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.sharded, self.single = Book.objects.bulk_create(
+            Book(
+                title=title,
+                author="Author",
+                cover=Book.SOFT,
+                inventory=10,
+                daily_fee=1.50,
+            )
+            for title in ("Bestseller", "Backlist")
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "shard_inventory", str(self.sharded.id), "--shards", "4",
+                stdout=StringIO(),
+            )
 
-        self.assertFalse(result)
-        mock_post.assert_called_once()
+    def shards(self):
+        return list(
+            self.sharded.inventory_shards.values_list("inventory", flat=True)
+        )
 
-    @patch("requests.post")
-    def test_send_telegram_message_request_exception(self, mock_post):
-        mock_post.side_effect = requests.exceptions.RequestException(
-            "Network error"
+    def test_inventory_is_spread_over_shards(self):
+        self.assertEqual(self.shards(), [3, 3, 2, 2])
+        self.sharded.refresh_from_db()
+        self.assertEqual(self.sharded.inventory, 10)
+
+    def test_copies_are_taken_from_shards_without_writing_book_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(10):
+                self.assertTrue(take_copy(self.sharded.id))
+            self.assertFalse(take_copy(self.sharded.id))
+            release_copy(self.sharded.id)
+
+        self.assertEqual(sum(self.shards()), 1)
+        self.sharded.refresh_from_db()
+        self.assertEqual(self.sharded.inventory, 10)
+        response = self.client.get(
+            reverse("books:book-availability"), {"ids": self.sharded.id}
         )
+        self.assertEqual(response.data[0]["inventory"], 1)
 
-        result = send_telegram_message(self.test_message)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("refresh_inventory", stdout=StringIO())
+        response = self.client.get(
+            reverse("books:book-detail", args=[self.sharded.id])
+        )
+        self.assertEqual(response.data["inventory"], 1)
 
-        self.assertFalse(result)
-        mock_post.assert_called_once()
+    def test_checkout_reads_shards_behind_outdated_total(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            take_copies({self.sharded.id: 10})
+            call_command("refresh_inventory", stdout=StringIO())
+            release_copy(self.sharded.id)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.post(
+            reverse("borrowings:borrowings"),
+            {
+                "book": self.sharded.id,
+                "borrow_date": "2025-01-01",
+                "expected_return_date": "2025-01-08",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(sum(self.shards()), 0)
+
+    def test_batch_checkout_mixes_sharded_and_single_row_books(self):
+        self.client.force_authenticate(self.user)
+        payload = {
+            "books": [self.sharded.id] * 6 + [self.single.id],
+            "borrow_date": "2025-01-01",
+            "expected_return_date": "2025-01-08",
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("borrowings:borrowing-checkout"), payload,
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("borrowings:borrowing-checkout"), payload,
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data["books"]), [str(self.sharded.id)])
+        self.assertEqual(
+            copies_on_shelf([self.sharded.id, self.single.id]),
+            {self.sharded.id: 4, self.single.id: 9},
+        )
+
+    def test_returns_go_back_to_shards(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            take_copies({self.sharded.id: 2, self.single.id: 1})
+            release_copies({self.sharded.id: 2, self.single.id: 1})
+
+        self.assertEqual(sum(self.shards()), 10)
+        self.assertEqual(
+            set(Book.objects.values_list("inventory", flat=True)), {10}
+        )
+
+    def test_inventory_edits_are_spread_over_shards(self):
+        admin_user = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="password"
+        )
+        self.client.force_authenticate(admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("books:book-detail", args=[self.sharded.id]),
+                {"inventory": 20},
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.shards(), [5, 5, 5, 5])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command(
+                "shard_inventory", str(self.sharded.id), "--shards", "4",
+                stdout=StringIO(),
+            )
+            self.assertTrue(take_copy(self.sharded.id))
+        self.assertEqual(
+            copies_on_shelf([self.sharded.id]), {self.sharded.id: 19}
+        )
+
+    def test_unsharding_moves_inventory_back(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            take_copy(self.sharded.id)
+            shard_inventory(self.sharded.id, 0)
+
+        self.assertEqual(self.shards(), [])
+        self.assertTrue(take_copy(self.sharded.id))
+        self.sharded.refresh_from_db()
+        self.assertEqual(self.sharded.inventory, 8)
+
+
+class HoldTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.users = [
+            get_user_model().objects.create_user(
+                email=f"user{number}@example.com", password="password"
+            )
+            for number in range(3)
+        ]
+        self.book = Book.objects.create(
+            title="Sample Book",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=0,
+            daily_fee=1.50,
+        )
+        self.borrowing = Borrowing.objects.create(
+            book=self.book,
+            user=self.users[0],
+            borrow_date=timezone.now(),
+            expected_return_date=timezone.now() + timezone.timedelta(days=7),
+        )
+
+    def place_hold(self, user, book=None):
+        self.client.force_authenticate(user)
+        return self.client.post(
+            reverse("borrowings:holds"),
+            {"book": (book or self.book).id},
+            format="json",
+        )
+
+    def return_borrowing(self):
+        self.client.force_authenticate(self.users[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse(
+                    "borrowings:borrowing-return", args=[self.borrowing.id]
+                )
+            )
+
+    def checkout(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(
+            reverse("borrowings:borrowings"),
+            {
+                "book": self.book.id,
+                "borrow_date": "2025-01-01",
+                "expected_return_date": "2025-01-08",
+            },
+        )
+
+    def statuses(self):
+        return list(
+            Hold.objects.order_by("id").values_list("status", flat=True)
+        )
+
+    def test_holds_queue_in_order(self):
+        first = self.place_hold(self.users[1])
+        second = self.place_hold(self.users[2])
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data["status"], Hold.WAITING)
+        self.assertEqual(first.data["position"], 1)
+        self.assertEqual(second.data["position"], 2)
+        response = self.client.get(reverse("borrowings:holds"))
+        self.assertEqual([hold["position"] for hold in response.data], [2])
+
+    def test_hold_rejected_for_available_book_or_twice(self):
+        available = Book.objects.create(
+            title="On The Shelf", author="Author", inventory=1, daily_fee=1
+        )
+        self.assertEqual(
+            self.place_hold(self.users[1], available).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.place_hold(self.users[1])
+        self.assertEqual(
+            self.place_hold(self.users[1]).status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_return_makes_first_hold_ready_instead_of_shelving(self):
+        self.place_hold(self.users[1])
+        self.place_hold(self.users[2])
+
+        response = self.return_borrowing()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 0)
+        self.assertEqual(self.statuses(), [Hold.READY, Hold.WAITING])
+        self.assertIsNotNone(Hold.objects.order_by("id").first().ready_at)
+        notification = Notification.objects.get()
+        self.assertIn("user1@example.com", notification.message)
+
+    def test_ready_hold_holder_can_borrow(self):
+        self.place_hold(self.users[1])
+        self.return_borrowing()
+
+        response = self.checkout(self.users[2])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.checkout(self.users[1])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.statuses(), [Hold.FULFILLED])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 0)
+
+    def test_hold_handovers_refresh_availability(self):
+        def active_loans():
+            response = self.client.get(
+                reverse("books:book-availability"), {"ids": self.book.id}
+            )
+            return response.data[0]["active_loans"]
+
+        self.place_hold(self.users[1])
+        self.assertEqual(active_loans(), 1)
+
+        self.return_borrowing()
+        self.assertEqual(active_loans(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.checkout(self.users[1])
+        self.assertEqual(active_loans(), 1)
+
+    def test_batch_checkout_fulfils_ready_hold(self):
+        other = Book.objects.create(
+            title="On The Shelf", author="Author", inventory=1, daily_fee=1
+        )
+        self.place_hold(self.users[1])
+        self.return_borrowing()
+
+        self.client.force_authenticate(self.users[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("borrowings:borrowing-checkout"),
+                {
+                    "books": [self.book.id, other.id],
+                    "borrow_date": "2025-01-01",
+                    "expected_return_date": "2025-01-08",
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.statuses(), [Hold.FULFILLED])
+        self.assertEqual(
+            dict(Book.objects.values_list("title", "inventory")),
+            {"Sample Book": 0, "On The Shelf": 0},
+        )
+
+    def test_cancelling_ready_hold_passes_copy_on(self):
+        first = self.place_hold(self.users[1]).data["id"]
+        self.place_hold(self.users[2])
+        self.return_borrowing()
+
+        self.client.force_authenticate(self.users[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(
+                reverse("borrowings:hold-detail", args=[first])
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.statuses(), [Hold.CANCELLED, Hold.READY])
+
+    def test_holds_of_other_users_are_hidden(self):
+        hold = self.place_hold(self.users[1]).data["id"]
+        self.client.force_authenticate(self.users[2])
+        response = self.client.delete(
+            reverse("borrowings:hold-detail", args=[hold])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_expire_holds_command_passes_unclaimed_copies_on(self):
+        self.place_hold(self.users[1])
+        self.place_hold(self.users[2])
+        self.return_borrowing()
+        Hold.objects.filter(status=Hold.READY).update(
+            expires_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("expire_holds", stdout=out)
+
+        self.assertIn("Expired 1 ready and 0 waiting holds", out.getvalue())
+        self.assertEqual(self.statuses(), [Hold.EXPIRED, Hold.READY])
+
+        Hold.objects.filter(status=Hold.READY).update(
+            expires_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("expire_holds", stdout=StringIO())
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.inventory, 1)
+
+
+def throttle_rates(**rates):
+    return override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                **rates,
+            },
+        }
+    )
+
+
+@throttle_rates(borrowings="2/min", books="3/min", auth="1/min")
+class ThrottlingTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.book = Book.objects.create(
+            title="Sample Book",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=10,
+            daily_fee=1.50,
+        )
+
+    def checkout(self):
+        return self.client.post(
+            reverse("borrowings:borrowings"),
+            {
+                "book": self.book.id,
+                "borrow_date": "2025-01-01",
+                "expected_return_date": "2025-01-08",
+            },
+        )
+
+    def test_checkouts_are_throttled_per_user_after_burst(self):
+        self.client.force_authenticate(self.user)
+
+        self.assertEqual(self.checkout().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.checkout().status_code, status.HTTP_201_CREATED)
+        response = self.checkout()
+
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(
+            self.client.get(reverse("borrowings:borrowings")).status_code,
+            status.HTTP_200_OK,
+        )
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="password"
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.checkout().status_code, status.HTTP_201_CREATED)
+
+    def test_tokens_refill_over_time(self):
+        self.client.force_authenticate(self.user)
+        clock = patch.object(ScopedTokenBucketThrottle, "timer")
+        with clock as timer:
+            timer.return_value = 1_000.0
+            self.checkout()
+            self.checkout()
+            self.assertEqual(
+                self.checkout().status_code,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+        with clock as timer:
+            timer.return_value = 1_030.0
+            self.assertEqual(
+                self.checkout().status_code, status.HTTP_201_CREATED
+            )
+            self.assertEqual(
+                self.checkout().status_code,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+
+    def test_anonymous_book_list_and_login_are_throttled_per_ip(self):
+        for _ in range(3):
+            response = self.client.get(reverse("books:book-list"))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse("books:book-list"))
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        response = self.client.get(
+            reverse("books:book-list"), REMOTE_ADDR="10.0.0.2"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        login = {"email": "user@example.com", "password": "password"}
+        url = reverse("users:token_obtain_pair")
+        self.assertEqual(
+            self.client.post(url, login).status_code, status.HTTP_200_OK
+        )
+        response = self.client.post(url, login)
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(response["Retry-After"], "60")
+
+    def test_file_cache_backend(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased."
+                               "FileBasedCache",
+                    "LOCATION": directory,
+                }
+            }
+        ):
+            self.client.force_authenticate(self.user)
+            statuses = [self.checkout().status_code for _ in range(3)]
+
+        self.assertEqual(
+            statuses,
+            [
+                status.HTTP_201_CREATED,
+                status.HTTP_201_CREATED,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+            ],
+        )
+
+
+@override_settings(
+    TELEGRAM_BOT_TOKEN="123456:test_token",
+    TELEGRAM_CHAT_ID="123456789",
+    TELEGRAM_API_URL="https://api.telegram.org",
+    TELEGRAM_TIMEOUT=5,
+)
+class TelegramBotTest(SimpleTestCase):
+    def setUp(self):
+        self.test_message = "Test Message"
+        self.test_token = "123456:test_token"
+        self.test_chat_id = "123456789"
+
+    @patch("requests.Session.post")
+    def test_send_telegram_message_success(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.raise_for_status.return_value = None
+        mock_post.return_value = mock_response
+
+        result = send_telegram_message(self.test_message)
+
+        self.assertTrue(result)
+        mock_post.assert_called_once_with(
+            f"https://api.telegram.org/bot{self.test_token}/sendMessage",
+            json={
+                "chat_id": self.test_chat_id,
+                "text": self.test_message,
+                "parse_mode": "HTML",
+            },
+            timeout=5,
+        )
+
+    @patch("requests.Session.post")
+    def test_send_telegram_message_http_error(self, mock_post):
+        mock_response = MagicMock()
+        mock_response.status_code = 401
+        mock_response.raise_for_status.side_effect = requests.exceptions.\
+            HTTPError("Bad request")
+        mock_post.return_value = mock_response
+
+        result = send_telegram_message(self.test_message)
+
+        self.assertFalse(result)
+        mock_post.assert_called_once()
+
+    @patch("requests.Session.post")
+    def test_send_telegram_message_request_exception(self, mock_post):
+        mock_post.side_effect = requests.exceptions.RequestException(
+            "Network error"
+        )
+
+        result = send_telegram_message(self.test_message)
+
+        self.assertFalse(result)
+        mock_post.assert_called_once()
+
+
+class ReportOverdueCommandTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.book = Book.objects.create(
+            title="Sample Book",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=1,
+            daily_fee=1.50,
+        )
+        self.overdue_short = self.create_borrowing("2025-01-08")
+        self.overdue_long = self.create_borrowing("2024-12-01")
+        self.create_borrowing("2025-01-12")
+        self.create_borrowing("2025-01-08", actual_return_date="2025-01-09")
+
+    def create_borrowing(self, expected_return_date, **kwargs):
+        return Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            borrow_date="2024-11-20",
+            expected_return_date=expected_return_date,
+            **kwargs,
+        )
+
+    def report(self, report_format):
+        output = StringIO()
+        call_command(
+            "report_overdue",
+            "--format", report_format,
+            "--date", "2025-01-10",
+            "--chunk-size", "1",
+            stdout=output,
+        )
+        return output.getvalue()
+
+    def test_ndjson_report_computes_days_and_fees(self):
+        rows = [json.loads(line) for line in self.report("ndjson").splitlines()]
+
+        self.assertEqual(
+            [(row["id"], row["overdue_days"], row["overdue_fee"])
+             for row in rows],
+            [
+                (self.overdue_long.id, 40, "60.00"),
+                (self.overdue_short.id, 2, "3.00"),
+            ],
+        )
+        self.assertEqual(rows[0]["user_email"], self.user.email)
+
+    def test_csv_report_has_header(self):
+        lines = self.report("csv").splitlines()
+
+        self.assertEqual(lines[0].split(",")[0], "id")
+        self.assertEqual(len(lines), 3)
+
+    def test_summary_report_groups_by_overdue_days(self):
+        summary = self.report("summary")
+
+        self.assertRegex(summary, r"1-7 days\s+1\s+3.00")
+        self.assertRegex(summary, r"31\+ days\s+1\s+60.00")
+        self.assertRegex(summary, r"Total\s+2\s+63.00")
+
+
+class ExportBorrowingsTest(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.book = Book.objects.create(
+            title="Sample Book",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=1,
+            daily_fee=1.50,
+        )
+        self.returned = Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            borrow_date="2025-01-01",
+            expected_return_date="2025-01-08",
+            actual_return_date="2025-01-05",
+        )
+        self.active = Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            borrow_date="2025-01-02",
+            expected_return_date="2025-01-09",
+        )
+
+    def test_ndjson_command_joins_user_and_book(self):
+        output = StringIO()
+        call_command(
+            "export_borrowings",
+            "--format", "ndjson",
+            "--chunk-size", "1",
+            stdout=output,
+        )
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+
+        self.assertEqual(
+            [(row["id"], row["actual_return_date"]) for row in rows],
+            [(self.returned.id, "2025-01-05"), (self.active.id, None)],
+        )
+        self.assertEqual(rows[0]["user_email"], self.user.email)
+        self.assertEqual(rows[0]["book_title"], self.book.title)
+
+    def test_gzip_command_needs_output(self):
+        with self.assertRaises(CommandError):
+            call_command("export_borrowings", "--gzip")
+
+    def test_csv_endpoint_is_staff_only(self):
+        url = reverse("borrowings:borrowing-export")
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url, {"file_format": "csv"})
+
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertTrue(lines[0].startswith("id,user,user_email,book,"))
+        self.assertEqual(len(lines), 3)
+
+
+class FeeBalanceTest(APITestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.book = Book.objects.create(
+            title="Sample Book",
+            author="Author",
+            cover=Book.SOFT,
+            inventory=5,
+            daily_fee=1.50,
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def days_ago(self, days):
+        return self.today - timezone.timedelta(days=days)
+
+    def balance(self):
+        return FeeBalance.objects.get(user=self.user)
+
+    def test_checkout_charges_rental_fee(self):
+        response = self.client.post(
+            reverse("borrowings:borrowing-checkout"),
+            {
+                "books": [self.book.id, self.book.id],
+                "borrow_date": self.today,
+                "expected_return_date": self.today + timezone.timedelta(days=4),
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.balance().rental_fees, Decimal("12.00"))
+
+    def test_accrual_and_late_return_move_fees_to_overdue(self):
+        borrowing = Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            borrow_date=self.days_ago(10),
+            expected_return_date=self.days_ago(4),
+        )
+
+        call_command("accrue_fees", "--date", str(self.days_ago(1)),
+                     stdout=StringIO())
+        balance = self.balance()
+        self.assertEqual(balance.accrued_overdue_fees, Decimal("4.50"))
+        self.assertEqual(balance.accrued_on, self.days_ago(1))
+
+        response = self.client.post(
+            reverse("borrowings:borrowing-return", args=[borrowing.id])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        balance = self.balance()
+        self.assertEqual(balance.overdue_fees, Decimal("6.00"))
+        self.assertEqual(balance.accrued_overdue_fees, Decimal("0.00"))
+
+    def test_me_shows_balance(self):
+        FeeBalance.objects.create(
+            user=self.user, rental_fees=3, overdue_fees=1.5
+        )
+
+        response = self.client.get(reverse("users:me"))
+
+        self.assertEqual(response.data["fee_balance"]["total"], "4.50")
+
+    def test_reconcile_reports_and_fixes_drift(self):
+        Borrowing.objects.create(
+            book=self.book,
+            user=self.user,
+            borrow_date=self.days_ago(10),
+            expected_return_date=self.days_ago(4),
+            actual_return_date=self.days_ago(2),
+        )
+        output = StringIO()
+
+        call_command("accrue_fees", "--reconcile", stdout=output)
+        self.assertIn(
+            f"user {self.user.id}: rental_fees is 0.00, expected 9.00",
+            output.getvalue(),
+        )
+        self.assertIn("overdue_fees is 0.00, expected 3.00", output.getvalue())
+        self.assertFalse(FeeBalance.objects.exists())
+
+        call_command("accrue_fees", "--reconcile", "--fix", stdout=output)
+        balance = self.balance()
+        self.assertEqual(balance.rental_fees, Decimal("9.00"))
+        self.assertEqual(balance.overdue_fees, Decimal("3.00"))
+
+        output = StringIO()
+        call_command("accrue_fees", "--reconcile", stdout=output)
+        self.assertIn("Balances are in sync", output.getvalue())
+
+
+class CirculationRollupTest(QueryBudgetMixin, APITestCase):
+    STATS_BUDGET = 2
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@example.com", password="password"
+        )
+        self.hobbit, self.silmarillion, self.emma = Book.objects.bulk_create(
+            Book(
+                title=title,
+                author=author,
+                cover=Book.SOFT,
+                inventory=5,
+                daily_fee=1.50,
+            )
+            for title, author in (
+                ("The Hobbit", "Tolkien"),
+                ("The Silmarillion", "Tolkien"),
+                ("Emma", "Austen"),
+            )
+        )
+        self.late = self.create_borrowing(self.hobbit, 1, 3)
+        self.create_borrowing(self.silmarillion, 2, 10, returned=4)
+        self.create_borrowing(self.emma, 2, 3, returned=6)
+
+    def create_borrowing(self, book, borrowed, expected, returned=None):
+        return Borrowing.objects.create(
+            book=book,
+            user=self.admin,
+            borrow_date=self.day(borrowed),
+            expected_return_date=self.day(expected),
+            actual_return_date=returned and self.day(returned),
+        )
+
+    def day(self, number):
+        return timezone.datetime(2025, 1, number).date()
+
+    def rollups(self, book):
+        return [
+            (
+                rollup.date.day,
+                rollup.checkout_count,
+                rollup.return_count,
+                rollup.active_count,
+                rollup.overdue_count,
+            )
+            for rollup in DailyCirculation.objects.filter(book=book)
+        ]
+
+    def test_rollups_count_circulation_per_day(self):
+        refresh_rollups(today=self.day(5))
+
+        self.assertEqual(
+            self.rollups(self.hobbit),
+            [(1, 1, 0, 1, 0), (2, 0, 0, 1, 0), (3, 0, 0, 1, 0),
+             (4, 0, 0, 1, 1), (5, 0, 0, 1, 1)],
+        )
+        self.assertEqual(
+            self.rollups(self.silmarillion),
+            [(2, 1, 0, 1, 0), (3, 0, 0, 1, 0), (4, 0, 1, 0, 0)],
+        )
+
+    def test_incremental_run_matches_full_rebuild(self):
+        Borrowing.objects.update(
+            updated_at=timezone.now() - timezone.timedelta(days=1)
+        )
+        refresh_rollups(today=self.day(5))
+        self.late.actual_return_date = self.day(5)
+        self.late.save()
+
+        result = refresh_rollups(today=self.day(6))
+
+        self.assertEqual(result["start"], self.day(6))
+        self.assertEqual(result["books"], 1)
+        self.assertEqual(self.rollups(self.hobbit)[-1], (5, 0, 1, 0, 0))
+        incremental = [self.rollups(book) for book in Book.objects.all()]
+        refresh_rollups(today=self.day(6), full=True)
+        self.assertEqual(
+            [self.rollups(book) for book in Book.objects.all()],
+            incremental,
+        )
+
+    def test_stats_grouped_by_author(self):
+        refresh_rollups(today=self.day(5))
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.assertEndpointQueryBudget(
+            self.STATS_BUDGET,
+            "get",
+            reverse("borrowings:borrowing-stats"),
+            data={
+                "date_from": self.day(2),
+                "date_to": self.day(4),
+                "group_by": "author",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["processed_to"], self.day(5))
+        self.assertEqual(
+            [
+                (row["date"], row["author"], row["checkouts"], row["active"])
+                for row in response.data["results"]
+            ],
+            [
+                ("2025-01-02", "Austen", 1, 1),
+                ("2025-01-02", "Tolkien", 1, 2),
+                ("2025-01-03", "Austen", 0, 1),
+                ("2025-01-03", "Tolkien", 0, 2),
+                ("2025-01-04", "Austen", 0, 1),
+                ("2025-01-04", "Tolkien", 0, 1),
+            ],
+        )
+
+    def test_stats_rejects_reversed_range(self):
+        self.client.force_authenticate(user=self.admin)
+
+        response = self.client.get(
+            reverse("borrowings:borrowing-stats"),
+            {"date_from": self.day(5), "date_to": self.day(1)},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stats_require_staff(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="password"
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self.client.get(reverse("borrowings:borrowing-stats"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self.server.received.append(
+            (self.path, json.loads(self.rfile.read(length)))
+        )
+        status_code = 200
+        if self.server.status_codes:
+            status_code = self.server.status_codes.pop(0)
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({"ok": status_code == 200}).encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DispatchNotificationsTest(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), FakeTelegramHandler
+        )
+        self.server.received = []
+        self.server.status_codes = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        host, port = self.server.server_address
+        settings_override = override_settings(
+            TELEGRAM_BOT_TOKEN="123456:test_token",
+            TELEGRAM_CHAT_ID="123456789",
+            TELEGRAM_API_URL=f"http://{host}:{port}",
+            TELEGRAM_TIMEOUT=5,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def dispatch(self, *args):
+        call_command("dispatch_notifications", "--once", *args, stdout=StringIO())
+
+    def test_pending_notifications_are_sent_in_order(self):
+        for number in range(3):
+            enqueue_notification(f"Message {number}")
+
+        self.dispatch("--batch-size", "2")
+
+        self.assertEqual(
+            [payload["text"] for _, payload in self.server.received],
+            ["Message 0", "Message 1", "Message 2"],
+        )
+        self.assertEqual(
+            self.server.received[0][0], "/bot123456:test_token/sendMessage"
+        )
+        self.assertFalse(
+            Notification.objects.exclude(status=Notification.SENT).exists()
+        )
+
+    def test_failed_notification_is_retried_later(self):
+        notification = enqueue_notification("Message")
+        self.server.status_codes = [500]
+
+        self.dispatch("--backoff", "60")
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.PENDING)
+        self.assertEqual(notification.attempts, 1)
+        self.assertGreater(notification.next_attempt_at, timezone.now())
+        self.assertIn("500", notification.last_error)
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_notification_is_dead_lettered_after_max_attempts(self):
+        notification = enqueue_notification("Message")
+        self.server.status_codes = [500, 500]
+
+        self.dispatch("--max-attempts", "2", "--backoff", "0")
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, Notification.DEAD)
+        self.assertEqual(notification.attempts, 2)
+        self.assertEqual(len(self.server.received), 2)
@@ -6,6 +6,32 @@ app_name = "borrowings"
 
 urlpatterns = [
     path("", views.BorrowingListView.as_view(), name="borrowings"),
+    path(
+        "checkout/",
+        views.BorrowingBatchCheckoutView.as_view(),
+        name="borrowing-checkout",
+    ),
+    path(
+        "return/",
+        views.BorrowingBulkReturnView.as_view(),
+        name="borrowing-bulk-return",
+    ),
+    path(
+        "stats/",
+        views.BorrowingStatsView.as_view(),
+        name="borrowing-stats",
+    ),
+    path("holds/", views.HoldListView.as_view(), name="holds"),
+    path(
+        "holds/<int:pk>/",
+        views.HoldDetailView.as_view(),
+        name="hold-detail",
+    ),
+    path(
+        "export/",
+        views.BorrowingExportView.as_view(),
+        name="borrowing-export",
+    ),
     path(
         "<int:pk>/",
         views.BorrowingDetailView.as_view(),
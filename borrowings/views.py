@@ -1,10 +1,12 @@
 from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
 from django.utils import timezone
 
 from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework import status
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
@@ -14,26 +16,51 @@ from drf_spectacular.utils import (
 )
 from drf_spectacular.types import OpenApiTypes
 
-from borrowings.models import Borrowing
+from borrowings.fees import settle_returns
+from borrowings.holds import cancel_hold, return_copies
+from borrowings.models import Borrowing, DailyCirculation, Hold, Watermark
+from borrowings.pagination import BorrowingCursorPagination
+from borrowings.rollups import WATERMARK
 from borrowings.serializers import (
     BorrowingSerializer,
+    BorrowingBatchSerializer,
+    BorrowingBulkReturnSerializer,
+    BorrowingBulkReturnResultSerializer,
     BorrowingDetailSerializer,
-    BorrowingReturnSerializer
+    BorrowingReturnSerializer,
+    CirculationStatsQuerySerializer,
+    CirculationStatsSerializer,
+    HoldSerializer,
+    borrowing_rows,
 )
+from city_library_api.export import ExportView
+from city_library_api.serialization import RowListMixin
+from city_library_api.throttling import ScopedTokenBucketThrottle
 
 
-class BorrowingListView(generics.ListCreateAPIView):
+class BorrowingListView(RowListMixin, generics.ListCreateAPIView):
     """
     This endpoint provides a list of all borrowings.
     It allows filtering by active status and user ID.
+    The list is paginated with a cursor ordered by borrow date.
     It also allows creation of new borrowing instances.
     """
     serializer_class = BorrowingSerializer
+    row_serializer = borrowing_rows
     permission_classes = [IsAuthenticated]
+    pagination_class = BorrowingCursorPagination
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = "borrowings"
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.queryset = Borrowing.objects.all()
+        self.queryset = Borrowing.objects.select_related("book", "user")
+
+    def get_throttles(self):
+        # Only checkouts are throttled, listing is cheap.
+        if self.request.method != "POST":
+            return []
+        return super().get_throttles()
 
     @extend_schema(
         parameters=[
@@ -79,24 +106,29 @@ class BorrowingListView(generics.ListCreateAPIView):
                 examples=[
                     OpenApiExample(
                         name="Success response",
-                        value=[
-                            {
-                                "id": 1,
-                                "book": {
+                        value={
+                            "next": "http://api.example.org/api/borrowings/"
+                                    "?cursor=cD0yMDIzLTAxLTAxJTdDMQ%3D%3D",
+                            "previous": None,
+                            "results": [
+                                {
                                     "id": 1,
-                                    "title": "Sample Book",
-                                    "author": "Author",
-                                    "cover": "HARD",
-                                    "inventory": 1,
-                                    "daily_fee": 1.50,
-                                },
-                                "user_email": "user@example.com",
-                                "borrow_date": "2023-01-01",
-                                "expected_return_date": "2023-01-08",
-                                "actual_return_date": None,
-                                "is_active": True
-                            }
-                        ]
+                                    "book": {
+                                        "id": 1,
+                                        "title": "Sample Book",
+                                        "author": "Author",
+                                        "cover": "HARD",
+                                        "inventory": 1,
+                                        "daily_fee": 1.50,
+                                    },
+                                    "user_email": "user@example.com",
+                                    "borrow_date": "2023-01-01",
+                                    "expected_return_date": "2023-01-08",
+                                    "actual_return_date": None,
+                                    "is_active": True
+                                }
+                            ]
+                        }
                     )
                 ]
             ),
@@ -197,14 +229,125 @@ class BorrowingListView(generics.ListCreateAPIView):
         return queryset.filter(user=self.request.user)
 
 
+class BorrowingBatchCheckoutView(generics.GenericAPIView):
+    """
+    This endpoint checks out several books for the current user in one
+    transaction. Either all borrowings are created or none of them.
+    """
+    serializer_class = BorrowingBatchSerializer
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedTokenBucketThrottle]
+    throttle_scope = "borrowings"
+
+    @extend_schema(
+        request=OpenApiRequest(
+            request=BorrowingBatchSerializer,
+            examples=[
+                OpenApiExample(
+                    name="Batch checkout example",
+                    value={
+                        "books": [1, 2, 3],
+                        "borrow_date": "2023-01-01",
+                        "expected_return_date": "2023-01-08"
+                    }
+                )
+            ]
+        ),
+        responses={
+            201: OpenApiResponse(
+                description="Borrowings created successfully",
+                response=BorrowingSerializer(many=True),
+            ),
+            400: OpenApiResponse(
+                description="Some of the books cannot be borrowed",
+                examples=[
+                    OpenApiExample(
+                        name="Unavailable books response",
+                        value={
+                            "books": {
+                                "2": ["Book is not available"],
+                                "7": ["Book does not exist"]
+                            }
+                        }
+                    )
+                ]
+            ),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        borrowings = serializer.save()
+        return Response(
+            BorrowingSerializer(borrowings, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class BorrowingBulkReturnView(generics.GenericAPIView):
+    """
+    This endpoint returns many borrowings at once, e.g. when the drop box
+    is processed. Available only for staff.
+    """
+    serializer_class = BorrowingBulkReturnSerializer
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        request=OpenApiRequest(
+            request=BorrowingBulkReturnSerializer,
+            examples=[
+                OpenApiExample(
+                    name="Bulk return example",
+                    value={"borrowings": [1, 2, 3]}
+                )
+            ]
+        ),
+        responses={
+            200: OpenApiResponse(
+                description="Outcome for every submitted borrowing",
+                response=BorrowingBulkReturnResultSerializer(many=True),
+                examples=[
+                    OpenApiExample(
+                        name="Success response",
+                        value=[
+                            {
+                                "id": 1,
+                                "status": "returned",
+                                "actual_return_date": "2023-01-08"
+                            },
+                            {
+                                "id": 2,
+                                "status": "already_returned",
+                                "actual_return_date": "2023-01-05"
+                            },
+                            {
+                                "id": 3,
+                                "status": "not_found",
+                                "actual_return_date": None
+                            }
+                        ]
+                    )
+                ]
+            ),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response(
+            BorrowingBulkReturnResultSerializer(results, many=True).data
+        )
+
+
 class BorrowingDetailView(generics.RetrieveAPIView):
-    queryset = Borrowing.objects.all()
+    queryset = Borrowing.objects.select_related("book", "user")
     serializer_class = BorrowingDetailSerializer
     permission_classes = [IsAuthenticated]
 
 
 class BorrowingReturnView(generics.GenericAPIView):
-    queryset = Borrowing.objects.all()
+    queryset = Borrowing.objects.select_related("book", "user")
     serializer_class = BorrowingReturnSerializer
     permission_classes = [IsAuthenticated]
 
@@ -213,12 +356,208 @@ class BorrowingReturnView(generics.GenericAPIView):
         serializer = self.get_serializer(borrowing)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-    def post(self, request, pk, forma=None):
+    def post(self, request, *args, **kwargs):
+        borrowing = self.get_object()
+
+        today = timezone.now().date()
+
         with transaction.atomic():
-            borrowing = self.queryset.get(pk=pk)
-            borrowing.actual_return_date = timezone.now().date()
-            borrowing.book.inventory += 1
-            borrowing.book.save()
-            borrowing.save()
-        serializer = self.get_serializer(borrowing)
+            returned = Borrowing.objects.filter(
+                pk=borrowing.pk, actual_return_date__isnull=True
+            ).update(actual_return_date=today, updated_at=timezone.now())
+            if returned:
+                return_copies({borrowing.book_id: 1})
+                settle_returns(
+                    [
+                        (
+                            borrowing.user_id,
+                            borrowing.expected_return_date,
+                            borrowing.book.daily_fee,
+                        )
+                    ],
+                    today,
+                )
+
+        if not returned:
+            raise ValidationError("Borrowing has already been returned")
+
+        serializer = self.get_serializer(self.get_object())
         return Response(serializer.data)
+
+
+class HoldQuerysetMixin:
+    """Holds of the user, or of everyone for superusers."""
+
+    def get_queryset(self):
+        ahead = (
+            Hold.objects.filter(
+                book=OuterRef("book"),
+                status=Hold.WAITING,
+                id__lte=OuterRef("id"),
+            )
+            .order_by()
+            .values("book")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        queryset = Hold.objects.annotate(position=Subquery(ahead))
+        if self.request.user.is_superuser:
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+
+class HoldListView(HoldQuerysetMixin, generics.ListCreateAPIView):
+    """
+    This endpoint lists the holds of the user and places new ones on books
+    without copies on the shelf. Holds wait in FIFO order, and the first
+    one gets the next returned copy, kept for it until it is borrowed or
+    the hold expires.
+    """
+    serializer_class = HoldSerializer
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=OpenApiRequest(
+            request=HoldSerializer,
+            examples=[
+                OpenApiExample(
+                    name="Hold creation example",
+                    value={"book": 1}
+                )
+            ]
+        ),
+        responses={
+            201: OpenApiResponse(
+                description="Hold placed in the queue of the book",
+                response=HoldSerializer,
+                examples=[
+                    OpenApiExample(
+                        name="Success response",
+                        value={
+                            "id": 1,
+                            "book": 1,
+                            "status": "WAITING",
+                            "position": 3,
+                            "created_at": "2023-01-01T10:00:00Z",
+                            "ready_at": None,
+                            "expires_at": "2023-04-01T10:00:00Z"
+                        }
+                    )
+                ]
+            ),
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
+class HoldDetailView(HoldQuerysetMixin, generics.RetrieveDestroyAPIView):
+    """
+    This endpoint shows a hold, or cancels it. The copy kept for a ready
+    hold goes to the next hold in the queue.
+    """
+    serializer_class = HoldSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_destroy(self, instance):
+        cancel_hold(instance)
+
+
+class BorrowingStatsView(generics.GenericAPIView):
+    """
+    This endpoint provides daily checkouts, returns, active and overdue
+    loans for a date range, read from the rollups built by the
+    ``rollup_circulation`` command. Available only for staff.
+    """
+    serializer_class = CirculationStatsQuerySerializer
+    permission_classes = [IsAdminUser]
+
+    GROUP_FIELDS = {
+        CirculationStatsQuerySerializer.DAY: (),
+        CirculationStatsQuerySerializer.BOOK: (
+            "book",
+            "book__title",
+            "book__author",
+        ),
+        CirculationStatsQuerySerializer.AUTHOR: ("book__author",),
+    }
+
+    @extend_schema(
+        parameters=[CirculationStatsQuerySerializer],
+        responses={
+            200: OpenApiResponse(
+                description="Daily circulation of the requested range",
+                response=CirculationStatsSerializer(many=True),
+                examples=[
+                    OpenApiExample(
+                        name="Success response",
+                        value={
+                            "processed_to": "2023-01-31",
+                            "results": [
+                                {
+                                    "date": "2023-01-01",
+                                    "author": "Author",
+                                    "checkouts": 4,
+                                    "returns": 1,
+                                    "active": 12,
+                                    "overdue": 2
+                                }
+                            ]
+                        }
+                    )
+                ]
+            ),
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        rollups = DailyCirculation.objects.filter(
+            date__range=(params["date_from"], params["date_to"])
+        )
+        if "book" in params:
+            rollups = rollups.filter(book=params["book"])
+        if "author" in params:
+            rollups = rollups.filter(book__author=params["author"])
+
+        group_fields = self.GROUP_FIELDS[params["group_by"]]
+        rows = (
+            rollups.values("date", *group_fields)
+            .annotate(
+                checkouts=Sum("checkout_count"),
+                returns=Sum("return_count"),
+                active=Sum("active_count"),
+                overdue=Sum("overdue_count"),
+            )
+            .order_by("date", *group_fields)
+        )
+        watermark = Watermark.objects.filter(name=WATERMARK).first()
+
+        return Response(
+            {
+                "processed_to": watermark and watermark.processed_to,
+                "results": CirculationStatsSerializer(rows, many=True).data,
+            }
+        )
+
+
+class BorrowingExportView(ExportView):
+    """
+    This endpoint streams every borrowing as a CSV or NDJSON file, for
+    audits. Available only for staff.
+    """
+    queryset = Borrowing.objects.order_by("id")
+    filename = "borrowings"
+    export_fields = {
+        "id": "id",
+        "user": "user_id",
+        "user_email": "user__email",
+        "book": "book_id",
+        "book_title": "book__title",
+        "borrow_date": "borrow_date",
+        "expected_return_date": "expected_return_date",
+        "actual_return_date": "actual_return_date",
+        "updated_at": "updated_at",
+    }
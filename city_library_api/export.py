@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand, CommandError
+from django.http import StreamingHttpResponse
+
+from rest_framework import generics, serializers
+from rest_framework.permissions import IsAdminUser
+from drf_spectacular.utils import OpenApiResponse, extend_schema
+from drf_spectacular.types import OpenApiTypes
+
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+# Rows fetched from the database cursor and encoded together.
+CHUNK_SIZE = 2_000
+
+
+def _csv_chunks(fields, rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for number, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if number % chunk_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(fields, rows, chunk_size):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder))
+        if len(lines) == chunk_size:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_chunks(queryset, fields, file_format, compress=False,
+                  chunk_size=CHUNK_SIZE):
+    """
+    Encode ``fields`` of every row of ``queryset`` as CSV or NDJSON, in
+    chunks of bytes. Rows are streamed from the database cursor, so
+    memory does not depend on the size of the table.
+    """
+    rows = queryset.values_list(*fields.values()).iterator(
+        chunk_size=chunk_size
+    )
+    encode = _csv_chunks if file_format == "csv" else _ndjson_chunks
+    chunks = encode(list(fields), rows, chunk_size)
+    return _gzip(chunks) if compress else chunks
+
+
+def export_response(queryset, fields, file_format, filename, compress=False):
+    """Stream an export as a file download."""
+    filename = f"{filename}.{file_format}"
+    content_type = FORMATS[file_format]
+    if compress:
+        filename += ".gz"
+        content_type = "application/gzip"
+
+    response = StreamingHttpResponse(
+        export_chunks(queryset, fields, file_format, compress),
+        content_type=content_type,
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Query parameters of the export endpoints."""
+    file_format = serializers.ChoiceField(
+        choices=tuple(FORMATS),
+        default="csv",
+        help_text="One record per line, with a header line for csv",
+    )
+    gzip = serializers.BooleanField(
+        default=False,
+        help_text="Compress the export with gzip",
+    )
+
+
+class ExportView(generics.GenericAPIView):
+    """
+    Base view streaming the rows of ``get_queryset()`` as a CSV or NDJSON
+    download. ``export_fields`` maps the exported column names to the
+    ``values_list`` lookups.
+    """
+    serializer_class = ExportQuerySerializer
+    permission_classes = [IsAdminUser]
+    export_fields = {}
+    filename = None
+
+    def perform_content_negotiation(self, request, force=False):
+        # The export ignores the renderers, whatever the client accepts.
+        return super().perform_content_negotiation(request, force=True)
+
+    @extend_schema(
+        parameters=[ExportQuerySerializer],
+        responses={
+            (200, "text/csv"): OpenApiResponse(
+                description="Every row, streamed as a file download",
+                response=OpenApiTypes.BINARY,
+            ),
+        }
+    )
+    def get(self, request, *args, **kwargs):
+        query = self.get_serializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return export_response(
+            self.get_queryset(),
+            self.export_fields,
+            query.validated_data["file_format"],
+            self.filename,
+            compress=query.validated_data["gzip"],
+        )
+
+
+class ExportCommand(BaseCommand):
+    """
+    Base command writing the rows of ``get_queryset()`` to a file or
+    stdout, with the columns of ``export_fields``.
+    """
+    export_fields = {}
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=tuple(FORMATS),
+            default="csv",
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the export to this file instead of stdout",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress the export with gzip",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Rows fetched from the database cursor at a time",
+        )
+
+    def handle(self, *args, **options):
+        if options["gzip"] and not options["output"]:
+            raise CommandError("--gzip needs --output")
+
+        chunks = export_chunks(
+            self.get_queryset(),
+            self.export_fields,
+            options["format"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending="")
@@ -0,0 +1,141 @@
+import datetime
+
+from django.core.exceptions import ImproperlyConfigured
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# Fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.PrimaryKeyRelatedField,
+)
+
+
+def _converter(field):
+    """
+    Function turning a non-null database value into the representation of
+    ``field``, ``None`` when the value is returned as is.
+    """
+    field_type = type(field)
+    if field_type in IDENTITY_FIELDS:
+        if getattr(field, "pk_field", None) is not None:
+            return field.to_representation
+        return None
+    if field_type is serializers.StringRelatedField:
+        return str
+    if field_type is serializers.DateField:
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if output_format is None:
+            return None
+        if output_format.lower() == ISO_8601:
+            return datetime.date.isoformat
+    return field.to_representation
+
+
+class RowSerializer:
+    """
+    Read-only fast path building the representation of ``serializer_class``
+    from ``.values()`` rows instead of model instances.
+
+    The fields of the serializer are compiled once into a function turning
+    a row into a dict, so rendering a list neither instantiates models nor
+    serializers. ``nested`` maps fields to the ``RowSerializer`` of a
+    related model and ``computed`` maps fields, like method fields, to a
+    ``(lookup, function)`` pair.
+    """
+
+    def __init__(self, serializer_class, nested=None, computed=None):
+        self.serializer_class = serializer_class
+        self.nested = nested or {}
+        self.computed = computed or {}
+
+        namespace = {}
+        self.lookups = []
+        body = self.expression("", namespace, self.lookups)
+        exec(f"def to_dict(row):\n    return {body}\n", namespace)
+        self.to_dict = namespace["to_dict"]
+
+    def expression(self, prefix, namespace, lookups) -> str:
+        """Source of the dict display building the representation."""
+        items = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+
+            if name in self.nested:
+                value = self.nested[name].expression(
+                    f"{prefix}{name}__", namespace, lookups
+                )
+            elif name in self.computed:
+                lookup, function = self.computed[name]
+                value = self.leaf(
+                    prefix + lookup, function, namespace, lookups,
+                    nullable=False,
+                )
+            elif not field.source_attrs or isinstance(
+                field,
+                (serializers.BaseSerializer, serializers.SerializerMethodField),
+            ):
+                raise ImproperlyConfigured(
+                    f"{self.serializer_class.__name__}.{name} needs a nested "
+                    f"or computed definition"
+                )
+            else:
+                value = self.leaf(
+                    prefix + "__".join(field.source_attrs),
+                    _converter(field),
+                    namespace,
+                    lookups,
+                )
+            items.append(f"{name!r}: {value}")
+        return "{" + ", ".join(items) + "}"
+
+    @staticmethod
+    def leaf(lookup, function, namespace, lookups, nullable=True) -> str:
+        if lookup not in lookups:
+            lookups.append(lookup)
+        value = f"row[{lookup!r}]"
+        if function is None:
+            return value
+
+        name = f"_convert_{len(namespace)}"
+        namespace[name] = function
+        if not nullable:
+            return f"{name}({value})"
+        # Like DRF, null values are not passed to the field.
+        return f"(None if (_value := {value}) is None else {name}(_value))"
+
+    def values(self, queryset):
+        return queryset.values(*self.lookups)
+
+    def serialize(self, rows) -> list:
+        return [self.to_dict(row) for row in rows]
+
+
+class RowListMixin:
+    """
+    Render the ``list`` action of a view from ``.values()`` rows with its
+    ``row_serializer``. The paginators accept rows as well as instances.
+    """
+    row_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.row_serializer.values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.row_serializer.serialize(page)
+            )
+        return Response(self.row_serializer.serialize(queryset))
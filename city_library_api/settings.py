@@ -116,6 +116,20 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+PASSWORD_HASHERS = [
+    "users.passwords.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# PBKDF2 iterations of new password hashes, older hashes are upgraded on
+# login. Passwords are hashed on a pool of PASSWORD_HASH_WORKERS threads.
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", 600_000))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -142,9 +156,15 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # Token buckets of ScopedTokenBucketThrottle, per user or client IP.
+    "DEFAULT_THROTTLE_RATES": {
+        "auth": os.getenv("THROTTLE_RATE_AUTH", "60/min"),
+        "books": os.getenv("THROTTLE_RATE_BOOKS", "600/min"),
+        "borrowings": os.getenv("THROTTLE_RATE_BORROWINGS", "60/min"),
+    },
 }
 
 SIMPLE_JWT = {
@@ -152,7 +172,62 @@ SIMPLE_JWT = {
 	"REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 	"ROTATE_REFRESH_TOKENS": False,
     "AUTH_HEADER_NAME": "HTTP_AUTHORIZE",
+    "TOKEN_OBTAIN_SERIALIZER": (
+        "users.serializers.UserClaimsTokenObtainPairSerializer"
+    ),
+    "TOKEN_REFRESH_SERIALIZER": (
+        "users.serializers.UserClaimsTokenRefreshSerializer"
+    ),
+}
+
+# Users changed in this process, and users of tokens issued without claims,
+# are kept in an LRU of this many users per process, for the access token
+# lifetime.
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", 4096))
+
+# Revoked tokens are checked against a per-process Bloom filter sized for
+# TOKEN_REVOCATION_CAPACITY ids, synced with the database every
+# TOKEN_REVOCATION_SYNC_SECONDS and rebuilt without expired tokens every
+# TOKEN_REVOCATION_REBUILD_SECONDS.
+TOKEN_REVOCATION_CAPACITY = int(
+    os.getenv("TOKEN_REVOCATION_CAPACITY", 100_000)
+)
+TOKEN_REVOCATION_ERROR_RATE = 0.001
+TOKEN_REVOCATION_SYNC_SECONDS = float(
+    os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", 5)
+)
+TOKEN_REVOCATION_REBUILD_SECONDS = float(
+    os.getenv("TOKEN_REVOCATION_REBUILD_SECONDS", 3600)
+)
+
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", 5))
+
+# Holds wait at most HOLD_WAIT_DAYS for a copy, which is then kept for
+# HOLD_PICKUP_DAYS. Run the expire_holds command to expire them.
+HOLD_WAIT_DAYS = int(os.getenv("HOLD_WAIT_DAYS", 90))
+HOLD_PICKUP_DAYS = int(os.getenv("HOLD_PICKUP_DAYS", 3))
+
+# Use a shared cache, e.g. django.core.cache.backends.filebased.FileBasedCache
+# with a directory as CACHE_LOCATION, when running several processes. The
+# book responses are cached for BOOK_CACHE_TIMEOUT seconds, book availability
+# for BOOK_AVAILABILITY_TIMEOUT seconds.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
 }
+BOOK_CACHE_TIMEOUT = int(os.getenv("BOOK_CACHE_TIMEOUT", 300))
+BOOK_AVAILABILITY_TIMEOUT = int(os.getenv("BOOK_AVAILABILITY_TIMEOUT", 30))
+
+# Serve book autocomplete from an in-process index built when the application
+# loads, or from the database when disabled.
+BOOK_AUTOCOMPLETE_INDEX = os.getenv("BOOK_AUTOCOMPLETE_INDEX", "1") == "1"
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "City Library API",
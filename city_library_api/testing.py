@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Test case mixin that pins the number of SQL queries an endpoint may run.
+
+    Use it next to ``TestCase``/``APITestCase``: every endpoint declares its
+    budget once, and ``assertEndpointQueryBudget`` fails as soon as the view
+    goes over it or starts issuing extra queries per row.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+
+        executed = len(context)
+        if executed > budget:
+            queries = "\n".join(
+                f"{number}. {query['sql']}"
+                for number, query in enumerate(
+                    context.captured_queries, start=1
+                )
+            )
+            self.fail(
+                f"{executed} queries executed, budget is {budget}\n{queries}"
+            )
+
+    def assertEndpointQueryBudget(
+        self, budget, method, url, grow=None, **kwargs
+    ):
+        """
+        Call ``url`` with ``self.client`` and check it stays within
+        ``budget`` queries. When ``grow`` is given it is called to add more
+        rows, and the endpoint must then run exactly as many queries as
+        before.
+        """
+        request = getattr(self.client, method.lower())
+
+        with self.assertMaxQueries(budget) as before:
+            response = request(url, **kwargs)
+
+        if grow is not None:
+            grow()
+            with self.assertMaxQueries(budget) as after:
+                request(url, **kwargs)
+            self.assertEqual(
+                len(before),
+                len(after),
+                "Query count depends on the number of rows returned",
+            )
+
+        return response
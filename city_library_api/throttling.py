@@ -0,0 +1,82 @@
+from django.core.cache.backends.base import BaseCache
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle, SimpleRateThrottle
+
+
+MICROSECONDS = 1_000_000
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket throttle on Django's cache. A rate of ``"30/min"`` is a
+    bucket of 30 tokens refilled at 30 per minute: bursts up to the bucket
+    size pass, then requests are spaced by the refill interval.
+
+    The bucket is kept as a single integer, the time in microseconds at
+    which it will be full again (GCRA). Taking a token from a bucket that
+    is not full is one atomic ``cache.incr`` on backends that have one,
+    like the local-memory, memcached and Redis ones; a full bucket is
+    reset with ``cache.set``. Backends without an atomic ``incr``, like
+    the file one, get a plain ``cache.set``, so concurrent processes may
+    let a few extra requests through. Rates are looked up in the current
+    ``DEFAULT_THROTTLE_RATES``.
+    """
+    cache_format = "throttle:%(scope)s:%(ident)s"
+
+    @property
+    def THROTTLE_RATES(self):
+        return api_settings.DEFAULT_THROTTLE_RATES
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        interval = self.duration * MICROSECONDS // self.num_requests
+        capacity = self.duration * MICROSECONDS
+        timeout = self.duration + 1
+        now = int(self.timer() * MICROSECONDS)
+
+        full_at = self.cache.get(self.key)
+        if full_at is None or full_at <= now:
+            self.cache.set(self.key, now + interval, timeout)
+            return True
+
+        self.delay = full_at + interval - now - capacity
+        if self.delay > 0:
+            return False
+
+        if self.cache.incr.__func__ is BaseCache.incr:
+            self.cache.set(self.key, full_at + interval, timeout)
+            return True
+
+        try:
+            full_at = self.cache.incr(self.key, interval)
+        except ValueError:
+            # The bucket expired in between, it is full.
+            self.cache.set(self.key, now + interval, timeout)
+            return True
+        self.delay = full_at - now - capacity
+        if self.delay > 0:
+            # Another request took the last token first.
+            self.cache.decr(self.key, interval)
+            return False
+        # incr keeps the old expiry, which may now be before full_at.
+        self.cache.touch(self.key, timeout)
+        return True
+
+    def wait(self):
+        """Seconds until the next token, sent as ``Retry-After``."""
+        return self.delay / MICROSECONDS
+
+
+class ScopedTokenBucketThrottle(ScopedRateThrottle, TokenBucketThrottle):
+    """
+    ``ScopedRateThrottle`` with token buckets: views set
+    ``throttle_scope``, and every user, or client IP for anonymous
+    requests, gets a bucket per scope.
+    """
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from users.authentication import (
+            forget_deleted_user,
+            refresh_cached_user,
+        )
+
+        user_model = self.get_model("User")
+        post_save.connect(refresh_cached_user, sender=user_model)
+        post_delete.connect(forget_deleted_user, sender=user_model)
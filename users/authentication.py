@@ -0,0 +1,158 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from users.revocation import revocation_list
+
+
+# Claims embedded into access tokens next to the user id, enough to build
+# the user for permission checks and the views without loading it.
+USER_CLAIMS = ("email", "is_active", "is_staff", "is_superuser")
+
+
+def add_user_claims(token, user):
+    """Embed the ``USER_CLAIMS`` of the user into ``token``."""
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class UserCache:
+    """
+    Bounded, thread-safe LRU of users by id, kept for ``timeout``
+    seconds. ``None`` is cached for deleted users, so their tokens stop
+    working in this process.
+    """
+
+    def __init__(self, maxsize: int, timeout: float):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, user_id, since=None) -> tuple:
+        """
+        Return ``(found, user)`` and mark the user as recently used. Users
+        cached before ``since``, a timestamp, are not found.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                user, cached_at = self._users[user_id]
+            except KeyError:
+                return False, None
+            if cached_at <= now - self.timeout:
+                del self._users[user_id]
+                return False, None
+            if since is not None and cached_at < since:
+                return False, None
+            self._users.move_to_end(user_id)
+            return True, user
+
+    def set(self, user_id, user) -> None:
+        with self._lock:
+            self._users[user_id] = (user, time.time())
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+user_cache = UserCache(
+    settings.JWT_USER_CACHE_SIZE,
+    api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(),
+)
+
+
+def refresh_cached_user(sender, instance, created=False, **kwargs):
+    """
+    ``post_save`` receiver storing a changed user in ``user_cache``, so
+    requests in this process stop trusting the claims issued before the
+    change. New users have no tokens yet and are skipped.
+    """
+    if not created:
+        user_cache.set(instance.pk, copy.copy(instance))
+
+
+def forget_deleted_user(sender, instance, **kwargs):
+    """``post_delete`` receiver rejecting the tokens of a deleted user."""
+    user_cache.set(instance.pk, None)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds the user from the claims signed into
+    the access token instead of loading it on every request.
+
+    Users changed or deleted in this process after the token was issued,
+    and users whose tokens predate the claims, are served from
+    ``user_cache``, the latter loaded once. Changes made in other
+    processes or through ``QuerySet.update()`` reach a user's requests
+    once the access token is refreshed, which embeds the claims again.
+    Inactive users and revoked tokens are rejected.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if revocation_list.is_revoked(
+            validated_token[api_settings.JTI_CLAIM]
+        ):
+            raise InvalidToken(_("Token is revoked"))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        has_claims = all(claim in validated_token for claim in USER_CLAIMS)
+        found, user = user_cache.lookup(
+            user_id, since=validated_token.get("iat") if has_claims else None
+        )
+        if not found and has_claims:
+            user = self.user_from_claims(user_id, validated_token)
+        elif not found:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+
+        if user is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        return copy.copy(user)
+
+    def user_from_claims(self, user_id, validated_token):
+        """
+        User with only the id and ``USER_CLAIMS`` of the token set. Its
+        other fields hold defaults, so load the user before saving it.
+        """
+        user = self.user_model(
+            **{api_settings.USER_ID_FIELD: user_id},
+            **{claim: validated_token[claim] for claim in USER_CLAIMS},
+        )
+        user._state.adding = False
+        return user
@@ -0,0 +1,79 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from rest_framework_simplejwt.settings import api_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Time concurrent logins through the token obtain serializer, which "
+        "verifies the password and signs the tokens, for each number of "
+        "client threads. Set PASSWORD_HASH_ITERATIONS and "
+        "PASSWORD_HASH_WORKERS to compare hashing costs and pool sizes. The "
+        "benchmark users are deleted at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--logins", type=int, default=200)
+        parser.add_argument(
+            "--threads", type=int, nargs="+", default=[1, 4, 16]
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{settings.PASSWORD_HASH_ITERATIONS} iterations, "
+            f"{settings.PASSWORD_HASH_WORKERS} hashing threads"
+        )
+        password = make_password("bench-password")
+        emails = [
+            f"bench-login-{number}@example.com"
+            for number in range(options["users"])
+        ]
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=email, password=password)
+            for email in emails
+        )
+        try:
+            for threads in options["threads"]:
+                self.run(threads, emails, options["logins"])
+        finally:
+            get_user_model().objects.filter(
+                pk__in=[user.pk for user in users]
+            ).delete()
+
+    def run(self, threads, emails, logins):
+        serializer_class = import_string(api_settings.TOKEN_OBTAIN_SERIALIZER)
+
+        def login(number):
+            try:
+                started = time.perf_counter()
+                serializer = serializer_class(
+                    data={
+                        "email": emails[number % len(emails)],
+                        "password": "bench-password",
+                    }
+                )
+                serializer.is_valid(raise_exception=True)
+                return time.perf_counter() - started
+            finally:
+                connection.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            timings = list(executor.map(login, range(logins)))
+        elapsed = time.perf_counter() - started
+
+        p95 = statistics.quantiles(timings, n=20)[-1] * 1000
+        self.stdout.write(
+            f"{threads:>3} threads {logins / elapsed:>9.1f} logins/s, "
+            f"p95 {p95:8.1f} ms"
+        )
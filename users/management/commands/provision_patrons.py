@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from books.importer import read_rows
+from users.provisioning import PatronImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Provision patrons from a CSV file, or stdin, with email, password, "
+        "first_name and last_name columns. Passwords are hashed across a "
+        "process pool and users inserted in batches. Invalid rows and "
+        "emails already taken are written to a reject file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="CSV file to read, '-' reads stdin",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2_000,
+            help="Rows hashed and inserted per batch",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Processes hashing passwords, 0 hashes in this process",
+        )
+        parser.add_argument(
+            "--rejects",
+            help="JSONL file for rejected rows, defaults to "
+                 "<path>.rejects.jsonl or rejects.jsonl for stdin",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        rejects_path = options["rejects"] or (
+            "rejects.jsonl" if path == "-" else f"{path}.rejects.jsonl"
+        )
+
+        try:
+            source = (
+                sys.stdin if path == "-"
+                else open(path, newline="", encoding="utf-8")
+            )
+        except OSError as error:
+            raise CommandError(f"Cannot open {path}: {error}")
+
+        started = time.perf_counter()
+
+        def progress(stats):
+            elapsed = time.perf_counter() - started
+            self.stderr.write(
+                f"{stats['read']} rows read, {stats['written']} written, "
+                f"{stats['rejected']} rejected "
+                f"({stats['read'] / elapsed:.0f} rows/s)"
+            )
+
+        with source, open(rejects_path, "w", encoding="utf-8") as rejects:
+            importer = PatronImporter(
+                rejects,
+                chunk_size=options["chunk_size"],
+                workers=options["workers"],
+                progress=progress,
+            )
+            stats = importer.run(read_rows(source, "csv"))
+
+        elapsed = time.perf_counter() - started
+        message = (
+            f"Provisioned {stats['written']} of {stats['read']} patrons in "
+            f"{elapsed:.1f} s ({stats['written'] / elapsed:.0f} patrons/s)"
+        )
+        if stats["rejected"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{message}, {stats['rejected']} rejected rows are in "
+                    f"{rejects_path}"
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
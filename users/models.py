@@ -2,6 +2,13 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.utils.translation import gettext as _
 
+from users.passwords import (
+    ahash_password,
+    averify_password,
+    hash_password,
+    verify_password,
+)
+
 
 class UserManager(BaseUserManager):
     """Define a model manager for User model with no username field."""
@@ -47,3 +54,53 @@ class User(AbstractUser):
     REQUIRED_FIELDS = []
 
     objects = UserManager()
+
+    def set_password(self, raw_password):
+        self.password = hash_password(raw_password)
+        self._password = raw_password
+
+    async def aset_password(self, raw_password):
+        self.password = await ahash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        """
+        Check the password on the hashing pool, saving it hashed at the
+        current cost when the stored hash is outdated.
+        """
+        correct, rehashed = verify_password(raw_password, self.password)
+        if rehashed:
+            self.password = rehashed
+            self._password = None
+            self.save(update_fields=["password"])
+        return correct
+
+    async def acheck_password(self, raw_password):
+        correct, rehashed = await averify_password(
+            raw_password, self.password
+        )
+        if rehashed:
+            self.password = rehashed
+            self._password = None
+            await self.asave(update_fields=["password"])
+        return correct
+
+
+class RevokedToken(models.Model):
+    """
+    JWT revoked before its expiry, by its ``jti``. Rows are kept until the
+    token expires and then compacted by ``users.revocation``.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name="revoked_tokens",
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
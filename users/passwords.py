@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher whose cost is the ``PASSWORD_HASH_ITERATIONS`` setting.
+
+    Passwords hashed with another number of iterations still verify, and
+    are rehashed at the configured cost on the next successful login.
+    """
+
+    @property
+    def iterations(self) -> int:
+        return settings.PASSWORD_HASH_ITERATIONS
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Thread pool of ``PASSWORD_HASH_WORKERS`` threads every password is
+    hashed on. The hashers release the GIL, so the pool bounds how many
+    CPU cores a burst of signups and logins takes from other requests.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="password-hash",
+            )
+    return _executor
+
+
+def hash_password(raw_password) -> str:
+    """Hash a password on the hashing pool and wait for it."""
+    return get_executor().submit(hashers.make_password, raw_password).result()
+
+
+async def ahash_password(raw_password) -> str:
+    """Hash a password on the hashing pool without blocking the loop."""
+    return await asyncio.wrap_future(
+        get_executor().submit(hashers.make_password, raw_password)
+    )
+
+
+def verify_password(raw_password, encoded) -> tuple:
+    """
+    Check a password on the hashing pool. Returns whether it is correct,
+    and the password hashed again at the current cost when the stored
+    hash is outdated, otherwise None.
+    """
+    return get_executor().submit(_verify, raw_password, encoded).result()
+
+
+async def averify_password(raw_password, encoded) -> tuple:
+    """Asynchronous ``verify_password``."""
+    return await asyncio.wrap_future(
+        get_executor().submit(_verify, raw_password, encoded)
+    )
+
+
+def _verify(raw_password, encoded) -> tuple:
+    rehashed = []
+    correct = hashers.check_password(
+        raw_password,
+        encoded,
+        setter=lambda raw: rehashed.append(hashers.make_password(raw)),
+    )
+    return correct, rehashed[0] if rehashed else None
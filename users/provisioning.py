@@ -0,0 +1,167 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from rest_framework import serializers
+
+
+class PatronSerializer(serializers.Serializer):
+    """
+    One row of a patron file. Rows without a password get an unusable
+    one, those patrons set theirs through a password reset.
+    """
+    email = serializers.EmailField(max_length=254)
+    password = serializers.CharField(
+        min_length=5, required=False, allow_blank=True, trim_whitespace=False
+    )
+    first_name = serializers.CharField(
+        max_length=150, required=False, allow_blank=True
+    )
+    last_name = serializers.CharField(
+        max_length=150, required=False, allow_blank=True
+    )
+
+    def validate_email(self, value) -> str:
+        return get_user_model().objects.normalize_email(value)
+
+
+def hash_passwords(passwords) -> list:
+    """Hash a batch of passwords, run on the worker processes."""
+    return [make_password(password or None) for password in passwords]
+
+
+class PatronImporter:
+    """
+    Provision patrons in chunks with bounded memory. Every chunk is
+    validated, its passwords hashed across ``workers`` processes (inline
+    when 0) and its users inserted with one ``bulk_create``.
+    Emails already taken, or repeated in the file, are rejected to
+    ``rejects`` as JSON lines, as are the rows the insert skipped for
+    users created concurrently.
+    """
+
+    def __init__(self, rejects, chunk_size=2_000, workers=0,
+                 progress=None):
+        self.rejects = rejects
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.executor = None
+        self.progress = progress
+        self.serializer = PatronSerializer()
+        self.seen = set()
+        self.stats = {"read": 0, "written": 0, "rejected": 0}
+
+    def run(self, rows) -> dict:
+        if self.workers:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=django.setup
+            )
+        try:
+            rows = iter(rows)
+            while chunk := list(islice(rows, self.chunk_size)):
+                self.import_chunk(chunk)
+                if self.progress:
+                    self.progress(self.stats)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+        return self.stats
+
+    def import_chunk(self, chunk):
+        patrons = []
+        for line, row, error in chunk:
+            self.stats["read"] += 1
+            if error is None:
+                data, error = self.validate(row)
+            if error is not None:
+                self.reject(line, row, error)
+                continue
+            patrons.append((line, row, data))
+
+        taken = set(
+            get_user_model().objects.filter(
+                email__in=[data["email"] for _, _, data in patrons]
+            ).values_list("email", flat=True)
+        )
+        if taken:
+            for line, row, data in patrons:
+                if data["email"] in taken:
+                    self.reject(
+                        line, row, {"email": ["User already exists."]}
+                    )
+            patrons = [
+                (line, row, data)
+                for line, row, data in patrons
+                if data["email"] not in taken
+            ]
+
+        hashes = self.hash([data.get("password") for _, _, data in patrons])
+        users = [
+            get_user_model()(
+                email=data["email"],
+                password=password,
+                first_name=data.get("first_name", ""),
+                last_name=data.get("last_name", ""),
+            )
+            for (_, _, data), password in zip(patrons, hashes)
+        ]
+        with transaction.atomic():
+            get_user_model().objects.bulk_create(users, ignore_conflicts=True)
+            # Hashes are salted, so a stored hash tells the rows inserted
+            # here from users another process created in between.
+            stored = dict(
+                get_user_model().objects.filter(
+                    email__in=[user.email for user in users]
+                ).values_list("email", "password")
+            )
+        for (line, row, _), user in zip(patrons, users):
+            if stored.get(user.email) == user.password:
+                self.stats["written"] += 1
+            else:
+                self.reject(line, row, {"email": ["User already exists."]})
+
+    def validate(self, row):
+        row = {
+            field: value
+            for field, value in row.items()
+            if field is not None and value is not None
+        }
+        try:
+            data = self.serializer.run_validation(row)
+        except serializers.ValidationError as error:
+            return None, error.detail
+        if data["email"] in self.seen:
+            return None, {"email": ["Email is repeated in the file."]}
+        self.seen.add(data["email"])
+        return data, None
+
+    def hash(self, passwords) -> list:
+        if self.executor is None:
+            return hash_passwords(passwords)
+        size = -(-len(passwords) // self.workers) or 1
+        batches = [
+            passwords[start:start + size]
+            for start in range(0, len(passwords), size)
+        ]
+        return [
+            encoded
+            for batch in self.executor.map(hash_passwords, batches)
+            for encoded in batch
+        ]
+
+    def reject(self, line, row, errors):
+        self.stats["rejected"] += 1
+        if isinstance(row, dict) and row.get("password"):
+            row = {**row, "password": "***"}
+        self.rejects.write(
+            json.dumps(
+                {"line": line, "row": row, "errors": errors}, default=str
+            )
+            + "\n"
+        )
@@ -0,0 +1,147 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from users.models import RevokedToken
+
+
+# Revocations read again on every incremental sync, so rows committed out
+# of order, or stamped by a server with a skewed clock, are not missed.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class BloomFilter:
+    """
+    Set membership in ``capacity`` keys with a false positive rate of
+    about ``error_rate`` and no false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return (
+            (first + number * second) % self.size
+            for number in range(self.hashes)
+        )
+
+    def add(self, key: str) -> None:
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(key)
+        )
+
+
+class RevocationList:
+    """
+    Revoked token ids, checked against a per-process Bloom filter of the
+    ``RevokedToken`` table so only filter hits query the database.
+
+    The filter picks up rows revoked elsewhere every
+    ``TOKEN_REVOCATION_SYNC_SECONDS``. It is rebuilt every
+    ``TOKEN_REVOCATION_REBUILD_SECONDS``, or once it holds more than
+    ``TOKEN_REVOCATION_CAPACITY`` ids, after deleting expired rows.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._filter = None
+            self._synced_at = None
+            self._synced_monotonic = self._rebuilt_monotonic = 0.0
+
+    def revoke(self, token, user=None) -> None:
+        """Revoke a validated simplejwt token until it expires."""
+        jti = token[api_settings.JTI_CLAIM]
+        RevokedToken.objects.bulk_create(
+            [
+                RevokedToken(
+                    jti=jti,
+                    user=user,
+                    expires_at=datetime_from_epoch(token["exp"]),
+                )
+            ],
+            ignore_conflicts=True,
+        )
+        with self._lock:
+            if self._filter is not None and jti not in self._filter:
+                self._filter.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        self.sync()
+        if jti not in self._filter:
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def sync(self) -> None:
+        now = time.monotonic()
+        if (
+            self._filter is not None
+            and now - self._synced_monotonic
+            < settings.TOKEN_REVOCATION_SYNC_SECONDS
+        ):
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            if self._filter is None or (
+                now - self._rebuilt_monotonic
+                >= settings.TOKEN_REVOCATION_REBUILD_SECONDS
+            ) or self._filter.count > self._filter.capacity:
+                self._rebuild()
+            elif (
+                now - self._synced_monotonic
+                >= settings.TOKEN_REVOCATION_SYNC_SECONDS
+            ):
+                self._sync_since(self._synced_at - SYNC_OVERLAP)
+            self._synced_monotonic = time.monotonic()
+
+    def _rebuild(self) -> None:
+        started = timezone.now()
+        RevokedToken.objects.filter(expires_at__lte=started).delete()
+        jtis = RevokedToken.objects.values_list("jti", flat=True)
+        self._filter = BloomFilter(
+            max(settings.TOKEN_REVOCATION_CAPACITY, 2 * jtis.count()),
+            settings.TOKEN_REVOCATION_ERROR_RATE,
+        )
+        for jti in jtis.iterator():
+            self._filter.add(jti)
+        self._synced_at = started
+        self._rebuilt_monotonic = time.monotonic()
+
+    def _sync_since(self, since) -> None:
+        started = timezone.now()
+        for jti in RevokedToken.objects.filter(
+            revoked_at__gte=since
+        ).values_list("jti", flat=True).iterator():
+            if jti not in self._filter:
+                self._filter.add(jti)
+        self._synced_at = started
+
+
+revocation_list = RevocationList()
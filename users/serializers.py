@@ -1,7 +1,23 @@
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import gettext as _
 
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+    TokenError,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from borrowings.models import FeeBalance
+from users.authentication import add_user_claims
+from users.revocation import revocation_list
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -32,3 +48,119 @@ class UserSerializer(serializers.ModelSerializer):
             user.save()
 
         return user
+
+
+class FeeBalanceSerializer(serializers.ModelSerializer):
+    """Fees owed by the user, read from the materialized balance."""
+    total = serializers.DecimalField(
+        max_digits=12, decimal_places=2, read_only=True
+    )
+
+    class Meta:
+        model = FeeBalance
+        fields = (
+            "rental_fees",
+            "overdue_fees",
+            "accrued_overdue_fees",
+            "accrued_on",
+            "total",
+        )
+        read_only_fields = fields
+
+
+class ManageUserSerializer(UserSerializer):
+    """User serializer for the profile endpoint, including the fee balance."""
+    fee_balance = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ("fee_balance",)
+
+    def get_fee_balance(self, user):
+        try:
+            balance = user.fee_balance
+        except ObjectDoesNotExist:
+            balance = FeeBalance(user=user)
+        return FeeBalanceSerializer(balance).data
+
+
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issue tokens carrying the claims ``ClaimsJWTAuthentication`` trusts."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class UserClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Embed the current claims of the user into every refreshed token, and
+    refuse revoked refresh tokens.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if revocation_list.is_revoked(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken(_("Token is revoked"))
+
+        # Loads the user once, both to check it may still log in and to
+        # read its claims, unlike ``super().validate()``.
+        user = get_user_model().objects.filter(
+            **{
+                api_settings.USER_ID_FIELD: refresh.payload.get(
+                    api_settings.USER_ID_CLAIM
+                )
+            }
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"],
+                "no_active_account",
+            )
+
+        # The access token copies "iat" from the refresh token, stamp the
+        # time the claims were read so they win over older cached users.
+        access = refresh.access_token
+        access.set_iat()
+        data = {"access": str(add_user_claims(access, user))}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and hasattr(
+                refresh, "blacklist"
+            ):
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    """
+    Revokes the access token of the request, and the refresh token when
+    given, until they expire.
+    """
+    refresh = serializers.CharField(
+        required=False,
+        help_text="Refresh token of the user to revoke as well",
+    )
+
+    def validate_refresh(self, value) -> RefreshToken:
+        try:
+            refresh = RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(str(error))
+        if refresh[api_settings.USER_ID_CLAIM] != getattr(
+            self.context["request"].user, api_settings.USER_ID_FIELD
+        ):
+            raise serializers.ValidationError(
+                "Token belongs to another user"
+            )
+        return refresh
+
+    def save(self, **kwargs):
+        request = self.context["request"]
+        tokens = [request.auth, self.validated_data.get("refresh")]
+        for token in tokens:
+            if token is not None:
+                revocation_list.revoke(token, user=request.user)
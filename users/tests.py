@@ -1,10 +1,29 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework.test import APITestCase
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
+from city_library_api.testing import QueryBudgetMixin
+from users.authentication import UserCache, add_user_claims, user_cache
+from users.models import RevokedToken
+from users.passwords import get_executor, verify_password
+from users.provisioning import PatronImporter, hash_passwords
+from users.revocation import BloomFilter, revocation_list
 from users.serializers import UserSerializer
 
 
@@ -108,3 +127,448 @@ class UserViewsTests(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["email"], self.admin_user.email)
+
+
+class UserQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    CREATE_BUDGET = 2
+    ME_BUDGET = 1
+    REFRESH_BUDGET = 1
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword"
+        )
+
+    def test_create_user_query_budget(self):
+        response = self.assertEndpointQueryBudget(
+            self.CREATE_BUDGET,
+            "post",
+            reverse("users:users"),
+            data={"email": "new@test.com", "password": "testpassword"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_manage_user_query_budget(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.assertEndpointQueryBudget(
+            self.ME_BUDGET,
+            "get",
+            reverse("users:me"),
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_refresh_token_query_budget(self):
+        refresh = RefreshToken.for_user(self.user)
+        revocation_list.reset()
+        revocation_list.sync()
+
+        response = self.assertEndpointQueryBudget(
+            self.REFRESH_BUDGET,
+            "post",
+            reverse("users:token_refresh"),
+            data={"refresh": str(refresh)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            AccessToken(response.data["access"])["email"], "user@example.com"
+        )
+
+
+class ClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com",
+            password="userpassword",
+            is_staff=True,
+        )
+
+    def obtain_tokens(self):
+        response = self.client.post(
+            reverse("users:token_obtain_pair"),
+            {"email": "user@example.com", "password": "userpassword"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def get(self, url, token):
+        self.client.credentials(HTTP_AUTHORIZE=f"Bearer {token}")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        return response, [query["sql"] for query in context.captured_queries]
+
+    def test_tokens_carry_user_claims(self):
+        access = AccessToken(self.obtain_tokens()["access"])
+
+        self.assertEqual(access["user_id"], self.user.id)
+        self.assertEqual(access["email"], "user@example.com")
+        self.assertTrue(access["is_active"])
+        self.assertTrue(access["is_staff"])
+        self.assertFalse(access["is_superuser"])
+
+    def test_requests_skip_user_query(self):
+        response, queries = self.get(
+            reverse("users:me"), self.obtain_tokens()["access"]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["email"], "user@example.com")
+        self.assertFalse(any("users_user" in sql for sql in queries))
+
+    def test_tokens_without_claims_load_user_once(self):
+        token = RefreshToken.for_user(self.user).access_token
+
+        _, first = self.get(reverse("users:me"), token)
+        _, second = self.get(reverse("users:me"), token)
+
+        self.assertEqual(sum("users_user" in sql for sql in first), 1)
+        self.assertFalse(any("users_user" in sql for sql in second))
+
+    def test_changed_user_overrides_stale_claims(self):
+        token = self.obtain_tokens()["access"]
+        self.user.is_staff = False
+        self.user.save()
+
+        response, _ = self.get(reverse("borrowings:borrowing-stats"), token)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deactivated_and_deleted_users_are_rejected(self):
+        token = self.obtain_tokens()["access"]
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.get(reverse("users:me"), token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.delete()
+        response, _ = self.get(reverse("users:me"), token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_embeds_current_claims(self):
+        refresh = self.obtain_tokens()["refresh"]
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_staff=False
+        )
+
+        response = self.client.post(
+            reverse("users:token_refresh"), {"refresh": refresh}
+        )
+
+        self.assertFalse(AccessToken(response.data["access"])["is_staff"])
+
+    def test_refreshed_claims_override_older_cached_user(self):
+        refresh = RefreshToken.for_user(self.user)
+        refresh.set_iat(at_time=timezone.now() - timezone.timedelta(minutes=1))
+        self.user.is_superuser = True
+        with patch("time.time", return_value=time.time() - 10):
+            self.user.save()
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_staff=False, is_superuser=False
+        )
+
+        response = self.client.post(
+            reverse("users:token_refresh"), {"refresh": str(refresh)}
+        )
+        response, _ = self.get(
+            reverse("borrowings:borrowing-stats"), response.data["access"]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_inactive_claim_is_rejected_without_query(self):
+        token = RefreshToken.for_user(self.user).access_token
+        add_user_claims(token, self.user)
+        token["is_active"] = False
+
+        response, queries = self.get(reverse("users:me"), token)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(any("users_user" in sql for sql in queries))
+
+    def test_update_through_claims_user_keeps_other_fields(self):
+        self.client.credentials(
+            HTTP_AUTHORIZE=f"Bearer {self.obtain_tokens()['access']}"
+        )
+
+        response = self.client.patch(
+            reverse("users:me"), {"email": "new@example.com"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, "new@example.com")
+        self.assertTrue(self.user.is_staff)
+        self.assertTrue(self.user.check_password("userpassword"))
+
+
+class UserCacheTests(SimpleTestCase):
+    def test_least_recently_used_user_is_evicted(self):
+        cache = UserCache(maxsize=2, timeout=60)
+        cache.set(1, "first")
+        cache.set(2, "second")
+        cache.lookup(1)
+        cache.set(3, "third")
+
+        self.assertEqual(cache.lookup(1), (True, "first"))
+        self.assertEqual(cache.lookup(2), (False, None))
+        self.assertEqual(len(cache), 2)
+
+    def test_users_expire_or_are_skipped_for_newer_claims(self):
+        cache = UserCache(maxsize=2, timeout=60)
+        with patch("time.time", return_value=1_000):
+            cache.set(1, "first")
+
+        with patch("time.time", return_value=1_030):
+            self.assertEqual(cache.lookup(1, since=999), (True, "first"))
+            self.assertEqual(cache.lookup(1, since=1_001), (False, None))
+        with patch("time.time", return_value=1_060):
+            self.assertEqual(cache.lookup(1), (False, None))
+        self.assertEqual(len(cache), 0)
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1_000)
+class PasswordHashingTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+
+    def iterations(self):
+        self.user.refresh_from_db()
+        return int(self.user.password.split("$")[1])
+
+    def test_hash_cost_follows_setting(self):
+        self.assertEqual(self.iterations(), 1_000)
+        self.assertTrue(self.user.check_password("userpassword"))
+        self.assertFalse(self.user.check_password("wrongpassword"))
+
+    def test_passwords_are_hashed_on_the_pool(self):
+        thread = get_executor().submit(threading.current_thread).result()
+
+        self.assertTrue(thread.name.startswith("password-hash"))
+        self.assertEqual(
+            verify_password("userpassword", self.user.password),
+            (True, None),
+        )
+
+    def test_login_rehashes_outdated_password(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=2_000):
+            response = self.client.post(
+                reverse("users:token_obtain_pair"),
+                {"email": "user@example.com", "password": "userpassword"},
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(self.iterations(), 2_000)
+            self.assertTrue(self.user.check_password("userpassword"))
+
+    def test_failed_login_keeps_outdated_password(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=2_000):
+            response = self.client.post(
+                reverse("users:token_obtain_pair"),
+                {"email": "user@example.com", "password": "wrongpassword"},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.iterations(), 1_000)
+
+    async def test_async_password_change_and_check(self):
+        await self.user.aset_password("newpassword")
+        await self.user.asave()
+
+        self.assertTrue(await self.user.acheck_password("newpassword"))
+        self.assertFalse(await self.user.acheck_password("userpassword"))
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1_000)
+class ProvisionPatronsCommandTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        get_user_model().objects.create_user(
+            email="taken@example.com", password="password"
+        )
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def provision(self, content, *args):
+        with open(self.path("patrons.csv"), "w") as source:
+            source.write(content)
+        output = StringIO()
+        call_command(
+            "provision_patrons",
+            self.path("patrons.csv"),
+            "--chunk-size", "2",
+            *args,
+            stdout=output,
+            stderr=StringIO(),
+        )
+        return output.getvalue()
+
+    def rejects(self):
+        with open(self.path("patrons.csv.rejects.jsonl")) as rejects:
+            return [json.loads(line) for line in rejects]
+
+    def test_patrons_are_provisioned_and_bad_rows_rejected(self):
+        output = self.provision(
+            "email,password,first_name,last_name\n"
+            "ada@Example.com,secret1,Ada,Lovelace\n"
+            "not an email,secret2,,\n"
+            "taken@example.com,secret3,,\n"
+            "grace@example.com,,Grace,Hopper\n"
+            "ada@example.com,secret4,,\n",
+            "--workers", "2",
+        )
+
+        self.assertIn("Provisioned 2 of 5 patrons", output)
+        ada = get_user_model().objects.get(email="ada@example.com")
+        self.assertEqual((ada.first_name, ada.last_name), ("Ada", "Lovelace"))
+        self.assertTrue(ada.check_password("secret1"))
+        grace = get_user_model().objects.get(email="grace@example.com")
+        self.assertFalse(grace.has_usable_password())
+
+        rejected = self.rejects()
+        self.assertEqual([row["line"] for row in rejected], [3, 4, 6])
+        self.assertEqual(rejected[1]["row"]["password"], "***")
+        self.assertEqual(
+            rejected[1]["errors"], {"email": ["User already exists."]}
+        )
+
+    def test_patrons_created_concurrently_are_rejected(self):
+        def hash_after_signup(importer, passwords):
+            get_user_model().objects.create_user(
+                email="ada@example.com", password="password"
+            )
+            return hash_passwords(passwords)
+
+        with patch.object(PatronImporter, "hash", hash_after_signup):
+            output = self.provision(
+                "email,password\n"
+                "ada@example.com,secret1\n"
+                "grace@example.com,secret2\n",
+            )
+
+        self.assertIn("Provisioned 1 of 2 patrons", output)
+        self.assertTrue(
+            get_user_model().objects.get(
+                email="ada@example.com"
+            ).check_password("password")
+        )
+        rejected = self.rejects()
+        self.assertEqual([row["line"] for row in rejected], [2])
+        self.assertEqual(
+            rejected[0]["errors"], {"email": ["User already exists."]}
+        )
+
+    def test_passwords_can_be_hashed_in_process(self):
+        output = self.provision(
+            "email,password\nada@example.com,secret1\n", "--workers", "0"
+        )
+
+        self.assertIn("Provisioned 1 of 1 patrons", output)
+        self.assertTrue(
+            get_user_model().objects.get(
+                email="ada@example.com"
+            ).check_password("secret1")
+        )
+
+
+@override_settings(TOKEN_REVOCATION_SYNC_SECONDS=60)
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        revocation_list.reset()
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="userpassword"
+        )
+        response = self.client.post(
+            reverse("users:token_obtain_pair"),
+            {"email": "user@example.com", "password": "userpassword"},
+        )
+        self.access = response.data["access"]
+        self.refresh = response.data["refresh"]
+
+    def get_me(self):
+        self.client.credentials(HTTP_AUTHORIZE=f"Bearer {self.access}")
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("users:me"))
+        return response, [query["sql"] for query in context.captured_queries]
+
+    def test_revoked_tokens_are_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZE=f"Bearer {self.access}")
+        response = self.client.post(
+            reverse("users:token_revoke"), {"refresh": self.refresh}
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        response, _ = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        response = self.client.post(
+            reverse("users:token_refresh"), {"refresh": self.refresh}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token_of_another_user_is_not_revoked(self):
+        other = get_user_model().objects.create_user(
+            email="other@example.com", password="otherpassword"
+        )
+        self.client.credentials(HTTP_AUTHORIZE=f"Bearer {self.access}")
+
+        response = self.client.post(
+            reverse("users:token_revoke"),
+            {"refresh": str(RefreshToken.for_user(other))},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_only_filter_hits_query_revocations(self):
+        self.get_me()
+
+        response, queries = self.get_me()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            any("users_revokedtoken" in sql for sql in queries)
+        )
+
+    def test_revocations_from_other_processes_are_synced(self):
+        self.get_me()
+        RevokedToken.objects.create(
+            jti=AccessToken(self.access)["jti"],
+            expires_at=timezone.now() + timezone.timedelta(hours=1),
+        )
+
+        response, _ = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with override_settings(TOKEN_REVOCATION_SYNC_SECONDS=0):
+            response, _ = self.get_me()
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rebuild_compacts_expired_revocations(self):
+        RevokedToken.objects.create(
+            jti="expired",
+            expires_at=timezone.now() - timezone.timedelta(minutes=1),
+        )
+
+        self.assertFalse(revocation_list.is_revoked("expired"))
+        self.assertFalse(RevokedToken.objects.exists())
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_members_are_found_and_false_positives_are_rare(self):
+        bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+        for number in range(1_000):
+            bloom.add(f"member-{number}")
+
+        self.assertTrue(
+            all(f"member-{number}" in bloom for number in range(1_000))
+        )
+        false_positives = sum(
+            f"other-{number}" in bloom for number in range(10_000)
+        )
+        self.assertLess(false_positives, 300)
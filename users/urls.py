@@ -1,13 +1,14 @@
 from django.urls import path
 
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-    TokenVerifyView,
-)
+from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
-from users.views import CreateUserView, ManageUserView
+from users.views import (
+    CreateUserView,
+    ManageUserView,
+    ThrottledTokenObtainPairView,
+    TokenRevokeView,
+)
 
 
 urlpatterns = [
@@ -15,7 +16,7 @@ urlpatterns = [
     path("me/", ManageUserView.as_view(), name="me"),
     path(
         "token/",
-        TokenObtainPairView.as_view(),
+        ThrottledTokenObtainPairView.as_view(),
         name="token_obtain_pair"
     ),
     path(
@@ -24,6 +25,7 @@ urlpatterns = [
         name="token_refresh"
     ),
     path("token/verify/", TokenVerifyView.as_view(), name="token_verify"),
+    path("token/revoke/", TokenRevokeView.as_view(), name="token_revoke"),
 ]
 
 app_name = "users"
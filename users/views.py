@@ -1,7 +1,17 @@
-from rest_framework import generics
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.contrib.auth import get_user_model
 
-from users.serializers import UserSerializer
+from rest_framework import generics, status
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from city_library_api.throttling import ScopedTokenBucketThrottle
+
+from users.serializers import (
+    ManageUserSerializer,
+    TokenRevokeSerializer,
+    UserSerializer,
+)
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -10,8 +20,33 @@ class CreateUserView(generics.CreateAPIView):
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
-    serializer_class = UserSerializer
+    serializer_class = ManageUserSerializer
     permission_classes = (IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        # The authenticated user may be built from token claims only, load
+        # the whole row before updating it.
+        if self.request.method in SAFE_METHODS:
+            return self.request.user
+        return get_user_model().objects.get(pk=self.request.user.pk)
+
+
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    """Token issue, throttled per client IP to slow down password guessing."""
+    throttle_classes = (ScopedTokenBucketThrottle,)
+    throttle_scope = "auth"
+
+
+class TokenRevokeView(generics.GenericAPIView):
+    """
+    Log out: revoke the access token of the request, and the refresh token
+    when given, on every server within seconds.
+    """
+    serializer_class = TokenRevokeSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(status=status.HTTP_204_NO_CONTENT)